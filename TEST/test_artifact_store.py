@@ -0,0 +1,100 @@
+"""
+Test the Studio artifact store and cached artifact generation.
+Uses a stub OpenRouter client so it runs offline.
+"""
+
+import sys
+import io
+import time
+
+import pytest
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import studio_features
+from artifact_store import ArtifactStore, artifact_store, problem_fingerprint
+from openrouter_client import OpenRouterClient
+
+PROBLEM = "Solve for x: 2x + 5 = 13"
+
+
+class CountingClient(OpenRouterClient):
+    def __init__(self):
+        super().__init__(api_key="test")
+        self.calls = 0
+
+    def chat_completion(self, model, messages, stream=False, temperature=0.7, max_tokens=None):
+        self.calls += 1
+        content = "## Linear Equations\n- Isolate x\n---\n## Practice\n- Try 3x - 1 = 8"
+        return {"choices": [{"message": {"content": content}}]}
+
+
+@pytest.fixture
+def empty_artifact_store():
+    """The shared artifact store, emptied before and after the test."""
+    artifact_store.clear()
+    yield artifact_store
+    artifact_store.clear()
+
+
+def test_key_and_fingerprint():
+    assert problem_fingerprint("Solve  for x:\n2x") == problem_fingerprint("Solve for x: 2x")
+    key_a = ArtifactStore.make_key(PROBLEM, "quiz", "model-a", 1)
+    key_b = ArtifactStore.make_key(PROBLEM, "quiz", "model-a", 2)
+    assert key_a != key_b, "prompt version is part of the key"
+    print("✅ Keys depend on problem, feature, model and prompt version")
+
+
+def test_size_based_eviction():
+    store = ArtifactStore(max_bytes=100)
+    store.put(("p", "audio", "m", 1), {"media": b"x" * 60})
+    store.put(("p", "video", "m", 1), {"media": b"x" * 30})
+    assert store.get(("p", "audio", "m", 1)) is not None  # audio is now most recent
+
+    store.put(("p", "slides", "m", 1), {"media": b"x" * 30})  # 120 bytes -> evict video
+    assert store.get(("p", "video", "m", 1)) is None
+    assert store.get_stats()["total_bytes"] == 90
+
+    store.put(("p", "huge", "m", 1), {"media": b"x" * 500})  # larger than budget: skipped
+    assert store.get(("p", "huge", "m", 1)) is None
+    print("✅ Size-bounded LRU eviction works")
+
+
+def test_reopening_modal_makes_no_model_calls(monkeypatch, empty_artifact_store):
+    stub = CountingClient()
+    monkeypatch.setattr(studio_features, "client", stub)
+
+    for feature in ("quiz", "mindmap", "slidedeck"):
+        start = time.perf_counter()
+        first = studio_features.build_studio_artifact(feature, PROBLEM)
+        first_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        again = studio_features.build_studio_artifact(feature, PROBLEM)
+        again_time = time.perf_counter() - start
+
+        assert again == first
+        print(f"   {feature}: first {first_time * 1000:.1f}ms, reopen {again_time * 1000:.2f}ms")
+
+    assert stub.calls == 3
+    assert studio_features.build_studio_artifact("slidedeck", PROBLEM)["media"].head(4) == b"%PDF"
+
+    studio_features.build_studio_artifact("quiz", PROBLEM + " (part b)")
+    assert stub.calls == 4
+    fingerprints = {problem_fingerprint(PROBLEM), problem_fingerprint(PROBLEM + " (part b)")}
+    assert not [key for key in list(studio_features._build_locks.keys()) if key[0] in fingerprints], \
+        "build locks are dropped once no build holds them"
+    print(f"✅ Reopened modals served from cache: {empty_artifact_store.get_stats()}")
+
+
+if __name__ == "__main__":
+    test_key_and_fingerprint()
+    test_size_based_eviction()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        artifact_store.clear()
+        try:
+            test_reopening_modal_makes_no_model_calls(monkeypatch, artifact_store)
+        finally:
+            artifact_store.clear()
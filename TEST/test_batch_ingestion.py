@@ -0,0 +1,189 @@
+"""
+Test batch ingestion of a whole unit: concurrent fetching with per-host
+limits, deduplication before and after extraction, failures reported per
+source, and one combined retrieval index labelled by source.
+"""
+
+import sys
+import io
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+import content_extractors
+from batch_ingestion import ingest_sources, normalize_url, split_inputs
+from content_extractors import extract_content
+from page_cache import PageCache
+from transcript_cache import TranscriptCache
+from tutoring_engine import TutoringEngine
+
+DELAY = 0.2
+TOPICS = ["limits", "derivatives", "integrals", "series", "vectors", "matrices"]
+
+
+def page(topic: str) -> bytes:
+    return (f"<html><head><title>Notes on {topic}</title></head><body><main>"
+            f"<p>This page explains {topic} in detail with worked examples.</p>"
+            f"<p>Key fact about {topic}: remember the {topic}-{len(topic)} rule.</p></main></body></html>").encode()
+
+
+class FakeCourseSite(BaseHTTPRequestHandler):
+    """Slow course pages; tracks requests in flight per Host header."""
+
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    state = {}
+
+    @classmethod
+    def reset(cls):
+        cls.state = {"active": {}, "max_active": {}, "hits": 0, "lock": threading.Lock()}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        host = self.headers["Host"].split(":")[0]
+        state = self.state
+        with state["lock"]:
+            state["hits"] += 1
+            state["active"][host] = state["active"].get(host, 0) + 1
+            state["max_active"][host] = max(state["max_active"].get(host, 0), state["active"][host])
+        try:
+            time.sleep(DELAY)
+            topic = self.path.strip("/").split("/")[-1].split("?")[0]
+            if topic == "mirror":
+                topic = "limits"  # Same content as /limits under another URL
+            if topic not in TOPICS:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            body = page(topic)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        finally:
+            with state["lock"]:
+                state["active"][host] -= 1
+
+
+class FakeTranscriptApi:
+    """Two-hour lecture whose captions name the video."""
+
+    @classmethod
+    def get_transcript(cls, video_id, languages=None):
+        time.sleep(DELAY)
+        return [{"text": f"video {video_id} minute {i // 15} talks about eigenvalue topic {i}",
+                 "start": i * 4.0, "duration": 4.0} for i in range(1800)]
+
+
+def build_pdf() -> bytes:
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    pdf.drawString(72, 750, "Problem sheet: prove the mean value theorem for differentiable functions.")
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def start_site():
+    FakeCourseSite.reset()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeCourseSite)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    directory = tempfile.mkdtemp()
+    content_extractors.page_cache = PageCache(path=os.path.join(directory, "pages.db"))
+    content_extractors.transcript_cache = TranscriptCache(path=os.path.join(directory, "transcripts.db"))
+    content_extractors.YouTubeTranscriptApi = FakeTranscriptApi
+    content_extractors.YOUTUBE_API_AVAILABLE = True
+    port = server.server_address[1]
+    return server, f"http://127.0.0.1:{port}", f"http://localhost:{port}"
+
+
+def test_split_and_normalize():
+    assert split_inputs("https://a.edu/x\n\n https://youtu.be/abc \n") == ["https://a.edu/x", "https://youtu.be/abc"]
+    assert split_inputs("Solve x^2 = 4\nShow your work") == ["Solve x^2 = 4\nShow your work"]
+    assert split_inputs("   ") == []
+    assert normalize_url("HTTPS://A.edu/notes/?utm_source=x&b=2&a=1#part2") == "https://a.edu/notes?a=1&b=2"
+    print("✅ Text box split into links; URLs normalized for dedupe")
+
+
+def test_unit_loads_concurrently_with_per_host_limit():
+    server, site_a, site_b = start_site()
+    links = [f"{site_a}/{topic}" for topic in TOPICS[:4]] + [f"{site_b}/{topic}" for topic in TOPICS[4:]]
+
+    start = time.perf_counter()
+    for link in links:
+        extract_content(link)
+    serial = time.perf_counter() - start
+    content_extractors.page_cache = PageCache(path=os.path.join(tempfile.mkdtemp(), "pages.db"))
+    FakeCourseSite.reset()
+
+    batch = ingest_sources(links, per_host=2)
+    assert len(batch.sources) == len(links) and not batch.failed
+    assert FakeCourseSite.state["max_active"] == {"127.0.0.1": 2, "localhost": 2}
+    assert batch.elapsed < serial / 2
+    server.shutdown()
+    print(f"✅ {len(links)} pages on 2 hosts: {serial:.2f}s one by one vs {batch.elapsed:.2f}s batched "
+          f"(≤2 in flight per host)")
+
+
+def test_dedupe_failures_and_combined_index():
+    server, site, _ = start_site()
+    pdf = build_pdf()
+    links = [
+        f"{site}/limits",
+        f"{site}/limits/?utm_source=newsletter#examples",  # same URL
+        f"{site}/mirror",  # same content, different URL
+        f"{site}/missing",  # 404
+        f"{site}/series",
+        "https://www.youtube.com/watch?v=lecture1",
+        "https://youtu.be/lecture1",  # same video
+        "https://youtu.be/lecture2",
+    ]
+    files = [("sheet.pdf", pdf), ("copy of sheet.pdf", pdf), ("notes.txt", b"Bring a calculator on Friday.")]
+
+    batch = ingest_sources(links, files)
+    labels = [source.label for source in batch.sources]
+    assert labels == ["Notes on limits", "Notes on series", "YouTube Video lecture1", "YouTube Video lecture2",
+                      "sheet.pdf", "notes.txt"]
+    assert len(batch.duplicates) == 4
+    assert [source.target for source in batch.failed] == [f"{site}/missing"]
+    assert "404" in batch.failed[0].error
+    server.shutdown()
+
+    context = batch.knowledge_context()
+    assert context.startswith("Study unit: 6 sources") and all(label in context for label in labels)
+    assert "video, 120 min" in context and len(context) < 8000
+
+    engine = TutoringEngine()
+    engine.load_sources(batch.index_sources())
+    assert set(engine.source_index.sources) == set(labels)
+
+    excerpts = engine.retrieve_context("What is the key fact about series?")
+    assert "[1] (Notes on series)" in excerpts
+    excerpts = engine.retrieve_context("mean value theorem proof")
+    assert "[1] (sheet.pdf)" in excerpts
+
+    excerpts = engine.retrieve_context("I got lost at 10:02")
+    assert "(YouTube Video lecture1, 9:" in excerpts and "(YouTube Video lecture2, 9:" in excerpts
+    restored = TutoringEngine.from_dict(engine.to_dict())
+    assert restored.retrieve_context("I got lost at 10:02") == excerpts
+    print(f"✅ 11 inputs -> {len(labels)} sources ({len(batch.duplicates)} duplicates, 1 failed), "
+          f"one index of {len(engine.source_index)} chunks labelled by source")
+
+
+if __name__ == "__main__":
+    test_split_and_normalize()
+    test_unit_loads_concurrently_with_per_host_limit()
+    test_dedupe_failures_and_combined_index()
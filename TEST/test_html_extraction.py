@@ -0,0 +1,119 @@
+"""
+Test the streaming lxml page extraction against the BeautifulSoup path:
+same text on typical pages, boilerplate pruned, bounded work on huge pages,
+and a parse time / peak memory benchmark on a synthetic HTML corpus.
+"""
+
+import sys
+import io
+import json
+import os
+import subprocess
+import tempfile
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from content_extractors import URLExtractor
+
+SCRIPT = "<script>" + "window.analytics.push({event: 'view', id: 12345});" * 20 + "</script>"
+NAV = "<nav><ul>" + "".join(f"<li><a href='/p{i}'>Page {i}</a></li>" for i in range(300)) + "</ul></nav>"
+
+
+def docs_page(sections: int) -> str:
+    """Documentation-style page: big sidebar, inline scripts, long <main>."""
+    body = "".join(
+        f"<section><h2>Section {i}</h2><p>The function <code>solve_{i}</code> returns the roots of a "
+        f"quadratic; see the example below.</p><pre>x = solve_{i}(1, -3, 2)</pre>{SCRIPT if i % 10 == 0 else ''}"
+        f"</section>"
+        for i in range(sections)
+    )
+    return (f"<!DOCTYPE html><html><head><title>API Reference</title>{SCRIPT}<style>body{{margin:0}}</style></head>"
+            f"<body><header><h1>Docs</h1></header>{NAV}<main>{body}</main>"
+            f"<aside>Related pages</aside><footer>© 2024</footer></body></html>")
+
+
+CORPUS = {
+    "article": ("<html><head><title>Photosynthesis</title></head><body>" + NAV +
+                "<article><h1>Photosynthesis</h1>" + "<p>Plants turn light into chemical energy.</p>" * 200 +
+                "</article>" + SCRIPT + "</body></html>"),
+    "div-content": ("<html><head><title>Lecture 3</title></head><body><div class='site'><div class='page-content'>"
+                    + "<p>Newton's second law: F = m a.</p><!-- ad slot -->" * 300 + "</div></div></body></html>"),
+    "no-landmarks": ("<html><body><h1>Notes</h1>" + "<div><span>Entropy</span> always increases.</div>" * 300 +
+                     "<noscript>enable js</noscript></body></html>"),
+    "docs-1mb": docs_page(3000),
+}
+
+
+def test_same_text_as_beautifulsoup():
+    for name, html in CORPUS.items():
+        data = html.encode()
+        assert URLExtractor._parse_html_lxml(data) == URLExtractor._parse_html_soup(data), name
+    content, title = URLExtractor.parse_html(CORPUS["docs-1mb"].encode())
+    assert title == "API Reference" and "solve_2999" in content
+    assert "analytics" not in content and "Page 12" not in content and "© 2024" not in content
+    print(f"✅ lxml path matches BeautifulSoup output on {len(CORPUS)} pages, boilerplate removed")
+
+
+def test_huge_page_is_bounded():
+    html = docs_page(30000).encode()  # ~9MB
+    content, _ = URLExtractor._parse_html_lxml(html, max_bytes=1024 * 1024)
+    assert "Section 0" in content and "solve_29999" not in content
+    assert len(content) < len(html) / 10
+    print(f"✅ {len(html) / 1e6:.1f}MB page: parsing stops after the first 1MB")
+
+
+BENCH = """
+import json, resource, sys, time, tracemalloc
+from content_extractors import URLExtractor
+html = open(sys.argv[1], "rb").read()
+parse = getattr(URLExtractor, sys.argv[2])
+base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+start = time.perf_counter()
+parse(html)
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base
+tracemalloc.start()
+parse(html)
+peak = tracemalloc.get_traced_memory()[1]
+print(json.dumps({"seconds": elapsed, "python_peak": peak, "rss_growth_kb": rss}))
+"""
+
+
+def measure(path: str, method: str) -> dict:
+    """Parse one saved page in a fresh interpreter (so peak memory is per parse)."""
+    result = subprocess.run(
+        [sys.executable, "-c", BENCH, path, method],
+        capture_output=True, text=True, check=True,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_benchmark_parse_time_and_memory():
+    if sys.platform == 'win32':
+        print("⚠️  Benchmark skipped (resource module unavailable on Windows)")
+        return
+    directory = tempfile.mkdtemp()
+    pages = {"docs-1mb": CORPUS["docs-1mb"], "docs-5mb": docs_page(16000)}
+    for name, html in pages.items():
+        path = os.path.join(directory, f"{name}.html")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(html)
+        soup = measure(path, "_parse_html_soup")
+        fast = measure(path, "_parse_html_lxml")
+        assert fast["seconds"] < soup["seconds"]
+        assert fast["python_peak"] < soup["python_peak"]
+        # Python peak misses libxml2's own allocations; RSS growth covers both parsers
+        print(f"✅ {name} ({len(html) / 1e6:.1f}MB): "
+              f"BeautifulSoup {soup['seconds'] * 1000:.0f}ms / {soup['python_peak'] / 1e6:.0f}MB Python peak / "
+              f"+{soup['rss_growth_kb'] / 1024:.0f}MB RSS  vs  "
+              f"lxml {fast['seconds'] * 1000:.0f}ms / {fast['python_peak'] / 1e6:.1f}MB / "
+              f"+{fast['rss_growth_kb'] / 1024:.0f}MB RSS")
+
+
+if __name__ == "__main__":
+    test_same_text_as_beautifulsoup()
+    test_huge_page_is_bounded()
+    test_benchmark_parse_time_and_memory()
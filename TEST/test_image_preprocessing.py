@@ -0,0 +1,106 @@
+"""
+Test the vision preprocessing stage and report bytes saved / latency change.
+Runs offline - test images are drawn with PIL.
+"""
+
+import sys
+import io
+import base64
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from PIL import Image, ImageDraw
+
+from image_preprocessing import preprocess_image, crop_whitespace, estimate_vision_tokens
+
+
+def make_screenshot(width: int = 2400, height: int = 1600, colour: bool = False) -> Image.Image:
+    """A homework-style screenshot: dark text on a white page with wide margins."""
+    image = Image.new("RGB", (width, height), (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    for line in range(20):
+        y = 400 + line * 40
+        draw.text((500, y), f"{line + 1}. Solve for x: {line + 2}x + 5 = {line * 3 + 13}", fill=(20, 20, 20))
+    if colour:
+        draw.rectangle((500, 300, 1500, 360), fill=(220, 40, 40))
+    return image
+
+
+def make_photo(width: int = 4032, height: int = 3024) -> Image.Image:
+    """A noisy colour photo (phone camera) with an EXIF rotation tag."""
+    image = Image.effect_noise((width // 4, height // 4), 60).convert("RGB").resize((width, height))
+    image = Image.merge("RGB", (image.split()[0], image.split()[1].point(lambda v: v // 2), image.split()[2]))
+    exif = image.getexif()
+    exif[0x0112] = 6  # Rotated 90 degrees clockwise
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", exif=exif)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+def decode(data_uri: str) -> Image.Image:
+    return Image.open(io.BytesIO(base64.b64decode(data_uri.split(",", 1)[1])))
+
+
+def test_screenshot_is_cropped_downsampled_and_grayscale():
+    data_uri, report = preprocess_image(make_screenshot(), measure_baseline=True)
+    image = decode(data_uri)
+
+    assert report["cropped"]
+    assert report["grayscale"]
+    assert image.mode == "L"
+    assert max(image.size) <= 2048 and min(image.size) <= 768
+    assert report["final_bytes"] < report["baseline_bytes"]
+    print(f"✅ Screenshot: {report['baseline_bytes']} -> {report['final_bytes']} bytes ({report['format']})")
+
+
+def test_colour_is_kept_when_meaningful():
+    _, report = preprocess_image(make_screenshot(colour=True))
+    assert not report["grayscale"]
+    print("✅ Colour images stay in colour")
+
+
+def test_exif_orientation_applied():
+    data_uri, report = preprocess_image(make_photo())
+    width, height = decode(data_uri).size
+    assert height > width, "portrait after EXIF transpose"
+    print(f"✅ Photo auto-oriented to {width}x{height} ({report['format']})")
+
+
+def test_small_images_not_upscaled():
+    image = Image.new("RGB", (300, 200), (255, 255, 255))
+    ImageDraw.Draw(image).text((10, 10), "x^2 = 4", fill=(0, 0, 0))
+    data_uri, _ = preprocess_image(image)
+    width, height = decode(data_uri).size
+    assert width <= 300 and height <= 200
+    assert crop_whitespace(Image.new("RGB", (50, 50), (255, 255, 255))).size == (50, 50)
+    print("✅ Small and blank images handled")
+
+
+def report_savings():
+    print("\n" + "=" * 60)
+    print("VISION PREPROCESSING REPORT")
+    print("=" * 60)
+    samples = {
+        "screenshot 2400x1600": make_screenshot(),
+        "colour screenshot": make_screenshot(colour=True),
+        "phone photo 4032x3024": make_photo(),
+    }
+    for name, image in samples.items():
+        _, report = preprocess_image(image, measure_baseline=True)
+        saved = report["bytes_saved"] / report["baseline_bytes"] * 100
+        print(f"{name:24s} {report['baseline_bytes'] / 1024:8.0f} KB -> {report['final_bytes'] / 1024:6.0f} KB "
+              f"({saved:.0f}% smaller, {report['format']}) | encode {report['baseline_time'] * 1000:.0f}ms -> "
+              f"{report['preprocess_time'] * 1000:.0f}ms | tokens {report['estimated_tokens_before']} -> "
+              f"{report['estimated_tokens_after']}")
+    assert estimate_vision_tokens(512, 512) == 255
+
+
+if __name__ == "__main__":
+    test_screenshot_is_cropped_downsampled_and_grayscale()
+    test_colour_is_kept_when_meaningful()
+    test_exif_orientation_applied()
+    test_small_images_not_upscaled()
+    report_savings()
@@ -0,0 +1,70 @@
+"""
+Cold-start regression check: importing studio_features (as app.py does at
+startup) must not load the media stacks or create studio_outputs/.
+
+Uses `python -X importtime` in a fresh interpreter and compares the module's
+own import cost with the cost of the media stacks it defers.
+"""
+
+import sys
+import io
+import os
+import subprocess
+import tempfile
+from pathlib import Path
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Loaded only when a Studio feature actually renders media
+MEDIA_MODULES = {
+    "reportlab", "gtts", "moviepy", "imageio_ffmpeg", "markdown",
+    "PIL.ImageDraw", "PIL.ImageFont", "slide_renderer", "tts_pipeline", "video_encoder",
+}
+
+# Shared with the rest of the app, loaded before studio_features at startup
+PRELOAD = "import streamlit, openrouter_client, config"
+MEDIA_STACK = "import slide_renderer, tts_pipeline, video_encoder, PIL.ImageDraw, PIL.ImageFont"
+
+
+def importtime(code: str, cwd: str) -> dict:
+    """Run code under -X importtime; return {module: cumulative microseconds}."""
+    env = {**os.environ, "PYTHONPATH": str(REPO_ROOT)}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=cwd, env=env, capture_output=True, text=True, check=True
+    )
+    timings = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            timings[name.strip()] = int(cumulative)
+    return timings
+
+
+def test_studio_features_import_is_lazy():
+    with tempfile.TemporaryDirectory() as cwd:
+        timings = importtime(f"{PRELOAD}; import studio_features", cwd)
+        loaded = MEDIA_MODULES & set(timings)
+        assert not loaded, f"media stacks imported at startup: {sorted(loaded)}"
+        assert not (Path(cwd) / "studio_outputs").exists(), "studio_outputs/ created on import"
+    print(f"✅ studio_features imports no media stacks ({timings['studio_features'] / 1000:.1f}ms)")
+
+
+def test_import_cost_vs_media_stack():
+    with tempfile.TemporaryDirectory() as cwd:
+        timings = importtime(f"{PRELOAD}; import studio_features; {MEDIA_STACK}", cwd)
+    studio_ms = timings["studio_features"] / 1000
+    media_ms = sum(timings[name] for name in ("slide_renderer", "tts_pipeline", "video_encoder")) / 1000
+    assert studio_ms < media_ms / 2, f"studio_features {studio_ms:.1f}ms vs deferred media {media_ms:.1f}ms"
+    print(f"✅ Cold start: studio_features {studio_ms:.1f}ms, deferred media stacks {media_ms:.1f}ms")
+
+
+if __name__ == "__main__":
+    test_studio_features_import_is_lazy()
+    test_import_cost_vs_media_stack()
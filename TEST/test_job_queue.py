@@ -0,0 +1,134 @@
+"""
+Test the background render job queue: results, progress polling,
+cancellation, failures and the bounded worker count.
+"""
+
+import sys
+import io
+import time
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from job_queue import JobQueue, JobCancelled, report_progress, CANCELLED, DONE, FAILED, QUEUED, RUNNING
+
+WORKERS = 2
+queue = JobQueue(max_workers=WORKERS)
+
+
+def add(a, b):
+    return a + b
+
+
+def staged_job(stages, delay):
+    for stage in range(stages):
+        report_progress(stage / stages, f"Stage {stage + 1}/{stages}")
+        time.sleep(delay)
+    return "rendered"
+
+
+def timed_job(delay):
+    start = time.time()
+    time.sleep(delay)
+    return start, time.time()
+
+
+def failing_job():
+    raise RuntimeError("ffmpeg exited with status 1")
+
+
+def wait_for_state(job, state, timeout=10):
+    deadline = time.time() + timeout
+    while job.state != state and time.time() < deadline:
+        time.sleep(0.02)
+    return job.state
+
+
+def test_result_retrieval():
+    job = queue.submit(add, 2, b=3)
+    assert job.result(timeout=30) == 5
+    assert queue.result(job.id) == 5
+    assert job.status() == {"state": DONE, "progress": 1.0, "message": "Done", "error": None}
+    print("✅ Results retrieved by handle and by job id")
+
+
+def test_progress_polling():
+    job = queue.submit(staged_job, 5, 0.2)
+    assert wait_for_state(job, RUNNING) == RUNNING
+
+    seen = set()
+    while not job.done():
+        status = job.status()
+        if status["message"]:
+            seen.add(status["message"])
+        time.sleep(0.05)
+
+    assert job.result() == "rendered"
+    assert len(seen) >= 3, seen
+    print(f"✅ Progress polled while running: {sorted(seen)}")
+
+
+def test_cancel_running_job():
+    job = queue.submit(staged_job, 100, 0.1)
+    while not job.status()["message"]:
+        time.sleep(0.02)
+
+    start = time.perf_counter()
+    assert job.cancel()
+    assert wait_for_state(job, CANCELLED) == CANCELLED
+    stop_time = time.perf_counter() - start
+
+    try:
+        job.result()
+        assert False, "cancelled job should not return a result"
+    except JobCancelled:
+        pass
+    assert stop_time < 1.0
+    print(f"✅ Running job stopped {stop_time * 1000:.0f}ms after cancel")
+
+
+def test_cancel_queued_job():
+    blockers = [queue.submit(timed_job, 0.5) for _ in range(WORKERS)]
+    queued = queue.submit(add, 1, 1)
+    assert queued.state == QUEUED, "held in the parent until a worker is free"
+    assert queued.cancel()
+    assert queued.state == CANCELLED
+    for blocker in blockers:
+        blocker.result()
+    assert not queued.cancel(), "finished jobs can't be cancelled"
+    print("✅ Queued job dropped without running")
+
+
+def test_failure_is_reported():
+    job = queue.submit(failing_job)
+    assert wait_for_state(job, FAILED) == FAILED
+    assert job.status()["error"] == "ffmpeg exited with status 1"
+    print("✅ Failed job reports its error")
+
+
+def test_worker_pool_is_bounded():
+    jobs = [queue.submit(timed_job, 0.4) for _ in range(WORKERS * 2)]
+    spans = [job.result(timeout=30) for job in jobs]
+
+    # At no point do more than WORKERS jobs overlap
+    for start, _ in spans:
+        running = sum(1 for s, e in spans if s <= start < e)
+        assert running <= WORKERS
+    print(f"✅ {len(jobs)} jobs shared {WORKERS} worker processes")
+
+
+def test_report_progress_outside_job_is_noop():
+    report_progress(0.5, "inline call")
+    print("✅ report_progress is a no-op outside the queue")
+
+
+if __name__ == "__main__":
+    test_result_retrieval()
+    test_progress_polling()
+    test_cancel_running_job()
+    test_cancel_queued_job()
+    test_failure_is_reported()
+    test_worker_pool_is_bounded()
+    test_report_progress_outside_job_is_noop()
+    queue.shutdown()
@@ -0,0 +1,139 @@
+"""
+Test the managed studio_outputs/ directory: content-hash names, concurrent
+writers, age/size quotas and background GC. Uses a temporary directory.
+"""
+
+import sys
+import io
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import studio_features
+from managed_outputs import ManagedOutputDir
+from media_output import MediaOutput
+
+DAY = 24 * 3600
+
+
+def make_dir(tmp, **kwargs) -> ManagedOutputDir:
+    outputs = ManagedOutputDir(tmp, **{"max_bytes": 10_000, "max_age_seconds": 7 * DAY, **kwargs})
+    outputs.start_background_gc = lambda: None  # GC is driven explicitly in these tests
+    return outputs
+
+
+def age(path: Path, seconds: float):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def test_identical_outputs_are_stored_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = make_dir(tmp)
+        first = outputs.store(b"same audio", "audio_overview", "mp3")
+        second = outputs.store(MediaOutput.from_bytes(b"same audio", "a.mp3", "audio/mp3"), "audio_overview", "mp3")
+        other = outputs.store(b"other audio", "audio_overview", "mp3")
+
+        assert first == second and first != other
+        assert len(os.listdir(tmp)) == 2
+        print(f"✅ Content-hash names dedupe identical renders ({first.name})")
+
+
+def test_concurrent_writers_never_collide():
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = make_dir(tmp, max_bytes=10**9)
+        payloads = [f"render {i}".encode() * 100 for i in range(200)]
+
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            paths = list(pool.map(lambda data: outputs.store(data, "video_overview", "mp4"), payloads))
+
+        assert len(set(paths)) == len(payloads)
+        assert all(path.read_bytes() == data for path, data in zip(paths, payloads))
+        assert not [name for name in os.listdir(tmp) if name.startswith(".tmp_")]
+        print(f"✅ {len(payloads)} concurrent writes in the same second, no collisions or partial files")
+
+
+def test_age_quota_only_touches_own_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = make_dir(tmp)
+        fresh = outputs.store(b"fresh", "slides", "pdf")
+        old = outputs.store(b"old", "slides", "pdf")
+        stale_temp = Path(tmp) / ".tmp_abandoned"
+        stale_temp.write_bytes(b"partial")
+        # Like the samples checked into studio_outputs/: not written by the manager
+        timestamped = Path(tmp) / "audio_overview_20251202_163202.mp3"
+        timestamped.write_bytes(b"mp3")
+        unrelated = Path(tmp) / "test_audio.mp3"
+        unrelated.write_bytes(b"keep me")
+        for path in (old, timestamped, unrelated):
+            age(path, 30 * DAY)
+        age(stale_temp, 2 * 3600)
+
+        result = outputs.collect_garbage()
+        assert result["removed"] == 2
+        assert fresh.exists() and timestamped.exists() and unrelated.exists()
+        assert not old.exists() and not stale_temp.exists()
+        print(f"✅ Age quota removed expired outputs and stale temp files, kept files it didn't write: {result}")
+
+
+def test_size_quota_removes_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = make_dir(tmp, max_bytes=2500)
+        paths = [outputs.store(bytes([i]) * 1000, "audio_overview", "mp3") for i in range(4)]
+        for offset, path in enumerate(paths):
+            age(path, (10 - offset) * 60)
+        outputs.store(bytes([0]) * 1000, "audio_overview", "mp3")  # Re-render refreshes the oldest
+
+        result = outputs.collect_garbage()
+        assert result["remaining_bytes"] <= 2500
+        assert paths[0].exists() and paths[3].exists()
+        assert not paths[1].exists() and not paths[2].exists()
+        print(f"✅ Size quota evicted least recently used files: {result}")
+
+
+def test_background_gc_runs():
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = ManagedOutputDir(tmp, max_bytes=10_000, max_age_seconds=60, gc_interval_seconds=0.05)
+        path = outputs.store(b"expiring", "slides", "pdf")  # Starts the GC thread
+        age(path, 120)
+
+        deadline = time.time() + 5
+        while path.exists() and time.time() < deadline:
+            time.sleep(0.02)
+        outputs.stop_background_gc()
+        assert not path.exists()
+        print("✅ Background GC thread enforces quotas")
+
+
+def test_persist_output_is_opt_in():
+    with tempfile.TemporaryDirectory() as tmp:
+        original_dir, original_flag = studio_features.studio_outputs, studio_features.STUDIO_PERSIST_OUTPUTS
+        studio_features.studio_outputs = make_dir(tmp)
+        try:
+            output = MediaOutput.from_bytes(b"%PDF-1.4 slides", "slides_20260101_000000.pdf", "application/pdf")
+            studio_features.STUDIO_PERSIST_OUTPUTS = False
+            studio_features.persist_output(output, "slides")
+            assert os.listdir(tmp) == []
+
+            studio_features.STUDIO_PERSIST_OUTPUTS = True
+            studio_features.persist_output(output, "slides")
+            (name,) = os.listdir(tmp)
+            assert name.startswith("slides_") and name.endswith(".pdf")
+        finally:
+            studio_features.studio_outputs, studio_features.STUDIO_PERSIST_OUTPUTS = original_dir, original_flag
+        print(f"✅ Outputs persisted only when configured ({name})")
+
+
+if __name__ == "__main__":
+    test_identical_outputs_are_stored_once()
+    test_concurrent_writers_never_collide()
+    test_age_quota_only_touches_own_files()
+    test_size_quota_removes_least_recently_used()
+    test_background_gc_runs()
+    test_persist_output_is_opt_in()
@@ -0,0 +1,102 @@
+"""
+Test in-memory and memory-mapped media outputs: no disk writes by default,
+large files memory-mapped and cleaned up, pickling across processes.
+"""
+
+import sys
+import io
+import gc
+import os
+import pickle
+import tempfile
+from pathlib import Path
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import studio_features
+from artifact_store import ArtifactStore
+from media_output import MediaOutput, new_temp_path
+
+
+def write_temp(size: int) -> Path:
+    path = new_temp_path(".mp4")
+    path.write_bytes(b"\x00\x00\x00\x18ftypmp42" + b"v" * (size - 12))
+    return path
+
+
+def test_small_file_is_read_into_memory():
+    path = write_temp(1024)
+    output = MediaOutput.from_file(path, "clip.mp4", "video/mp4", mmap_threshold=4096)
+    assert not output.is_file_backed
+    assert not path.exists(), "temp file deleted once read"
+    assert len(output) == 1024 and output.head(8)[4:8] == b"ftyp"
+    print("✅ Small render kept in memory, temp file removed")
+
+
+def test_large_file_is_memory_mapped_and_released():
+    path = write_temp(64 * 1024)
+    output = MediaOutput.from_file(path, "lecture.mp4", "video/mp4", mmap_threshold=4096)
+    assert output.is_file_backed and path.exists()
+    assert output.head(8)[4:8] == b"ftyp"
+    assert len(output.getvalue()) == 64 * 1024
+
+    del output
+    gc.collect()
+    assert not path.exists(), "temp file deleted when the output is released"
+    print("✅ Large render memory-mapped and cleaned up when released")
+
+
+def test_pickling_transfers_ownership():
+    path = write_temp(64 * 1024)
+    worker_side = MediaOutput.from_file(path, "lecture.mp4", "video/mp4", mmap_threshold=4096)
+    payload = pickle.dumps(worker_side)
+    assert len(payload) < 1024, "only the path crosses the process boundary"
+
+    del worker_side
+    gc.collect()
+    assert path.exists(), "sender no longer owns the file"
+
+    parent_side = pickle.loads(payload)
+    assert parent_side.head(8)[4:8] == b"ftyp"
+    del parent_side
+    gc.collect()
+    assert not path.exists()
+    print(f"✅ File-backed output pickles as a {len(payload)}-byte handle")
+
+
+def test_artifact_store_counts_mapped_media():
+    path = write_temp(64 * 1024)
+    store = ArtifactStore(max_bytes=100 * 1024)
+    store.put(("p", "video", "m", 1), {"media": MediaOutput.from_file(path, "a.mp4", "video/mp4", mmap_threshold=4096)})
+    assert store.get_stats()["total_bytes"] >= 64 * 1024
+
+    store.put(("p", "video", "m", 2), {"media": MediaOutput.from_bytes(b"x" * 60 * 1024, "b.mp4", "video/mp4")})
+    gc.collect()
+    assert store.get(("p", "video", "m", 1)) is None
+    assert not path.exists(), "evicted media released its temp file"
+    print("✅ Retained media capped by the artifact store budget")
+
+
+def test_slides_render_without_touching_disk():
+    def listing():
+        return set(os.listdir(studio_features.OUTPUT_DIR)) if studio_features.OUTPUT_DIR.exists() else set()
+
+    before = listing()
+    output = studio_features.render_slides("## Title\n- point one\n---\n## Next\n- point two", "Problem")
+    assert output.head(4) == b"%PDF" and output.mime == "application/pdf"
+    assert listing() == before
+
+    with tempfile.TemporaryDirectory() as tmp:
+        saved = output.save(tmp)
+        assert saved.read_bytes() == output.getvalue()
+    print(f"✅ Slide PDF rendered in memory ({len(output)} bytes), saved only on request")
+
+
+if __name__ == "__main__":
+    test_small_file_is_read_into_memory()
+    test_large_file_is_memory_mapped_and_released()
+    test_pickling_transfers_ownership()
+    test_artifact_store_counts_mapped_media()
+    test_slides_render_without_touching_disk()
@@ -0,0 +1,230 @@
+"""
+Test the shared OpenRouter client against a local fake API: one client per
+key, pooled keep-alive connections, shared 429 back-off, response cache and
+thread-safe metrics under concurrent sessions.
+"""
+
+import sys
+import io
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import requests
+
+import openrouter_client
+from openrouter_client import OpenRouterClient, get_client
+
+
+class FakeOpenRouter(BaseHTTPRequestHandler):
+    """Minimal /chat/completions endpoint with scripted 429s."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    disable_nagle_algorithm = True  # Otherwise delayed ACKs add ~40ms per keep-alive response
+    state = {}
+
+    @classmethod
+    def reset(cls, rate_limit_first=0, delay=0.0):
+        cls.state = {
+            "hits": 0, "ports": set(), "active": 0, "max_active": 0,
+            "rate_limit_left": rate_limit_first, "delay": delay, "lock": threading.Lock(),
+        }
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body: bytes, content_type="application/json", headers=None):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        state = self.state
+        with state["lock"]:
+            state["hits"] += 1
+            state["ports"].add(self.client_address[1])
+            state["active"] += 1
+            state["max_active"] = max(state["max_active"], state["active"])
+            limited = state["rate_limit_left"] > 0
+            state["rate_limit_left"] -= limited
+        try:
+            time.sleep(state["delay"])
+            if limited:
+                self._send(429, b'{"error": "rate limited"}', headers={"Retry-After": "0.3"})
+            elif payload["stream"]:
+                events = [
+                    {"choices": [{"delta": {"content": "Hello "}}]},
+                    {"choices": [{"delta": {"content": "there"}}], "usage": {"prompt_tokens": 7, "completion_tokens": 2}},
+                ]
+                body = "".join(f"data: {json.dumps(e)}\n\n" for e in events) + "data: [DONE]\n\n"
+                self._send(200, body.encode(), content_type="text/event-stream")
+            else:
+                text = payload["messages"][-1]["content"]
+                body = {"choices": [{"message": {"content": f"echo: {text}"}}],
+                        "usage": {"prompt_tokens": 5, "completion_tokens": 3}}
+                self._send(200, json.dumps(body).encode(), headers={"X-RateLimit-Remaining": "99"})
+        finally:
+            with state["lock"]:
+                state["active"] -= 1
+
+
+def start_server():
+    FakeOpenRouter.reset()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeOpenRouter)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def make_client(server) -> OpenRouterClient:
+    client = OpenRouterClient(api_key="test")
+    client.base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    return client
+
+
+def ask(client, text, stream=False, temperature=0.7):
+    return client.chat_completion("openai/gpt-4o-mini", [{"role": "user", "content": text}], stream=stream,
+                                  temperature=temperature)
+
+
+def test_one_client_per_key():
+    assert get_client("key-a") is get_client("key-a")
+    assert get_client("key-a") is not get_client("key-b")
+    assert get_client(openrouter_client.OPENROUTER_API_KEY) is openrouter_client.client
+    print("✅ get_client() returns one shared client per API key")
+
+
+def test_connections_are_pooled():
+    server = start_server()
+    client = make_client(server)
+    for i in range(20):
+        assert ask(client, f"q{i}")["choices"][0]["message"]["content"] == f"echo: q{i}"
+    assert FakeOpenRouter.state["hits"] == 20
+    assert len(FakeOpenRouter.state["ports"]) == 1, "sequential calls reuse one keep-alive connection"
+    server.shutdown()
+    print("✅ 20 requests over 1 pooled connection")
+
+
+def test_identical_requests_served_from_cache():
+    server = start_server()
+    client = make_client(server)
+    first = ask(client, "same question", temperature=0)
+    first["choices"][0]["message"]["content"] = "mutated by caller"
+    second = ask(client, "same question", temperature=0)
+    assert second["choices"][0]["message"]["content"] == "echo: same question"
+    assert FakeOpenRouter.state["hits"] == 1
+
+    ask(client, "same question")
+    ask(client, "same question")
+    assert FakeOpenRouter.state["hits"] == 3, "sampled requests are not cached unless the caller opts in"
+    client.chat_completion("openai/gpt-4o-mini", [{"role": "user", "content": "opt in"}], stream=False, cache=True)
+    client.chat_completion("openai/gpt-4o-mini", [{"role": "user", "content": "opt in"}], stream=False, cache=True)
+    assert FakeOpenRouter.state["hits"] == 4
+
+    list(ask(client, "same question", stream=True, temperature=0))
+    assert FakeOpenRouter.state["hits"] == 5, "streaming requests are never cached"
+
+    metrics = client.get_metrics()
+    assert metrics["cache_hits"] == 2 and metrics["cache_misses"] == 2
+    server.shutdown()
+    print("✅ Identical temperature-0 (or opted-in) requests answered from the response cache")
+
+
+def test_abandoned_stream_releases_its_slot():
+    server = start_server()
+    client = make_client(server)
+    client._slots = threading.BoundedSemaphore(1)
+
+    stream = ask(client, "long answer", stream=True)
+    next(stream)
+    assert not client._slots.acquire(blocking=False), "an open stream holds its slot"
+    stream.close()
+    assert client._slots.acquire(blocking=False), "closing the stream mid-reply releases the slot"
+    client._slots.release()
+    assert client.get_metrics()["in_flight"] == 0
+    server.shutdown()
+    print("✅ Stream closed mid-reply releases its concurrency slot and connection")
+
+
+def test_rate_limit_is_shared_and_retried():
+    server = start_server()
+    FakeOpenRouter.reset(rate_limit_first=1)
+    client = make_client(server)
+
+    start = time.perf_counter()
+    assert ask(client, "limited")["choices"][0]["message"]["content"] == "echo: limited"
+    assert time.perf_counter() - start >= 0.3, "waited out Retry-After"
+
+    metrics = client.get_metrics()
+    assert metrics["rate_limited"] == 1 and metrics["retries"] == 1 and metrics["errors"] == 0
+    assert metrics["rate_limit"]["remaining"] == 99
+    server.shutdown()
+    print("✅ 429 honoured Retry-After and was retried")
+
+
+def test_concurrent_sessions_share_metrics_and_limits():
+    server = start_server()
+    FakeOpenRouter.reset(delay=0.02)
+    client = make_client(server)
+    client._slots = threading.BoundedSemaphore(4)
+
+    def session(n):
+        for i in range(10):
+            ask(client, f"session {n} question {i}")
+        return "".join(chunk["choices"][0]["delta"]["content"] for chunk in ask(client, f"s{n}", stream=True))
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        replies = list(pool.map(session, range(8)))
+
+    assert replies == ["Hello there"] * 8
+    metrics = client.get_metrics()
+    assert metrics["requests"] == FakeOpenRouter.state["hits"] == 88
+    assert metrics["in_flight"] == 0
+    assert metrics["prompt_tokens"] == 80 * 5 + 8 * 7
+    assert metrics["completion_tokens"] == 80 * 3 + 8 * 2
+    assert FakeOpenRouter.state["max_active"] <= 4
+    assert len(FakeOpenRouter.state["ports"]) <= 4
+    server.shutdown()
+    print(f"✅ 8 concurrent sessions: 88 requests, ≤4 in flight, "
+          f"{len(FakeOpenRouter.state['ports'])} connections, counters consistent")
+
+
+def test_pooled_vs_unpooled_benchmark():
+    server = start_server()
+    client = make_client(server)
+    client.response_cache.ttl_seconds = 0
+    url = f"{client.base_url}/chat/completions"
+    payload = {"model": "m", "messages": [{"role": "user", "content": "x"}], "stream": False}
+
+    start = time.perf_counter()
+    for _ in range(50):
+        requests.post(url, json=payload, timeout=5).json()
+    unpooled = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(50):
+        ask(client, "x")
+    pooled = time.perf_counter() - start
+    server.shutdown()
+    print(f"✅ 50 local requests: {unpooled:.3f}s new connection each vs {pooled:.3f}s pooled "
+          f"(TLS handshakes make the gap larger against the real API)")
+
+
+if __name__ == "__main__":
+    test_one_client_per_key()
+    test_connections_are_pooled()
+    test_identical_requests_served_from_cache()
+    test_abandoned_stream_releases_its_slot()
+    test_rate_limit_is_shared_and_retried()
+    test_concurrent_sessions_share_metrics_and_limits()
+    test_pooled_vs_unpooled_benchmark()
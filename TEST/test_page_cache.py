@@ -0,0 +1,201 @@
+"""
+Test the web page cache behind URLExtractor against a local fake site:
+Cache-Control freshness, ETag/Last-Modified revalidation (304), no-store,
+stale fallback when the site is down, keep-alive connection reuse, and
+old or other-extractor-version entries dropped.
+"""
+
+import sys
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+import zlib
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import content_extractors
+from content_extractors import URLExtractor
+from page_cache import PageCache, freshness_lifetime
+
+PARAGRAPH = "<p>The chain rule says the derivative of f(g(x)) is f'(g(x)) times g'(x).</p>"
+PAGE = ("<html><head><title>Calculus Notes</title><script>var x = 1;</script></head><body>"
+        "<nav>Home | Courses</nav><main><h1>Chain rule</h1>" + PARAGRAPH * 3000 +
+        "</main><footer>Copyright</footer></body></html>").encode()
+
+
+class FakeSite(BaseHTTPRequestHandler):
+    """Serves PAGE under paths whose name selects the caching headers."""
+
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    disable_nagle_algorithm = True
+    state = {}
+
+    @classmethod
+    def reset(cls):
+        cls.state = {"hits": 0, "not_modified": 0, "ports": set(), "down": False, "lock": threading.Lock()}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        with self.state["lock"]:
+            self.state["hits"] += 1
+            self.state["ports"].add(self.client_address[1])
+        if self.state["down"]:
+            self.send_response(503)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        headers = {"Date": formatdate(usegmt=True)}
+        if self.path == "/fresh":
+            headers["Cache-Control"] = "public, max-age=3600"
+        elif self.path == "/etag":
+            headers.update({"Cache-Control": "no-cache", "ETag": '"v1"'})
+        elif self.path == "/modified":
+            headers["Last-Modified"] = formatdate(time.time() - 3600, usegmt=True)
+        elif self.path == "/private":
+            headers["Cache-Control"] = "no-store"
+
+        if headers.get("ETag") and self.headers.get("If-None-Match") == headers["ETag"]:
+            with self.state["lock"]:
+                self.state["not_modified"] += 1
+            self.send_response(304)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(PAGE)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(PAGE)
+
+
+def start_site():
+    FakeSite.reset()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSite)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    content_extractors.page_cache = PageCache(path=os.path.join(tempfile.mkdtemp(), "pages.db"))
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def test_freshness_rules():
+    now = time.time()
+    assert freshness_lifetime({"Cache-Control": "max-age=600"}, now) == 600
+    assert freshness_lifetime({"Cache-Control": "s-maxage=60, max-age=600"}, now) == 60
+    assert freshness_lifetime({"Cache-Control": "no-store, max-age=600"}, now) is None
+    assert freshness_lifetime({"Cache-Control": "no-cache"}, now) == 0
+    assert freshness_lifetime({"Expires": formatdate(now + 120, usegmt=True)}, now) > 100
+    assert freshness_lifetime({"Expires": "0"}, now) == 0
+    day_old = {"Last-Modified": formatdate(now - 86400, usegmt=True)}
+    assert 8000 < freshness_lifetime(day_old, now) < 9000, "10% heuristic"
+    print("✅ Cache-Control / Expires / Last-Modified freshness rules")
+
+
+def test_fresh_page_skips_download_and_parse():
+    server, base = start_site()
+    url = f"{base}/fresh"
+
+    start = time.perf_counter()
+    content, metadata = URLExtractor.extract_with_requests(url)
+    first = time.perf_counter() - start
+    assert metadata["cached"] is False and metadata["title"] == "Calculus Notes"
+    assert "chain rule" in content and "var x" not in content and "Copyright" not in content
+
+    start = time.perf_counter()
+    cached_content, cached_metadata = URLExtractor.extract_with_requests(url)
+    second = time.perf_counter() - start
+    assert cached_content == content and cached_metadata["cached"] is True
+    assert cached_metadata["title"] == "Calculus Notes"
+    assert FakeSite.state["hits"] == 1
+    server.shutdown()
+    print(f"✅ Fresh page served from cache: {first * 1000:.0f}ms fetch+parse vs {second * 1000:.1f}ms hit "
+          f"({len(PAGE) // 1024}KB page)")
+
+
+def test_etag_revalidation():
+    server, base = start_site()
+    url = f"{base}/etag"
+    content, _ = URLExtractor.extract_with_requests(url)
+    revalidated, metadata = URLExtractor.extract_with_requests(url)
+    assert revalidated == content and metadata["revalidated"] is True
+    assert FakeSite.state["hits"] == 2 and FakeSite.state["not_modified"] == 1
+    assert len(FakeSite.state["ports"]) == 1, "shared session reuses the keep-alive connection"
+
+    URLExtractor.extract_with_requests(f"{base}/modified")
+    URLExtractor.extract_with_requests(f"{base}/modified")
+    assert FakeSite.state["hits"] == 3, "Last-Modified heuristic makes the page fresh for a while"
+    server.shutdown()
+    print("✅ no-cache page revalidated with If-None-Match -> 304, text reused without reparsing")
+
+
+def test_no_store_and_stale_fallback():
+    server, base = start_site()
+    URLExtractor.extract_with_requests(f"{base}/private")
+    URLExtractor.extract_with_requests(f"{base}/private")
+    assert FakeSite.state["hits"] == 2, "no-store pages are never cached"
+    assert content_extractors.page_cache.get(f"{base}/private") is None
+
+    url = f"{base}/etag"
+    content, _ = URLExtractor.extract_with_requests(url)
+    FakeSite.state["down"] = True
+    stale, metadata = URLExtractor.extract_with_requests(url)
+    assert stale == content and metadata["stale"] is True and not metadata.get("error")
+
+    error, metadata = URLExtractor.extract_with_requests(f"{base}/never-seen")
+    assert metadata["error"] and "503" in error
+    server.shutdown()
+    print("✅ no-store respected; stale copy served while the site returns 503")
+
+
+def test_old_extractor_text_ignored_and_purged():
+    server, base = start_site()
+    path = content_extractors.page_cache.path
+    url = f"{base}/fresh"
+
+    # A cache file written before extractor versioning (BeautifulSoup-cleaned text)
+    conn = sqlite3.connect(path)
+    conn.execute("DROP TABLE IF EXISTS pages")
+    conn.execute("CREATE TABLE pages (url TEXT PRIMARY KEY, data BLOB NOT NULL, etag TEXT, last_modified TEXT, "
+                 "fetched_at REAL NOT NULL, expires_at REAL NOT NULL)")
+    blob = zlib.compress(json.dumps({"content": "old soup text", "title": "Old"}).encode("utf-8"))
+    conn.execute("INSERT INTO pages VALUES (?, ?, NULL, NULL, ?, ?)", (url, blob, time.time(), time.time() + 3600))
+    conn.commit()
+    conn.close()
+
+    cache = PageCache(path=path, purge_interval=0.1)
+    content_extractors.page_cache = cache
+    assert cache.get(url) is None, "text cleaned by another extractor version is not served"
+    content, metadata = URLExtractor.extract_with_requests(url)
+    assert metadata["cached"] is False and "chain rule" in content and FakeSite.state["hits"] == 1
+    assert cache.get(url).content == content
+
+    cache.put("https://old.example/page", "old", "Old", {"Cache-Control": "max-age=60"})
+    time.sleep(0.15)
+    cache.max_age_seconds = 0.1
+    URLExtractor.extract_with_requests(f"{base}/modified")
+    with sqlite3.connect(path) as conn:
+        urls = [row[0] for row in conn.execute("SELECT url FROM pages")]
+    assert urls == [f"{base}/modified"], "the next store after purge_interval swept the old entries"
+    server.shutdown()
+    print("✅ Old-extractor text refetched; entries past max age swept on a later store")
+
+
+if __name__ == "__main__":
+    test_freshness_rules()
+    test_fresh_page_skips_download_and_parse()
+    test_etag_revalidation()
+    test_no_store_and_stale_fallback()
+    test_old_extractor_text_ignored_and_purged()
@@ -0,0 +1,131 @@
+"""
+Test streaming PDF extraction and benchmark it on a 500-page PDF.
+Runs offline - the PDF is generated with reportlab.
+"""
+
+import sys
+import io
+import os
+import tempfile
+import threading
+import time
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import PyPDF2
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+import utils
+from config import PDF_POOL_WORKERS
+from utils import extract_text_from_pdf, iter_pdf_pages
+
+
+def build_pdf(pages: int) -> bytes:
+    """Create a text-heavy PDF with a page marker on every page."""
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    for page in range(pages):
+        pdf.drawString(72, 750, f"PAGE-{page:04d}")
+        for line in range(45):
+            pdf.drawString(72, 730 - line * 15, f"Line {line}: the derivative of x^2 is 2x, integrate both sides.")
+        pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+def legacy_extract(pdf_file) -> str:
+    """The previous implementation: serial pages, string concatenation."""
+    pdf_reader = PyPDF2.PdfReader(pdf_file)
+    text = ""
+    for page in pdf_reader.pages:
+        text += page.extract_text() + "\n"
+    return text.strip()
+
+
+def test_matches_legacy_output():
+    data = build_pdf(5)
+    assert extract_text_from_pdf(io.BytesIO(data)) == legacy_extract(io.BytesIO(data))
+    print("✅ Output matches previous extractor")
+
+
+def test_page_and_char_caps():
+    data = build_pdf(10)
+    text = extract_text_from_pdf(io.BytesIO(data), max_pages=3)
+    assert "PAGE-0002" in text and "PAGE-0003" not in text
+
+    text = extract_text_from_pdf(io.BytesIO(data), max_chars=1000)
+    assert len(text) <= 1000
+    print("✅ Page and character caps respected")
+
+
+def test_parallel_pages_stay_in_order():
+    data = build_pdf(60)
+    pages = list(iter_pdf_pages(io.BytesIO(data), workers=2))
+    assert len(pages) == 60
+    assert all(f"PAGE-{i:04d}" in text for i, text in enumerate(pages))
+    print("✅ Parallel extraction keeps page order")
+
+
+def test_concurrent_extractions_share_one_spawn_pool():
+    data = build_pdf(60)
+    results = {}
+
+    def extract(name):
+        results[name] = list(iter_pdf_pages(io.BytesIO(data), workers=2))
+
+    threads = [threading.Thread(target=extract, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert all(len(pages) == 60 and "PAGE-0059" in pages[-1] for pages in results.values())
+    pool = utils._get_pdf_pool()
+    assert pool._max_workers == PDF_POOL_WORKERS, "batch loads can't multiply worker processes"
+    assert pool._mp_context.get_start_method() == "spawn", "never fork the threaded server"
+    print(f"✅ 3 concurrent extractions shared one {PDF_POOL_WORKERS}-process spawn pool")
+
+
+def benchmark_500_pages():
+    print("\n" + "=" * 60)
+    print(f"PDF EXTRACTION BENCHMARK (500 pages, {os.cpu_count()} CPUs)")
+    print("=" * 60)
+
+    data = build_pdf(500)
+    print(f"PDF size: {len(data) / 1024:.0f} KB")
+
+    start = time.perf_counter()
+    legacy = legacy_extract(io.BytesIO(data))
+    legacy_time = time.perf_counter() - start
+    print(f"Legacy serial (+= concat):   {legacy_time:.2f}s")
+
+    start = time.perf_counter()
+    serial = "\n".join(iter_pdf_pages(io.BytesIO(data), workers=1)).strip()
+    print(f"Streaming serial:            {time.perf_counter() - start:.2f}s")
+    assert serial == legacy
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.pdf")
+        with open(path, "wb") as f:
+            f.write(data)
+        for workers in (2, 4):
+            start = time.perf_counter()
+            pages = list(iter_pdf_pages(path, workers=workers))
+            print(f"Process pool ({workers} workers):    {time.perf_counter() - start:.2f}s")
+            assert "\n".join(pages).strip() == legacy
+
+    start = time.perf_counter()
+    first_page = next(iter_pdf_pages(io.BytesIO(data), workers=1))
+    print(f"Time to first page (stream): {(time.perf_counter() - start) * 1000:.1f}ms")
+    assert "PAGE-0000" in first_page
+
+
+if __name__ == "__main__":
+    test_matches_legacy_output()
+    test_page_and_char_caps()
+    test_parallel_pages_stay_in_order()
+    test_concurrent_extractions_share_one_spawn_pool()
+    benchmark_500_pages()
@@ -0,0 +1,174 @@
+"""
+Test BM25 retrieval over long sources: facts beyond the old 5000-character
+cut-off are found, each chat turn injects only the top-k chunks, the
+index survives session persistence, and transcript chunks carry time ranges
+that timestamped questions are matched against.
+"""
+
+import sys
+import io
+import random
+import time
+
+import pytest
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import tutoring_engine
+from content_extractors import YouTubeExtractor
+from openrouter_client import OpenRouterClient
+from retrieval import BM25Index, chunk_text, chunk_transcript, parse_timestamps, tokenize
+from transcript_cache import Transcript
+from tutoring_engine import TutoringEngine
+
+FILLER = ("so today we keep going with the material from last week and we will look at a few more examples "
+          "before the break remember to check the problem sheet").split()
+
+LATE_FACT = ("The eigenvalues of a symmetric matrix are always real, and eigenvectors for distinct eigenvalues "
+             "are orthogonal, which is why the spectral theorem lets us diagonalize it with a rotation.")
+
+
+def long_lecture(words: int = 20000) -> str:
+    """~2 hours of lecture filler with one specific fact near the end."""
+    rng = random.Random(7)
+    text = [rng.choice(FILLER) for _ in range(words)]
+    text.insert(int(words * 0.9), LATE_FACT)
+    return " ".join(text)
+
+
+class RecordingClient(OpenRouterClient):
+    """Returns a canned reply and records the messages sent."""
+
+    sent = []
+
+    def chat_completion(self, model, messages, stream=False, temperature=0.7, max_tokens=None):
+        RecordingClient.sent.append(messages)
+        return {"choices": [{"message": {"content": "What do you notice about the matrix?"}}], "usage": {}}
+
+
+def prompt_chars(messages) -> int:
+    total = 0
+    for message in messages:
+        content = message["content"]
+        total += len(content) if isinstance(content, str) else sum(len(part["text"]) for part in content)
+    return total
+
+
+def test_chunking_covers_everything():
+    text = " ".join(f"w{i}" for i in range(1000))
+    chunks = chunk_text(text, chunk_words=100, overlap_words=20)
+    covered = set(" ".join(chunk.text for chunk in chunks).split())
+    assert covered == set(text.split())
+    assert all(len(chunk.text.split()) <= 100 for chunk in chunks)
+    assert tokenize("What are THE eigenvalues?") == ["eigenvalues"]
+    print(f"✅ {len(chunks)} overlapping chunks cover the whole text")
+
+
+def test_bm25_finds_late_content():
+    lecture = long_lecture()
+    assert LATE_FACT not in lecture[:5000], "fact is beyond the old truncation point"
+
+    start = time.perf_counter()
+    index = BM25Index(chunk_text(lecture, "lecture"))
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = index.search("why are eigenvalues of a symmetric matrix real?", k=3)
+    query = time.perf_counter() - start
+
+    assert results and "spectral theorem" in results[0][0].text
+    assert index.search("quantum chromodynamics", k=3) == []
+    print(f"✅ Late fact ranked first among {len(index)} chunks "
+          f"(index {build * 1000:.0f}ms, query {query * 1000:.2f}ms)")
+
+
+def test_chat_injects_only_top_k(monkeypatch):
+    monkeypatch.setattr(tutoring_engine, "client", RecordingClient(api_key="test"))
+    RecordingClient.sent = []
+
+    lecture = long_lecture()
+    overview = YouTubeExtractor.format_for_tutoring(lecture, {"duration_seconds": 7200, "word_count": 20000})
+    assert len(overview) < 3000 and "indexed" in overview
+
+    engine = TutoringEngine()
+    engine.problem_statement = overview
+    engine.load_source(lecture, "youtube:lecture")
+
+    engine.chat("Why is the spectral theorem true for a symmetric matrix?", stream=False)
+    messages = RecordingClient.sent[-1]
+    sent_text = str(messages)
+    assert "spectral theorem lets us diagonalize" in sent_text
+    assert "RELEVANT SOURCE EXCERPTS" not in str(engine.conversation_history), "excerpts not stored in history"
+    assert prompt_chars(messages) < len(lecture) / 10
+    print(f"✅ Turn prompt {prompt_chars(messages):,} chars for a {len(lecture):,}-char lecture")
+
+    engine.chat("Thanks! Can you give me a hint on eigenvectors?", stream=False)
+    second = RecordingClient.sent[-1]
+    assert "orthogonal" in str(second[-1])
+    assert "STUDENT MESSAGE" not in str(second[:-1]), "earlier turns carry no stale excerpts"
+    print("✅ Each turn retrieves its own excerpts")
+
+
+def test_index_survives_persistence():
+    engine = TutoringEngine()
+    engine.load_source(long_lecture(2000), "lecture")
+    restored = TutoringEngine.from_dict(engine.to_dict())
+    assert len(restored.source_index) == len(engine.source_index)
+    assert restored.retrieve_context("symmetric matrix eigenvalues") == engine.retrieve_context("symmetric matrix eigenvalues")
+
+    restored.reset()
+    assert restored.retrieve_context("symmetric matrix") is None
+    print("✅ Source index restored from saved session, cleared on reset")
+
+
+def timed_lecture() -> Transcript:
+    """Two-hour lecture as caption segments, with the key fact at 1:35:00."""
+    segments = [{"text": " ".join(FILLER[i % 5:i % 5 + 8]), "start": i * 4.0, "duration": 4.0} for i in range(1800)]
+    segments[1425]["text"] = LATE_FACT  # 1425 * 4s = 5700s = 1:35:00
+    return Transcript.from_segments(segments)
+
+
+def test_transcript_chunks_carry_time_ranges():
+    transcript = timed_lecture()
+    chunks = chunk_transcript(transcript, "video")
+    assert all(chunk.is_timed for chunk in chunks)
+    assert chunks[0].start == 0.0 and chunks[-1].end == transcript.duration
+    assert all(a.start < b.start <= a.end for a, b in zip(chunks, chunks[1:])), "consecutive chunks overlap"
+
+    index = BM25Index(chunks)
+    best, _ = index.search("spectral theorem symmetric matrix", k=1)[0]
+    assert best.start <= 5700 <= best.end and "1:35:" in best.label()
+    assert index.chunk_at(5701) is not None and "spectral" in index.chunk_at(5701).text
+    assert index.chunk_at(99999) is None
+    assert parse_timestamps("what was said at 12:30 and 1:35:00? (ratio 3:2)") == [750, 5700]
+    print(f"✅ {len(chunks)} transcript chunks with time ranges; fact found at {best.label()}")
+
+
+def test_timestamp_question_pulls_that_window(monkeypatch):
+    monkeypatch.setattr(tutoring_engine, "client", RecordingClient(api_key="test"))
+    engine = TutoringEngine()
+    engine.problem_statement = "Linear algebra lecture"
+    transcript = timed_lecture()
+    engine.load_source(transcript.text, "video", transcript=transcript)
+
+    context = engine.retrieve_context("At 1:35:02 the lecturer said something I didn't get")
+    first_excerpt = context.split("[2]")[0]
+    assert "spectral theorem" in first_excerpt and "(1:3" in first_excerpt
+    assert "cite them" in context
+
+    restored = TutoringEngine.from_dict(engine.to_dict())
+    assert restored.source_index.chunk_at(5702).label() == engine.source_index.chunk_at(5702).label()
+    print("✅ Timestamp in the question retrieves the transcript window playing then")
+
+
+if __name__ == "__main__":
+    test_chunking_covers_everything()
+    test_bm25_finds_late_content()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_chat_injects_only_top_k(monkeypatch)
+    test_index_survives_persistence()
+    test_transcript_chunks_carry_time_ranges()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_timestamp_question_pulls_that_window(monkeypatch)
@@ -0,0 +1,358 @@
+"""
+Test session persistence backends and measure load/save latency.
+Runs offline - no API calls are made.
+"""
+
+import sys
+import io
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from multiprocessing import get_context
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import session_store
+from session_store import (
+    InMemorySessionStore,
+    SessionStore,
+    SQLiteSessionStore,
+    RedisSessionStore,
+    LocalRedis,
+    SessionConflict,
+    create_session_store,
+    serialize_session,
+    deserialize_session,
+)
+from tutoring_engine import TutoringEngine
+
+
+def build_engine(turns: int = 10) -> TutoringEngine:
+    """Create an engine with a realistic amount of session state."""
+    engine = TutoringEngine()
+    engine.problem_statement = "Solve the quadratic equation 3x² - 5x - 2 = 0"
+    engine.reference_solution = "Using the quadratic formula... x = 2 or x = -1/3. " * 20
+    for i in range(turns):
+        engine.conversation_history.append({"role": "user", "content": f"Step {i}: I think b² - 4ac = 49 " * 5})
+        engine.conversation_history.append({"role": "assistant", "content": f"Good. What does that tell you about the roots? ({i}) " * 8})
+    engine.verification_cache["abc123"] = {"is_correct": True, "first_error_location": None}
+    engine.metrics["total_cost"] = 0.0123
+    return engine
+
+
+def _save_from_child(path: str, session_id: str):
+    store = SQLiteSessionStore(path)
+    store.save_engine(session_id, build_engine(3), extra={"setup_complete": True})
+
+
+def test_serialization_roundtrip():
+    """Small payloads stay JSON, large ones are compressed."""
+    small = {"a": 1}
+    assert serialize_session(small)[:1] == b"j"
+    assert deserialize_session(serialize_session(small)) == small
+
+    state = {"engine": build_engine().to_dict()}
+    blob = serialize_session(state)
+    assert blob[:1] == b"z"
+    assert deserialize_session(blob) == state
+    print(f"✅ Serialization round trip ({len(blob)} bytes compressed)")
+
+
+def test_engine_roundtrip_all_backends():
+    """Every backend restores the engine exactly."""
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": InMemorySessionStore(),
+            "sqlite": SQLiteSessionStore(os.path.join(tmp, "sessions.db")),
+            "redis": RedisSessionStore(LocalRedis()),
+        }
+        original = build_engine()
+        for name, store in stores.items():
+            store.save_engine("s1", original, extra={"setup_complete": True})
+            restored = store.load_engine("s1")
+            assert restored.to_dict() == original.to_dict(), name
+            assert store.load("s1")["setup_complete"] is True
+            store.delete("s1")
+            assert store.load("s1") is None
+            print(f"✅ {name}: engine round trip")
+
+
+def test_compare_and_set_all_backends():
+    """A save against a stale version fails instead of overwriting a newer one."""
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": InMemorySessionStore(),
+            "sqlite": SQLiteSessionStore(os.path.join(tmp, "sessions.db")),
+            "redis": RedisSessionStore(LocalRedis()),
+        }
+        for name, store in stores.items():
+            assert store.load_versioned("s1") == (None, 0)
+            assert store.save("s1", {"turns": 1}, expected_version=0) == 1
+            try:
+                store.save("s1", {"turns": 1}, expected_version=0)
+                assert False, f"{name}: session already exists"
+            except SessionConflict:
+                pass
+
+            state, version = store.load_versioned("s1")
+            assert store.save("s1", {"turns": 2}, expected_version=version) == 2
+            try:
+                store.save("s1", {"turns": 3}, expected_version=version)  # lost update
+                assert False, f"{name}: stale version accepted"
+            except SessionConflict:
+                pass
+            assert store.load("s1") == {"turns": 2}
+            assert store.save("s1", {"turns": 4}) == 3, "unconditional saves still bump the version"
+            print(f"✅ {name}: compare-and-set save")
+
+        # Databases created before versioning gain the column
+        path = os.path.join(tmp, "old.db")
+        conn = sqlite3.connect(path)
+        conn.execute("CREATE TABLE sessions (session_id TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)")
+        conn.execute("INSERT INTO sessions VALUES (?, ?, ?)", ("old", serialize_session({"x": 1}), time.time()))
+        conn.commit()
+        conn.close()
+        assert SQLiteSessionStore(path).load_versioned("old") == ({"x": 1}, 0)
+
+
+class RecordingStore(SQLiteSessionStore):
+    """Records the key and size of every blob written."""
+
+    def __init__(self, path):
+        super().__init__(path)
+        self.writes = []
+
+    def _set(self, session_id, blob, expected_version=None):
+        self.writes.append((session_id, len(blob)))
+        return super()._set(session_id, blob, expected_version)
+
+
+def add_turn(engine: TutoringEngine, messages: list, i: int):
+    for role, text in (("user", f"Question {i} about the lecture"), ("assistant", f"Hint {i}: look at minute {i}")):
+        engine.conversation_history.append({"role": role, "content": text})
+        messages.append({"role": role, "content": text})
+
+
+def test_turn_saves_only_the_delta():
+    """The source index is stored once; a turn writes the record and at most one new page."""
+    lecture = " ".join(f"Sentence {i} of the lecture covers eigenvalue example {i * 7}." for i in range(20000))
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        store = RecordingStore(path)
+        engine, messages = build_engine(0), []
+        engine.load_source(lecture, source="Lecture 1")
+
+        store.save_engine("s1", engine, extra={"messages": messages})
+        assert sum(1 for key, _ in store.writes if key.startswith("source-index:")) == 1
+        store.writes.clear()
+
+        for i in range(45):
+            add_turn(engine, messages, i)
+            store.save_engine("s1", engine, extra={"messages": messages})
+        legacy = len(serialize_session({"engine": engine.to_dict(), "messages": messages}))
+        records = [size for key, size in store.writes if key == "s1"]
+        pages = [key for key, _ in store.writes if key != "s1"]
+        assert not any(key.startswith("source-index:") for key in pages), "index written once"
+        assert len(pages) == 2 * (90 // store.page_messages), "each full page written once per list"
+        assert max(records) < legacy / 20
+
+        # Another process picks the session up and carries on without rewriting anything
+        other = RecordingStore(path)
+        state = other.load("s1")
+        restored = other.restore_engine(state)
+        assert restored.to_dict() == engine.to_dict() and state["messages"] == messages
+        add_turn(restored, state["messages"], 45)
+        other.save_engine("s1", restored, extra={"messages": state["messages"]})
+        assert [key for key, _ in other.writes] == ["s1"]
+
+        # A new problem starts a new conversation; old pages are never read again
+        restored.conversation_history = [{"role": "user", "content": "New problem, first question"}]
+        other.save_engine("s1", restored, extra={"messages": []})
+        again = RecordingStore(path).load_engine("s1")
+        assert again.conversation_history == restored.conversation_history
+        print(f"✅ Turn saves write {max(records)} bytes at most vs {legacy} bytes for the whole session")
+
+
+def test_sessions_saved_before_paging_still_load():
+    engine = build_engine(3)
+    engine.load_source("Integration by parts reverses the product rule. " * 50, source="Notes")
+    store = InMemorySessionStore()
+    store._set("old", serialize_session({"engine": engine.to_dict(), "messages": [{"role": "user", "content": "hi"}]}))
+    restored = store.load_engine("old")
+    assert restored.to_dict() == engine.to_dict()
+    assert store.load("old")["messages"] == [{"role": "user", "content": "hi"}]
+    print("✅ Sessions saved in the old single-record format still load")
+
+
+def test_expiry():
+    """Expired sessions are not returned."""
+    store = InMemorySessionStore(ttl_seconds=-1)
+    store.save("old", {"x": 1})
+    assert store.load("old") is None
+
+    redis_store = RedisSessionStore(LocalRedis(), ttl_seconds=1)
+    redis_store.save("s", {"x": 1})
+    assert redis_store.load("s") == {"x": 1}
+    print("✅ Expired sessions are dropped")
+
+
+class FetchedRow:
+    """Cursor stand-in holding a row that was already fetched."""
+
+    def __init__(self, row):
+        self.row = row
+
+    def fetchone(self):
+        return self.row
+
+
+class RecreateAfterSelect:
+    """Connection wrapper: another worker recreates the session right after a read."""
+
+    def __init__(self, conn, recreate):
+        self.conn = conn
+        self.recreate = recreate
+
+    def execute(self, sql, params=()):
+        cursor = self.conn.execute(sql, params)
+        if sql.startswith("SELECT data"):
+            row = cursor.fetchone()
+            self.recreate()
+            return FetchedRow(row)
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self.conn, name)
+
+
+def test_expired_read_keeps_a_recreated_session():
+    """Dropping an expired row on read must not delete a session recreated meanwhile."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        reader = SQLiteSessionStore(path, ttl_seconds=0.1)
+        other_worker = SQLiteSessionStore(path, ttl_seconds=0.1)
+        reader.save("s", {"x": 1})
+        time.sleep(0.2)
+
+        reader._local.conn = RecreateAfterSelect(
+            reader._connection(), lambda: other_worker.save("s", {"x": 2}, expected_version=0)
+        )
+        assert reader.load("s") is None, "the row read had expired"
+        assert other_worker.load("s") == {"x": 2}, "the session recreated after the read survives"
+    print("✅ Expired-row cleanup on read leaves a concurrently recreated session alone")
+
+
+def test_expired_sessions_purged_on_save():
+    """Stores sweep expired sessions on their own, without a separate job."""
+    with tempfile.TemporaryDirectory() as tmp:
+        memory = InMemorySessionStore(ttl_seconds=0.1, purge_interval=0)
+        sqlite_store = SQLiteSessionStore(os.path.join(tmp, "sessions.db"), ttl_seconds=0.1, purge_interval=0)
+        stored = {
+            "memory": lambda: set(memory._data),
+            "sqlite": lambda: {row[0] for row in sqlite_store._connection().execute("SELECT session_id FROM sessions")},
+        }
+        for name, store in (("memory", memory), ("sqlite", sqlite_store)):
+            store.save("old", {"x": 1})
+            time.sleep(0.2)
+            assert stored[name]() == {"old"}, "expired but not yet swept"
+            store.save("new", {"x": 2})
+            assert stored[name]() == {"new"}, f"{name}: the next save swept the expired session"
+    print("✅ Expired sessions purged on save")
+
+
+def test_store_configuration_errors():
+    try:
+        SessionStore()
+        assert False, "base store is abstract"
+    except TypeError:
+        pass
+
+    available = session_store.REDIS_AVAILABLE
+    session_store.REDIS_AVAILABLE = False
+    try:
+        create_session_store("redis")
+        assert False, "redis backend without redis-py must fail at startup"
+    except ImportError:
+        pass
+    finally:
+        session_store.REDIS_AVAILABLE = available
+
+    try:
+        create_session_store("postgres")
+        assert False, "unknown backend"
+    except ValueError:
+        pass
+    print("✅ Missing redis package and unknown backends fail at startup")
+
+
+def test_sqlite_shared_across_processes():
+    """A session saved by one worker process is visible to another."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "sessions.db")
+        SQLiteSessionStore(path)  # create schema
+
+        proc = get_context("spawn").Process(target=_save_from_child, args=(path, "shared"))
+        proc.start()
+        proc.join(30)
+        assert proc.exitcode == 0
+
+        restored = SQLiteSessionStore(path).load_engine("shared")
+        assert restored is not None
+        assert len(restored.conversation_history) == 6
+        print("✅ SQLite session shared across processes")
+
+
+def benchmark_latency(iterations: int = 200):
+    """Print p50/p95 load and save latency for each backend."""
+    print("\n" + "=" * 60)
+    print("SESSION STORE LATENCY (20-message session)")
+    print("=" * 60)
+
+    engine = build_engine()
+    with tempfile.TemporaryDirectory() as tmp:
+        stores = {
+            "memory": InMemorySessionStore(),
+            "sqlite": SQLiteSessionStore(os.path.join(tmp, "sessions.db")),
+            "redis (local)": RedisSessionStore(LocalRedis()),
+        }
+        for name, store in stores.items():
+            save_times, load_times = [], []
+            for i in range(iterations):
+                start = time.perf_counter()
+                store.save_engine(f"s{i % 10}", engine)
+                save_times.append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                store.load_engine(f"s{i % 10}")
+                load_times.append(time.perf_counter() - start)
+
+            save_p95 = statistics.quantiles(save_times, n=20)[18]
+            load_p95 = statistics.quantiles(load_times, n=20)[18]
+            print(f"{name:15s} save p50 {statistics.median(save_times) * 1000:.3f}ms  p95 {save_p95 * 1000:.3f}ms | "
+                  f"load p50 {statistics.median(load_times) * 1000:.3f}ms  p95 {load_p95 * 1000:.3f}ms")
+
+    raw_size = len(str(engine.to_dict()).encode("utf-8"))
+    packed_size = len(serialize_session({"engine": engine.to_dict()}))
+    print(f"\nPayload: {raw_size} bytes raw -> {packed_size} bytes stored")
+
+
+def test_latency_benchmark():
+    benchmark_latency(iterations=50)
+
+
+if __name__ == "__main__":
+    test_serialization_roundtrip()
+    test_engine_roundtrip_all_backends()
+    test_compare_and_set_all_backends()
+    test_turn_saves_only_the_delta()
+    test_sessions_saved_before_paging_still_load()
+    test_expiry()
+    test_expired_read_keeps_a_recreated_session()
+    test_expired_sessions_purged_on_save()
+    test_store_configuration_errors()
+    test_sqlite_shared_across_processes()
+    benchmark_latency()
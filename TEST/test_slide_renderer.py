@@ -0,0 +1,103 @@
+"""
+Test the slide deck renderer: markdown features reach the PDF, styles and
+fonts are built once, and edited decks re-render only the changed slides.
+"""
+
+import sys
+import io
+import time
+from io import BytesIO
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from PyPDF2 import PdfReader
+
+import slide_renderer
+from slide_renderer import SlideDeckRenderer, slide_flowables, split_slides
+
+DECK = """# Binary Search
+A **fast** way to search *sorted* arrays.
+---
+## Algorithm
+1. Compare with the `middle` element
+2. Discard half of the range
+   - left half if smaller
+   - right half if larger
+---
+## Complexity
+- Time: O(log n) — each step halves n
+- Space: O(1)
+---
+## Code
+```python
+while lo <= hi:
+    mid = (lo + hi) // 2
+```
+"""
+
+
+def pdf_pages(pdf_bytes: bytes):
+    return [page.extract_text() for page in PdfReader(BytesIO(pdf_bytes)).pages]
+
+
+def test_split_slides():
+    assert len(split_slides(DECK)) == 4
+    assert split_slides("\n---\n## Only\n---\n\n") == ["## Only"]
+    print("✅ Deck split on --- separators, empty slides dropped")
+
+
+def test_markdown_features_render():
+    pages = pdf_pages(SlideDeckRenderer().render_deck(DECK))
+    assert len(pages) == 4
+    text = "\n".join(pages)
+    for expected in ("Binary Search", "fast", "middle", "left half", "O(log n)", "mid = (lo + hi) // 2"):
+        assert expected in text, expected
+    for raw_markdown in ("**", "# ", "```", "`middle`"):
+        assert raw_markdown not in text, raw_markdown
+
+    flowable_types = {type(f).__name__ for f in slide_flowables(split_slides(DECK)[1], False)}
+    assert "ListFlowable" in flowable_types, "numbered/nested lists become real lists"
+    print("✅ Headings, emphasis, nested lists and code blocks rendered (no raw markdown)")
+
+
+def test_styles_built_once():
+    assert slide_renderer.slide_styles() is slide_renderer.slide_styles()
+    assert slide_renderer.slide_fonts.cache_info().currsize == 1
+    print(f"✅ Styles and fonts cached (body font: {slide_renderer.slide_fonts()[0]})")
+
+
+def test_edited_deck_rerenders_only_changed_slides():
+    renderer = SlideDeckRenderer()
+
+    start = time.perf_counter()
+    renderer.render_deck(DECK)
+    cold = time.perf_counter() - start
+    assert renderer.get_stats()["rendered"] == 4
+
+    edited = DECK.replace("- Space: O(1)", "- Space: O(1) iterative, O(log n) recursive")
+    start = time.perf_counter()
+    pages = pdf_pages(renderer.render_deck(edited))
+    warm = time.perf_counter() - start
+
+    stats = renderer.get_stats()
+    assert stats["rendered"] == 5 and stats["cached"] == 3, stats
+    assert "recursive" in pages[2]
+    print(f"✅ Edited deck re-rendered 1 of 4 slides ({cold:.3f}s cold vs {warm:.3f}s after edit)")
+
+
+def test_cache_is_bounded():
+    renderer = SlideDeckRenderer(max_entries=2)
+    for index in range(4):
+        renderer.render_slide(f"## Slide {index}")
+    assert renderer.get_stats()["entries"] == 2
+    print("✅ Slide cache bounded")
+
+
+if __name__ == "__main__":
+    test_split_slides()
+    test_markdown_features_render()
+    test_styles_built_once()
+    test_edited_deck_rerenders_only_changed_slides()
+    test_cache_is_bounded()
@@ -0,0 +1,151 @@
+"""
+Test the parallel "generate all" Studio pipeline.
+Uses a stub client and stub renderers with fixed delays so it runs offline.
+"""
+
+import sys
+import io
+import threading
+import time
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import studio_features
+import studio_pipeline
+from artifact_store import artifact_store
+from job_queue import get_render_queue
+from media_output import MediaOutput
+from openrouter_client import OpenRouterClient
+
+MODEL_DELAY = 0.3
+RENDER_DELAY = 0.3
+ORIGINAL_RENDERERS = dict(studio_features.MEDIA_RENDERERS)
+ORIGINAL_CLIENT = studio_features.client
+
+
+class SlowClient(OpenRouterClient):
+    def __init__(self):
+        super().__init__(api_key="test")
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def chat_completion(self, model, messages, stream=False, temperature=0.7, max_tokens=None):
+        with self._lock:
+            self.calls += 1
+        time.sleep(MODEL_DELAY)
+        return {"choices": [{"message": {"content": f"Generated by {model}"}}]}
+
+
+# Renderers run in job queue worker processes, so they must be module-level
+def slow_renderer(text, problem_statement):
+    time.sleep(RENDER_DELAY)
+    return MediaOutput.from_bytes(text.encode("utf-8"), "artifact.bin", "application/octet-stream")
+
+
+def failing_renderer(text, problem_statement):
+    raise RuntimeError("ffmpeg not found")
+
+
+def warm_up_render_queue():
+    """Start the worker processes so the timing below excludes process spawn."""
+    render_queue = get_render_queue()
+    jobs = [render_queue.submit(slow_renderer, "", "") for _ in range(render_queue.max_workers)]
+    for job in jobs:
+        job.result(timeout=60)
+
+
+def setup_stubs() -> SlowClient:
+    stub = SlowClient()
+    studio_features.client = stub
+    for feature in studio_features.MEDIA_RENDERERS:
+        studio_features.MEDIA_RENDERERS[feature] = slow_renderer
+    artifact_store.clear()
+    return stub
+
+
+def teardown_function(function=None):
+    studio_features.client = ORIGINAL_CLIENT
+    studio_features.MEDIA_RENDERERS.update(ORIGINAL_RENDERERS)
+    artifact_store.clear()
+
+
+def test_generate_all_is_bounded_by_slowest_artifact():
+    stub = setup_stubs()
+    warm_up_render_queue()
+    problem = "Explain Newton's second law"
+
+    batch = studio_pipeline.start_studio_batch(problem)
+    assert set(batch.status().values()) <= {"running", "ready"}
+    results = batch.wait(timeout=30)
+
+    assert batch.done()
+    assert set(results) == set(studio_features.STUDIO_MODELS)
+    assert all("text" in artifact for artifact in results.values())
+    assert all("media" in results[feature] for feature in studio_features.MEDIA_RENDERERS)
+    assert stub.calls == len(studio_features.STUDIO_MODELS)
+
+    serial_time = len(studio_features.STUDIO_MODELS) * MODEL_DELAY + len(studio_features.MEDIA_RENDERERS) * RENDER_DELAY
+    slowest_chain = MODEL_DELAY + RENDER_DELAY
+    print(f"   Serial estimate: {serial_time:.1f}s | slowest artifact: {slowest_chain:.1f}s | batch: {batch.wall_time():.2f}s")
+    assert batch.wall_time() < slowest_chain + 0.5
+
+    # Panels now open pre-computed
+    start = time.perf_counter()
+    studio_features.build_studio_artifact("video", problem)
+    assert time.perf_counter() - start < 0.05
+    assert stub.calls == len(studio_features.STUDIO_MODELS)
+    print("✅ All artifacts generated concurrently and cached")
+
+
+def test_modal_during_batch_does_not_duplicate_work():
+    stub = setup_stubs()
+    problem = "Balance the equation H2 + O2 -> H2O"
+
+    batch = studio_pipeline.start_studio_batch(problem, features=["quiz"])
+    time.sleep(0.05)
+    artifact = studio_features.build_studio_artifact("quiz", problem)  # waits for the batch
+    batch.wait()
+
+    assert artifact["text"] == batch.wait()["quiz"]["text"]
+    assert stub.calls == 1
+    print("✅ Modal opened mid-batch reuses the in-flight artifact")
+
+
+def test_failures_are_reported_per_feature():
+    setup_stubs()
+    studio_features.MEDIA_RENDERERS["video"] = failing_renderer
+    batch = studio_pipeline.start_studio_batch("Integrate x^2", features=["video", "quiz"])
+    results = batch.wait(timeout=10)
+    assert batch.status() == {"video": "failed", "quiz": "ready"}
+    assert results["video"] == {"error": "ffmpeg not found"}
+    print("✅ One failing artifact does not block the others")
+
+
+def test_video_modal_does_not_block_on_render():
+    setup_stubs()
+    warm_up_render_queue()
+    problem = "Find the period of a pendulum of length 2m"
+
+    start = time.perf_counter()
+    artifact, job = studio_features.request_studio_artifact("video", problem)
+    request_time = time.perf_counter() - start
+    assert "media" not in artifact and job is not None
+    assert request_time < MODEL_DELAY + RENDER_DELAY / 2, "modal returned before the render finished"
+
+    job.result(timeout=30)
+    artifact, job = studio_features.request_studio_artifact("video", problem)
+    assert job is None and artifact["media"]
+    print(f"✅ Video modal returned in {request_time * 1000:.0f}ms while rendering in the background")
+
+
+if __name__ == "__main__":
+    for test in (
+        test_generate_all_is_bounded_by_slowest_artifact,
+        test_modal_during_batch_does_not_duplicate_work,
+        test_failures_are_reported_per_feature,
+        test_video_modal_does_not_block_on_render,
+    ):
+        test()
+        teardown_function()
@@ -0,0 +1,128 @@
+"""
+Test streamed Studio text (report, quiz, mind map, infographic) and measure
+time-to-first-token against waiting for the full response.
+Uses a stub client with fixed delays so it runs offline.
+"""
+
+import sys
+import io
+import threading
+import time
+
+import pytest
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import studio_features
+from artifact_store import artifact_store
+from openrouter_client import OpenRouterClient
+
+FIRST_TOKEN_DELAY = 0.3  # Prompt processing (and reasoning, for deepseek-r1)
+TOKEN_DELAY = 0.02
+TOKENS = [f"word{i} " for i in range(50)]
+
+
+class StreamingStub(OpenRouterClient):
+    def __init__(self):
+        super().__init__(api_key="test")
+        self.calls = 0
+
+    def _chunks(self):
+        time.sleep(FIRST_TOKEN_DELAY)
+        for token in TOKENS:
+            time.sleep(TOKEN_DELAY)
+            yield {"choices": [{"delta": {"content": token}}]}
+        yield {"choices": [], "usage": {"completion_tokens": len(TOKENS)}}
+
+    def chat_completion(self, model, messages, stream=False, temperature=0.7, max_tokens=None):
+        self.calls += 1
+        if stream:
+            return self._chunks()
+        content = "".join(chunk["choices"][0]["delta"]["content"] for chunk in self._chunks() if chunk["choices"])
+        return {"choices": [{"message": {"content": content}}]}
+
+
+def setup_stub(monkeypatch) -> StreamingStub:
+    stub = StreamingStub()
+    monkeypatch.setattr(studio_features, "client", stub)
+    artifact_store.clear()
+    return stub
+
+
+def teardown_function(function=None):
+    artifact_store.clear()
+
+
+def test_streaming_ttft_vs_full_wait(monkeypatch):
+    setup_stub(monkeypatch)
+    problem = "Explain the chain rule"
+
+    start = time.perf_counter()
+    full_text = studio_features.generate_studio_text("report", problem)
+    full_wait = time.perf_counter() - start
+
+    artifact_store.clear()
+    timing = {}
+    streamed = "".join(studio_features.stream_studio_text("report", problem, timing))
+
+    assert streamed == full_text
+    print(f"   Report: first token {timing['ttft']:.2f}s streamed vs {full_wait:.2f}s full wait")
+    assert timing["ttft"] < full_wait / 2
+    assert timing["cached"] is False
+    print("✅ Streaming shows the first token well before the full response")
+
+
+def test_streamed_text_is_cached(monkeypatch):
+    stub = setup_stub(monkeypatch)
+    problem = "What is a derivative?"
+    for feature in ("report", "quiz", "mindmap", "infographic"):
+        "".join(studio_features.stream_studio_text(feature, problem))
+    assert stub.calls == 4
+
+    timing = {}
+    chunks = list(studio_features.stream_studio_text("quiz", problem, timing))
+    assert len(chunks) == 1 and timing["cached"] and stub.calls == 4
+    assert studio_features.build_studio_artifact("quiz", problem)["text"] == chunks[0]
+    print("✅ Streamed text cached for reopened modals and the batch pipeline")
+
+
+def test_abandoned_stream_is_not_cached(monkeypatch):
+    setup_stub(monkeypatch)
+    problem = "Define a limit"
+    stream = studio_features.stream_studio_text("mindmap", problem)
+    next(stream)
+    stream.close()  # Dialog closed mid-stream
+
+    key = studio_features.studio_artifact_key("mindmap", problem)
+    assert artifact_store.get(key) is None
+    "".join(studio_features.stream_studio_text("mindmap", problem))  # Lock was released
+    assert artifact_store.get(key)["text"] == "".join(TOKENS)
+    print("✅ Partial text from a closed dialog is discarded")
+
+
+def test_stream_waits_for_in_flight_batch(monkeypatch):
+    stub = setup_stub(monkeypatch)
+    problem = "Integrate sin(x)"
+    worker = threading.Thread(target=studio_features.build_studio_artifact, args=("infographic", problem))
+    worker.start()
+    time.sleep(0.05)
+
+    timing = {}
+    text = "".join(studio_features.stream_studio_text("infographic", problem, timing))
+    worker.join()
+    assert text == "".join(TOKENS) and stub.calls == 1
+    print("✅ Modal opened mid-batch reuses the in-flight generation")
+
+
+if __name__ == "__main__":
+    for test in (
+        test_streaming_ttft_vs_full_wait,
+        test_streamed_text_is_cached,
+        test_abandoned_stream_is_not_cached,
+        test_stream_waits_for_in_flight_batch,
+    ):
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            test(monkeypatch)
+        teardown_function()
@@ -0,0 +1,169 @@
+"""
+Test the persistent YouTube transcript cache: columnar segment storage,
+cache hits without calling YouTube, TTL refresh, stale fallback and
+negative caching of videos without transcripts, scheduled purging of
+expired entries, and timestamp lookups.
+"""
+
+import sys
+import io
+import json
+import os
+import tempfile
+import time
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import content_extractors
+from content_extractors import YouTubeExtractor
+from transcript_cache import STATUS_DISABLED, Transcript, TranscriptCache
+from youtube_transcript_api._errors import TranscriptsDisabled
+
+
+def lecture_segments(count: int = 2000):
+    """A ~2 hour lecture worth of caption segments."""
+    return [
+        {"text": f"segment {i}: the derivative of x squared is two x — ∂/∂x", "start": i * 3.6, "duration": 3.5}
+        for i in range(count)
+    ]
+
+
+class FakeTranscriptApi:
+    """Stands in for YouTubeTranscriptApi; counts calls and can fail on demand."""
+
+    calls = 0
+    failure = None
+
+    @classmethod
+    def get_transcript(cls, video_id, languages=None):
+        cls.calls += 1
+        if cls.failure is not None:
+            raise cls.failure
+        return lecture_segments()
+
+
+def use_temp_cache(**kwargs) -> TranscriptCache:
+    directory = tempfile.mkdtemp()
+    cache = TranscriptCache(path=os.path.join(directory, "transcripts.db"), **kwargs)
+    content_extractors.transcript_cache = cache
+    content_extractors.YouTubeTranscriptApi = FakeTranscriptApi
+    content_extractors.YOUTUBE_API_AVAILABLE = True
+    FakeTranscriptApi.calls, FakeTranscriptApi.failure = 0, None
+    return cache
+
+
+def test_columnar_round_trip_is_compact():
+    segments = lecture_segments()
+    transcript = Transcript.from_segments(segments)
+    blob = transcript.to_bytes()
+    restored = Transcript.from_bytes(blob)
+
+    assert restored.to_segments() == segments
+    assert restored.text == " ".join(s["text"] for s in segments)
+    assert restored.duration == segments[-1]["start"] + segments[-1]["duration"]
+
+    json_size = len(json.dumps(segments).encode("utf-8"))
+    assert len(blob) < json_size / 4
+    print(f"✅ {len(segments)} segments: {len(blob):,} bytes columnar+zlib vs {json_size:,} bytes JSON")
+
+
+def test_second_request_served_from_cache():
+    use_temp_cache()
+
+    start = time.perf_counter()
+    text, metadata = YouTubeExtractor.get_transcript("lecture1")
+    first = time.perf_counter() - start
+    assert metadata["cached"] is False and metadata["segments_count"] == 2000
+
+    start = time.perf_counter()
+    cached_text, cached_metadata = YouTubeExtractor.get_transcript("lecture1")
+    second = time.perf_counter() - start
+
+    assert FakeTranscriptApi.calls == 1
+    assert cached_text == text and cached_metadata["cached"] is True
+    assert cached_metadata["duration_seconds"] == metadata["duration_seconds"]
+
+    YouTubeExtractor.get_transcript("lecture1", languages=["de", "en"])
+    assert FakeTranscriptApi.calls == 2, "languages are part of the key"
+    print(f"✅ Repeat request served from cache ({first * 1000:.1f}ms fetch+store vs {second * 1000:.1f}ms hit)")
+
+
+def test_expired_entry_refetched_or_served_stale():
+    cache = use_temp_cache(ttl_seconds=0.2)
+    YouTubeExtractor.get_transcript("lecture2")
+    time.sleep(0.3)
+    assert cache.get("lecture2", ["en"]).expired
+
+    FakeTranscriptApi.failure = ConnectionError("network down")
+    text, metadata = YouTubeExtractor.get_transcript("lecture2")
+    assert not metadata.get("error") and metadata["stale"] is True, "stale copy served when refetch fails"
+
+    FakeTranscriptApi.failure = None
+    _, metadata = YouTubeExtractor.get_transcript("lecture2")
+    assert metadata["cached"] is False and FakeTranscriptApi.calls == 3
+    assert not cache.get("lecture2", ["en"]).expired
+    print("✅ Expired transcript refetched (stale copy used while YouTube is unreachable)")
+
+
+def test_disabled_transcripts_negatively_cached():
+    cache = use_temp_cache(negative_ttl_seconds=0.2)
+    FakeTranscriptApi.failure = TranscriptsDisabled("nocaptions")
+
+    first, metadata = YouTubeExtractor.get_transcript("nocaptions")
+    second, cached_metadata = YouTubeExtractor.get_transcript("nocaptions")
+    assert metadata["error"] and cached_metadata["error"] and cached_metadata["cached"]
+    assert first == second and "disabled" in first
+    assert FakeTranscriptApi.calls == 1
+    assert cache.get("nocaptions", ["en"]).status == STATUS_DISABLED
+
+    time.sleep(0.3)
+    assert cache.purge_expired() == 1
+    YouTubeExtractor.get_transcript("nocaptions")
+    assert FakeTranscriptApi.calls == 2
+    print("✅ 'Transcripts disabled' cached until its shorter TTL expires")
+
+
+def test_expired_entries_swept_on_a_later_store():
+    cache = use_temp_cache(negative_ttl_seconds=0.1, purge_interval=0.2)
+    FakeTranscriptApi.failure = TranscriptsDisabled("old")
+    YouTubeExtractor.get_transcript("old")
+    assert cache.get("old", ["en"]) is not None
+
+    time.sleep(0.3)
+    FakeTranscriptApi.failure = None
+    YouTubeExtractor.get_transcript("lecture3")
+    assert cache.get("old", ["en"]) is None, "the store after purge_interval swept the expired entry"
+    assert cache.get("lecture3", ["en"]) is not None
+    print("✅ Expired entries swept on the first store after the purge interval")
+
+
+def test_time_index_lookup():
+    transcript = Transcript.from_segments(lecture_segments(20000))  # ~20 hours of captions
+    assert transcript.index_at(750.0) == 208  # 12:30 -> segment starting at 748.8s
+    assert transcript.index_at(-1) is None
+    window = transcript.window(750.0, before=10, after=10)
+    assert window[0] * 3.6 + 3.5 >= 740 and window[-1] * 3.6 <= 760
+    assert "segment 208:" in transcript.window_text(750.0, before=0, after=0)
+
+    times = [i * 3.3 for i in range(2000)]
+    start = time.perf_counter()
+    for t in times:
+        transcript.index_at(t)
+    bisect_time = time.perf_counter() - start
+    start = time.perf_counter()
+    for t in times[:200]:
+        next(i for i in range(len(transcript) - 1, -1, -1) if transcript.starts[i] <= t)
+    linear_time = (time.perf_counter() - start) * 10
+    print(f"✅ Timestamp lookup: {bisect_time / len(times) * 1e6:.1f}µs binary search vs "
+          f"{linear_time / len(times) * 1e6:.0f}µs linear scan over {len(transcript):,} segments")
+
+
+if __name__ == "__main__":
+    test_columnar_round_trip_is_compact()
+    test_second_request_served_from_cache()
+    test_expired_entry_refetched_or_served_stale()
+    test_disabled_transcripts_negatively_cached()
+    test_expired_entries_swept_on_a_later_store()
+    test_time_index_lookup()
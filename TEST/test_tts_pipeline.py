@@ -0,0 +1,234 @@
+"""
+Test the chunked TTS pipeline: sentence splitting, concurrent synthesis,
+per-sentence caching, MP3 concatenation and progressive playback
+(time-to-first-audio). Uses stub backends so it runs offline.
+"""
+
+import sys
+import io
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import studio_features
+import tts_pipeline
+from tts_pipeline import (
+    TTSBackend, create_tts_backend, speech_cache, split_sentences, stream_speech, synthesize_speech,
+)
+from video_encoder import media_duration, run_ffmpeg
+
+SCRIPT = " ".join(f"This is sentence number {i}, which explains one idea." for i in range(12))
+ORIGINAL_BACKEND = tts_pipeline.backend
+
+
+class SlowBackend(TTSBackend):
+    """Simulates a network TTS call; returns the text as 'audio'."""
+
+    name = "slow"
+
+    def __init__(self, latency=0.2):
+        self.latency = latency
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def synthesize(self, text):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.latency)
+        return f"[{text}]".encode("utf-8")
+
+
+class FirstSentenceSlowBackend(SlowBackend):
+    """The first sentence finishes last, to check in-order release."""
+
+    def synthesize(self, text):
+        if text.startswith("First"):
+            time.sleep(0.3)
+        return super().synthesize(text)
+
+
+class ToneBackend(TTSBackend):
+    """Offline backend producing one second of real MP3 audio per chunk."""
+
+    name = "tone"
+
+    def synthesize(self, text):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tone.mp3"
+            run_ffmpeg([
+                "-f", "lavfi", "-i", "sine=frequency=440:duration=1",
+                "-ar", "24000", "-ac", "1", "-c:a", "libmp3lame", "-b:a", "32k",
+                "-write_xing", "0", "-id3v2_version", "0", str(path)
+            ])
+            return path.read_bytes()
+
+
+def use_backend(backend):
+    tts_pipeline.backend = backend
+    speech_cache.clear()
+    return backend
+
+
+def test_split_sentences():
+    assert split_sentences("One. Two!  Three?") == ["One.", "Two!", "Three?"]
+    long_sentence = ", ".join(["a clause with several words"] * 20) + "."
+    chunks = split_sentences(long_sentence, max_chars=100)
+    assert len(chunks) > 1 and all(len(chunk) <= 100 for chunk in chunks)
+    assert " ".join(chunks) == long_sentence
+    print(f"✅ Sentences split; long sentence broken into {len(chunks)} clause chunks")
+
+
+def test_concurrent_synthesis_keeps_order():
+    backend = use_backend(SlowBackend())
+    chunks = split_sentences(SCRIPT)
+
+    start = time.perf_counter()
+    audio = synthesize_speech(SCRIPT)
+    elapsed = time.perf_counter() - start
+
+    assert audio == b"".join(f"[{chunk}]".encode("utf-8") for chunk in chunks)
+    serial = len(chunks) * backend.latency
+    print(f"   {len(chunks)} sentences: serial estimate {serial:.1f}s, pipeline {elapsed:.2f}s")
+    assert elapsed < serial / 2
+    print("✅ Sentences synthesized concurrently and joined in order")
+
+
+def test_per_sentence_cache():
+    backend = use_backend(SlowBackend(latency=0.05))
+    synthesize_speech(SCRIPT)
+    first_calls = backend.calls
+
+    start = time.perf_counter()
+    synthesize_speech(SCRIPT)
+    assert backend.calls == first_calls
+    cached_time = time.perf_counter() - start
+
+    edited = SCRIPT.replace("number 3,", "number three,")
+    synthesize_speech(edited)
+    assert backend.calls == first_calls + 1, "only the edited sentence is re-synthesized"
+    print(f"✅ Re-synthesis served from cache in {cached_time * 1000:.1f}ms: {speech_cache.get_stats()}")
+
+
+def test_progress_callback():
+    use_backend(SlowBackend(latency=0.01))
+    progress = []
+    synthesize_speech("One. Two. Three.", on_progress=lambda done, total: progress.append((done, total)))
+    assert progress == [(1, 3), (2, 3), (3, 3)]
+    print("✅ Progress reported per sentence")
+
+
+def test_mp3_chunks_concatenate():
+    use_backend(ToneBackend())
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "joined.mp3"
+        path.write_bytes(synthesize_speech("One. Two. Three. Four."))
+        duration = media_duration(path)
+    assert abs(duration - 4) < 0.3, duration
+    print(f"✅ Four MP3 chunks joined into {duration:.2f}s of audio")
+
+
+def test_time_to_first_audio():
+    backend = use_backend(SlowBackend(latency=0.2))
+    script = " ".join(f"Sentence {i} is spoken here." for i in range(24))
+
+    stream = stream_speech(script)
+    first = stream.segments(0, timeout=10)
+    assert first and not stream.done(), "first audio is playable before synthesis finishes"
+    audio = stream.result(timeout=10)
+
+    assert audio == b"".join(f"[{chunk}]".encode("utf-8") for chunk in split_sentences(script))
+    assert backend.calls == len(split_sentences(script)), "each sentence synthesized once"
+    print(
+        f"   Time to first audio {stream.time_to_first_audio:.2f}s vs full narration {stream.total_time:.2f}s "
+        f"(previously first audio = full synthesis)"
+    )
+    assert stream.time_to_first_audio < stream.total_time / 2
+    print("✅ Progressive stream plays the first sentence early")
+
+
+def test_stream_releases_segments_in_order():
+    use_backend(FirstSentenceSlowBackend(latency=0.05))
+    stream = stream_speech("First one. Second one. Third one.")
+    segments = stream.segments(0, timeout=10)
+    assert segments[0] == b"[First one.]"
+    assert stream.result() == b"[First one.][Second one.][Third one.]"
+    print("✅ Later sentences wait for earlier ones")
+
+
+def test_audio_render_joins_in_flight_stream():
+    backend = use_backend(SlowBackend(latency=0.1))
+    problem = "Why does ice float?"
+    script = "Ice is less dense than water. Hydrogen bonds form an open lattice."
+
+    stream = studio_features.stream_studio_audio(script, problem)
+    assert studio_features.stream_studio_audio(script, problem) is stream
+    audio = studio_features.render_audio(script, problem)
+
+    assert audio.getvalue() == stream.result()
+    assert backend.calls == 2, "render_audio reused the modal's in-flight synthesis"
+    print("✅ Modal stream and MP3 render share one synthesis")
+
+
+def test_modal_joins_narration_of_a_pregenerating_build():
+    backend = use_backend(SlowBackend(latency=0.1))
+    problem = "Why is the sky blue?"
+    script = "Sunlight scatters off air molecules. Blue light scatters the most. So the sky looks blue."
+    key = studio_features.studio_artifact_key("audio", problem)
+    studio_features.artifact_store.put(key, {"text": script})
+
+    builder = threading.Thread(target=studio_features.build_studio_artifact, args=("audio", problem))
+    builder.start()
+    while key not in studio_features._audio_streams:
+        time.sleep(0.01)
+
+    # What the audio modal does while the pregeneration batch is narrating
+    artifact = studio_features.ensure_studio_text("audio", problem)
+    stream = studio_features.stream_studio_audio(artifact["text"], problem)
+    assert not stream.done(), "the script was available without waiting for the narration"
+    builder.join()
+
+    assert studio_features.artifact_store.get(key)["media"].getvalue() == stream.result()
+    assert backend.calls == 3, "modal played the pregeneration's synthesis"
+    print("✅ Audio modal opened during pregeneration plays the narration already in flight")
+
+
+def test_backend_selection():
+    try:
+        create_tts_backend("nonexistent")
+        assert False, "unknown backend should raise"
+    except ValueError:
+        pass
+    if not tts_pipeline.PYTTSX3_AVAILABLE:
+        try:
+            create_tts_backend("pyttsx3")
+            assert False, "missing offline engine should raise ImportError"
+        except ImportError:
+            pass
+    print("✅ Backend registry validates names and optional dependencies")
+
+
+def teardown_function(function=None):
+    tts_pipeline.backend = ORIGINAL_BACKEND
+    speech_cache.clear()
+
+
+if __name__ == "__main__":
+    for test in (
+        test_split_sentences,
+        test_concurrent_synthesis_keeps_order,
+        test_per_sentence_cache,
+        test_progress_callback,
+        test_mp3_chunks_concatenate,
+        test_time_to_first_audio,
+        test_stream_releases_segments_in_order,
+        test_audio_render_joins_in_flight_stream,
+        test_modal_joins_narration_of_a_pregenerating_build,
+        test_backend_selection,
+    ):
+        test()
+        teardown_function()
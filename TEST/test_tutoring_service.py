@@ -0,0 +1,162 @@
+"""
+Test the headless tutoring service (tutoring_service.py).
+Uses a stub OpenRouter client so it runs offline.
+"""
+
+import sys
+import io
+import json
+import threading
+
+import pytest
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from fastapi.testclient import TestClient
+
+import tutoring_engine
+import tutoring_service
+from openrouter_client import OpenRouterClient
+from session_store import InMemorySessionStore
+
+
+class StubClient(OpenRouterClient):
+    """Returns canned responses instead of calling OpenRouter."""
+
+    def chat_completion(self, model, messages, stream=False, temperature=0.7, max_tokens=None):
+        if stream:
+            return (chunk for chunk in [
+                {"choices": [{"delta": {"content": "What do you "}}]},
+                {"choices": [{"delta": {"content": "know so far?"}}]},
+                {"usage": {"prompt_tokens": 100, "completion_tokens": 6}},
+            ])
+        if messages[0]["content"].startswith("You are a solution verification"):
+            content = '{"is_correct": true, "first_error_location": null}'
+        else:
+            content = "x = 4"
+        return {"choices": [{"message": {"content": content}}], "usage": {}}
+
+
+class BlockingStubClient(StubClient):
+    """Holds streamed replies until released, to overlap two requests."""
+
+    def __init__(self, api_key):
+        super().__init__(api_key=api_key)
+        self.streaming = threading.Event()
+        self.release = threading.Event()
+
+    def chat_completion(self, model, messages, stream=False, temperature=0.7, max_tokens=None):
+        if stream:
+            self.streaming.set()
+            self.release.wait(10)
+        return super().chat_completion(model, messages, stream, temperature, max_tokens)
+
+
+def make_client(monkeypatch, client=None) -> TestClient:
+    monkeypatch.setattr(tutoring_engine, "client", client or StubClient(api_key="test"))
+    monkeypatch.setattr(tutoring_service, "store", InMemorySessionStore())
+    return TestClient(tutoring_service.app)
+
+
+def parse_sse(body: str):
+    events = []
+    for block in body.strip().split("\n\n"):
+        event, data = None, None
+        for line in block.split("\n"):
+            if line.startswith("event: "):
+                event = line[7:]
+            elif line.startswith("data: "):
+                data = json.loads(line[6:])
+        events.append((event, data))
+    return events
+
+
+def test_full_session_flow(monkeypatch):
+    """Create session -> set up problem -> streamed chat -> verify -> metrics."""
+    api = make_client(monkeypatch)
+
+    session_id = api.post("/sessions").json()["session_id"]
+
+    response = api.post(f"/sessions/{session_id}/problem", json={"problem_text": "Solve 2x + 5 = 13"})
+    assert response.status_code == 200
+    assert "x = 4" not in json.dumps(response.json()), "reference solution must not leak"
+
+    response = api.post(f"/sessions/{session_id}/chat", json={"message": "Where do I start?"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = parse_sse(response.text)
+    text = "".join(data["content"] for event, data in events if event is None)
+    assert text == "What do you know so far?"
+    assert events[-1][0] == "done"
+    assert events[-1][1]["conversation_length"] == 2
+
+    response = api.post(f"/sessions/{session_id}/verify", json={"student_work": "2x = 8 so x = 4"})
+    assert response.json()["is_correct"] is True
+
+    metrics = api.get(f"/sessions/{session_id}/metrics").json()
+    assert metrics["has_reference_solution"] is True
+    assert metrics["conversation_length"] == 2
+
+    api.delete(f"/sessions/{session_id}")
+    assert api.get(f"/sessions/{session_id}/metrics").status_code == 404
+    print("✅ Service session flow works")
+
+
+def test_chat_requires_problem(monkeypatch):
+    api = make_client(monkeypatch)
+    session_id = api.post("/sessions").json()["session_id"]
+    response = api.post(f"/sessions/{session_id}/chat", json={"message": "hi"})
+    assert response.status_code == 409
+    response = api.post(f"/sessions/{session_id}/problem", json={"problem_text": "Solve 2x + 5 = 13"})
+    assert response.status_code == 200, "rejected chat released the session"
+    print("✅ Chat before setup is rejected")
+
+
+def test_concurrent_requests_get_409_instead_of_losing_turns(monkeypatch):
+    stub = BlockingStubClient(api_key="test")
+    api = make_client(monkeypatch, stub)
+    session_id = api.post("/sessions").json()["session_id"]
+    api.post(f"/sessions/{session_id}/problem", json={"problem_text": "Solve 2x + 5 = 13"})
+
+    first = {}
+    worker = threading.Thread(target=lambda: first.update(response=api.post(
+        f"/sessions/{session_id}/chat", json={"message": "Where do I start?"})))
+    worker.start()
+    assert stub.streaming.wait(10)
+
+    assert api.post(f"/sessions/{session_id}/chat", json={"message": "Hello?"}).status_code == 409
+    assert api.post(f"/sessions/{session_id}/verify", json={"student_work": "x = 4"}).status_code == 409
+    assert api.post(f"/sessions/{session_id}/problem", json={"problem_text": "Other"}).status_code == 409
+
+    stub.release.set()
+    worker.join(10)
+    assert parse_sse(first["response"].text)[-1][0] == "done"
+
+    response = api.post(f"/sessions/{session_id}/chat", json={"message": "Subtract 5?"})
+    assert parse_sse(response.text)[-1][1]["conversation_length"] == 4, "no turn was lost"
+    print("✅ Overlapping requests on one session get 409; every accepted turn is kept")
+
+
+def test_new_problem_resets_conversation(monkeypatch):
+    api = make_client(monkeypatch)
+    session_id = api.post("/sessions").json()["session_id"]
+    api.post(f"/sessions/{session_id}/problem", json={"problem_text": "Solve 2x + 5 = 13"})
+    api.post(f"/sessions/{session_id}/chat", json={"message": "Where do I start?"})
+    assert api.get(f"/sessions/{session_id}/metrics").json()["conversation_length"] == 2
+
+    api.post(f"/sessions/{session_id}/problem", json={"problem_text": "Solve 3x = 12"})
+    metrics = api.get(f"/sessions/{session_id}/metrics").json()
+    assert metrics["conversation_length"] == 0 and metrics["has_reference_solution"] is True
+    print("✅ Setting a new problem starts a new conversation")
+
+
+if __name__ == "__main__":
+    for test in (
+        test_full_session_flow,
+        test_chat_requires_problem,
+        test_concurrent_requests_get_409_instead_of_losing_turns,
+        test_new_problem_resets_conversation,
+    ):
+        with pytest.MonkeyPatch.context() as monkeypatch:
+            test(monkeypatch)
@@ -0,0 +1,174 @@
+"""
+Test the still-image video encoder and benchmark it against the moviepy path
+(re-encoding the frame at 24 fps), plus the slide-synchronized segment video.
+Narration is a synthetic MP3 tone generated with ffmpeg, so it runs offline.
+
+Run directly for the full 45s / 5-minute benchmark.
+"""
+
+import sys
+import io
+import tempfile
+import time
+from pathlib import Path
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from PIL import Image, ImageDraw
+
+import studio_features
+import tts_pipeline
+from tts_pipeline import TTSBackend
+from video_encoder import concat_videos, encode_still_video, media_duration, run_ffmpeg
+
+TTS_LATENCY = 0.3  # Simulated network round trip per TTS request
+
+
+def make_inputs(workdir: Path, seconds: int):
+    frame = Image.new('RGB', (1280, 720), color=(30, 40, 60))
+    ImageDraw.Draw(frame).text((640, 100), "Problem Overview", fill=(255, 255, 255), anchor="mm")
+    image_path = workdir / "frame.png"
+    frame.save(image_path)
+
+    audio_path = workdir / f"narration_{seconds}s.mp3"
+    run_ffmpeg([
+        "-f", "lavfi", "-i", f"sine=frequency=220:duration={seconds}",
+        "-c:a", "libmp3lame", "-b:a", "64k", str(audio_path)
+    ])
+    return image_path, audio_path
+
+
+class ToneBackend(TTSBackend):
+    """Offline TTS stand-in: one second of tone per three words."""
+
+    name = "tone"
+
+    def synthesize(self, text):
+        time.sleep(TTS_LATENCY)
+        seconds = max(1, len(text.split()) // 3)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tone.mp3"
+            run_ffmpeg([
+                "-f", "lavfi", "-i", f"sine=frequency=330:duration={seconds}",
+                "-ar", "24000", "-ac", "1", "-c:a", "libmp3lame", "-b:a", "32k",
+                "-write_xing", "0", "-id3v2_version", "0", str(path)
+            ])
+            return path.read_bytes()
+
+
+def encode_with_moviepy(image_path: Path, audio_path: Path, output_path: Path):
+    """The previous render_video encoding step (24 fps libx264 + AAC)."""
+    try:
+        from moviepy import AudioFileClip, ImageClip  # moviepy 2.x
+        audio_clip = AudioFileClip(str(audio_path))
+        video_clip = ImageClip(str(image_path)).with_duration(audio_clip.duration).with_audio(audio_clip)
+    except ImportError:
+        from moviepy.editor import AudioFileClip, ImageClip  # moviepy 1.x
+        audio_clip = AudioFileClip(str(audio_path))
+        video_clip = ImageClip(str(image_path)).set_duration(audio_clip.duration).set_audio(audio_clip)
+    video_clip.write_videofile(str(output_path), fps=24, codec='libx264', audio_codec='aac', logger=None)
+    audio_clip.close()
+    video_clip.close()
+
+
+def test_still_video_matches_narration_length():
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        image_path, audio_path = make_inputs(workdir, 10)
+        output_path = encode_still_video(image_path, audio_path, workdir / "out.mp4")
+
+        assert output_path.stat().st_size > 0
+        duration = media_duration(output_path)
+        assert abs(duration - 10) < 1.1, duration
+        print(f"✅ Still-image MP4 encoded: {duration:.1f}s, {output_path.stat().st_size / 1024:.0f} KB")
+
+
+def test_aac_reencode_option():
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        image_path, audio_path = make_inputs(workdir, 3)
+        output_path = encode_still_video(image_path, audio_path, workdir / "out.mp4", copy_audio=False)
+        assert abs(media_duration(output_path) - 3) < 1.1
+        print("✅ AAC re-encode path works")
+
+
+def test_concat_copies_segments():
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        image_path, audio_path = make_inputs(workdir, 4)
+        segments = [encode_still_video(image_path, audio_path, workdir / f"seg{i}.mp4") for i in range(3)]
+
+        start = time.perf_counter()
+        joined = concat_videos(segments, workdir / "joined.mp4")
+        concat_time = time.perf_counter() - start
+
+        assert abs(media_duration(joined) - 12) < 1.5
+        assert not (workdir / "joined_segments.txt").exists()
+        print(f"✅ 3 segments joined without re-encoding in {concat_time * 1000:.0f}ms")
+
+
+def test_split_narration_segments():
+    script = " ".join(f"Sentence number {i} explains one more idea." for i in range(30))
+    segments = studio_features.split_narration_segments(script, target_words=20, max_segments=12)
+    assert 1 < len(segments) <= 12
+    assert " ".join(segments) == script
+    assert studio_features.split_narration_segments(script, target_words=5, max_segments=4).__len__() <= 4
+    print(f"✅ 210-word script split into {len(segments)} slide segments")
+
+
+def render_slide_video(workers: int):
+    original_backend, original_workers = tts_pipeline.backend, studio_features.VIDEO_SEGMENT_WORKERS
+    tts_pipeline.backend = ToneBackend()
+    tts_pipeline.speech_cache.clear()
+    studio_features.VIDEO_SEGMENT_WORKERS = workers
+    try:
+        script = " ".join(f"Step {i} of the approach is to look at the forces involved." for i in range(16))
+        start = time.perf_counter()
+        video = studio_features.render_video(script, "A 2 kg block slides down a 30 degree incline.")
+        elapsed = time.perf_counter() - start
+    finally:
+        tts_pipeline.backend, studio_features.VIDEO_SEGMENT_WORKERS = original_backend, original_workers
+    return video, elapsed
+
+
+def test_slide_video_renders_segments_in_parallel():
+    video, parallel_time = render_slide_video(workers=4)
+    assert video.head(8)[4:8] == b"ftyp"
+    _, serial_time = render_slide_video(workers=1)
+    print(f"   Slide video: serial {serial_time:.2f}s, 4 workers {parallel_time:.2f}s")
+    assert parallel_time < serial_time
+    print("✅ Slide-synchronized video rendered from parallel segments")
+
+
+def benchmark(durations=(45, 300)):
+    print("\nNarration | moviepy 24fps        | still-image ffmpeg   | speedup")
+    for seconds in durations:
+        with tempfile.TemporaryDirectory() as tmp:
+            workdir = Path(tmp)
+            image_path, audio_path = make_inputs(workdir, seconds)
+
+            start = time.perf_counter()
+            encode_with_moviepy(image_path, audio_path, workdir / "moviepy.mp4")
+            moviepy_time = time.perf_counter() - start
+            moviepy_size = (workdir / "moviepy.mp4").stat().st_size
+
+            start = time.perf_counter()
+            encode_still_video(image_path, audio_path, workdir / "still.mp4")
+            still_time = time.perf_counter() - start
+            still_size = (workdir / "still.mp4").stat().st_size
+
+            print(
+                f"{seconds:>7}s  | {moviepy_time:6.2f}s {moviepy_size / 1024:8.0f} KB | "
+                f"{still_time:6.2f}s {still_size / 1024:8.0f} KB | {moviepy_time / still_time:5.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    test_still_video_matches_narration_length()
+    test_aac_reencode_option()
+    test_concat_copies_segments()
+    test_split_narration_segments()
+    test_slide_video_renders_segments_in_parallel()
+    benchmark()
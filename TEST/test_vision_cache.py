@@ -0,0 +1,118 @@
+"""
+Test the perceptual-hash vision cache.
+Uses a stub OpenRouter client so it runs offline.
+"""
+
+import sys
+import io
+
+import pytest
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+from PIL import Image, ImageDraw
+
+import tutoring_engine
+from image_preprocessing import preprocess_image
+from openrouter_client import OpenRouterClient
+from tutoring_engine import TutoringEngine
+from config import VISION_CACHE_MAX_DISTANCE
+from vision_cache import VisionCache, dhash, hamming_distance, image_fingerprint
+
+
+def make_problem(text: str, size=(1200, 500)) -> Image.Image:
+    image = Image.new("RGB", size, (255, 255, 255))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle((40, 40, size[0] - 40, 120), fill=(30, 60, 140))
+    for i, line in enumerate(text.split("\n")):
+        draw.text((60, 180 + i * 40), line, fill=(0, 0, 0))
+    return image
+
+
+def jpeg_roundtrip(image: Image.Image, quality: int) -> Image.Image:
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=quality)
+    buffer.seek(0)
+    return Image.open(buffer)
+
+
+class CountingClient(OpenRouterClient):
+    def __init__(self):
+        super().__init__(api_key="test")
+        self.calls = 0
+
+    def chat_completion_with_vision(self, model, text_prompt, image_data, stream=False):
+        self.calls += 1
+        return {"choices": [{"message": {"content": f"Extracted problem #{self.calls}"}}]}
+
+
+def test_near_duplicates_are_close():
+    original = make_problem("Solve for x: 2x + 5 = 13\nShow your work.")
+    base = dhash(original)
+    assert hamming_distance(base, dhash(jpeg_roundtrip(original, 85))) <= VISION_CACHE_MAX_DISTANCE
+    assert hamming_distance(base, dhash(original.resize((900, 375)))) <= VISION_CACHE_MAX_DISTANCE
+    print("✅ Re-encoded and resized copies hash within threshold")
+
+
+def test_cache_hits_and_eviction():
+    cache = VisionCache(max_entries=2, max_distance=3)
+    cache.put(("a", 0b0000), "a", scope="s1")
+    cache.put(("b", 0b1111 << 20), "b", scope="s1")
+    assert cache.get(("a", 0b0000), scope="s2") == "a"  # exact hit from any session
+    assert cache.get(("x", 0b0011), scope="s1") == "a"  # 2 bits away -> near hit
+    assert cache.get(("x", 0b0011), scope="s2") is None  # near matches stay in their session
+    assert cache.get(("x", 0b0011)) is None
+    assert cache.get(("y", 0b1111 << 40), scope="s1") is None
+
+    cache.put(("c", 0b1 << 60), "c")  # evicts "b" (least recently used)
+    assert cache.get(("b", 0b1111 << 20)) is None
+    assert cache.get_stats() == {"hits": 1, "near_hits": 1, "misses": 4, "entries": 2}
+
+    exact_only = VisionCache(max_distance=-1)
+    exact_only.put(("a", 0), "a", scope="s1")
+    assert exact_only.get(("x", 0), scope="s1") is None
+    print("✅ LRU bounds, Hamming threshold and per-session near matches respected")
+
+
+def test_engine_reuses_vision_result(monkeypatch):
+    stub = CountingClient()
+    cache = VisionCache()
+    monkeypatch.setattr(tutoring_engine, "client", stub)
+    monkeypatch.setattr(tutoring_engine, "vision_cache", cache)
+
+    image = make_problem("Find the derivative of x^3 + 2x")
+    first_uri, _ = preprocess_image(image)
+    rerun_uri, _ = preprocess_image(jpeg_roundtrip(image, 85))
+    other_uri, _ = preprocess_image(make_problem("A train leaves at 3pm travelling 60 km/h.\nWhen does it arrive?"))
+    assert image_fingerprint(first_uri) is not None
+
+    engine = TutoringEngine()
+    first = engine.process_problem_image(first_uri)
+    again = engine.process_problem_image(first_uri)
+    near = engine.process_problem_image(rerun_uri)
+    assert first == again == near
+    assert stub.calls == 1
+
+    engine.process_problem_image(other_uri)
+    assert stub.calls == 2
+
+    # Another student: the same upload is reused, a merely similar one is not
+    other_session = TutoringEngine()
+    assert other_session.process_problem_image(first_uri) == first
+    assert stub.calls == 2
+    other_session.process_problem_image(rerun_uri)
+    assert stub.calls == 3
+
+    restored = TutoringEngine.from_dict(engine.to_dict())
+    restored.process_problem_image(preprocess_image(jpeg_roundtrip(image, 70))[0])
+    assert stub.calls == 3, "a restored session keeps its near matches"
+    print(f"✅ Vision model called {stub.calls}x for 7 images in 2 sessions: {cache.get_stats()}")
+
+
+if __name__ == "__main__":
+    test_near_duplicates_are_close()
+    test_cache_hits_and_eviction()
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        test_engine_reuses_vision_result(monkeypatch)
@@ -0,0 +1,169 @@
+"""
+Test bounded, streaming web downloads against a local fake site: byte caps
+on huge pages and gzip bombs, PDFs behind links routed to the PDF
+extractor, binary files refused, and peak memory versus reading the whole
+response with requests.get().content.
+"""
+
+import sys
+import io
+import gzip
+import os
+import tempfile
+import threading
+import tracemalloc
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Set UTF-8 encoding for console output
+if sys.platform == 'win32':
+    sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
+
+import requests
+from reportlab.lib.pagesizes import letter
+from reportlab.pdfgen import canvas
+
+import content_extractors
+from config import HTML_MAX_PARSE_BYTES
+from content_extractors import URLExtractor, sniff_content_kind
+from page_cache import PageCache
+
+
+def deflate(data: bytes, wbits: int) -> bytes:
+    compressor = zlib.compressobj(wbits=wbits)
+    return compressor.compress(data) + compressor.flush()
+
+
+SMALL_PAGE = b"<html><title>Small</title><main><p>Compressed page</p></main></html>"
+
+
+def build_pdf() -> bytes:
+    buffer = io.BytesIO()
+    pdf = canvas.Canvas(buffer, pagesize=letter)
+    pdf.drawString(72, 750, "Lecture 5: the fundamental theorem of calculus")
+    pdf.showPage()
+    pdf.save()
+    return buffer.getvalue()
+
+
+HUGE_PAGE = b"<html><head><title>Huge</title></head><body><main>" + b"<p>Integration by parts.</p>" * 500000 + b"</main></body></html>"
+BOMB = gzip.compress(b"<html><body>" + b" " * (200 * 1024 * 1024), compresslevel=9)  # ~200KB -> 200MB
+
+ROUTES = {
+    "/huge": (HUGE_PAGE, {"Content-Type": "text/html"}),
+    "/bomb": (BOMB, {"Content-Type": "text/html", "Content-Encoding": "gzip"}),
+    "/notes.pdf": (build_pdf(), {"Content-Type": "application/octet-stream"}),
+    "/photo": (b"\x89PNG\r\n\x1a\n" + b"\x00" * 500000, {"Content-Type": "image/png"}),
+    "/readme.txt": (b"Week 1\n\n  Limits and continuity  \n", {"Content-Type": "text/plain; charset=utf-8"}),
+    "/gzipped": (gzip.compress(SMALL_PAGE), {"Content-Type": "text/html", "Content-Encoding": "gzip"}),
+    "/zlib-deflate": (deflate(SMALL_PAGE, zlib.MAX_WBITS), {"Content-Type": "text/html", "Content-Encoding": "deflate"}),
+    "/raw-deflate": (deflate(SMALL_PAGE, -zlib.MAX_WBITS), {"Content-Type": "text/html", "Content-Encoding": "deflate"}),
+    "/brotli": (b"\x1b\x00\x00", {"Content-Type": "text/html", "Content-Encoding": "br"}),
+}
+
+
+class FakeSite(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def handle(self):
+        try:
+            super().handle()
+        except ConnectionResetError:
+            pass  # Client dropped a connection it stopped reading at its cap
+
+    def do_GET(self):
+        body, headers = ROUTES[self.path]
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # Client stopped reading at its cap
+
+
+def start_site():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakeSite)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    content_extractors.page_cache = PageCache(path=os.path.join(tempfile.mkdtemp(), "pages.db"))
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def peak_memory(function):
+    tracemalloc.start()
+    try:
+        result = function()
+        return result, tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def test_sniffing():
+    assert sniff_content_kind("application/octet-stream", b"%PDF-1.4\n") == "pdf"
+    assert sniff_content_kind("application/pdf", b"<!DOCTYPE html><html>") == "html"
+    assert sniff_content_kind("", b"\xef\xbb\xbf  <html>") == "html"
+    assert sniff_content_kind("text/html", b"\x89PNG\r\n") == "binary"
+    assert sniff_content_kind("text/plain", b"Week 1") == "text"
+    assert sniff_content_kind("application/zip", b"PK\x03\x04") == "binary"
+    print("✅ Content kind sniffed from magic bytes before Content-Type")
+
+
+def test_routing_by_content_kind():
+    server, base = start_site()
+
+    content, metadata = URLExtractor.extract_with_requests(f"{base}/notes.pdf")
+    assert metadata["content_kind"] == "pdf" and metadata["method"] == "requests+pdf"
+    assert "fundamental theorem of calculus" in content and metadata["title"] == "notes.pdf"
+
+    content, metadata = URLExtractor.extract_with_requests(f"{base}/readme.txt")
+    assert content == "Week 1\nLimits and continuity" and metadata["content_kind"] == "text"
+
+    for path in ("/gzipped", "/zlib-deflate", "/raw-deflate"):
+        content, metadata = URLExtractor.extract_with_requests(f"{base}{path}")
+        assert content == "Compressed page" and metadata["title"] == "Small", path
+
+    error, metadata = URLExtractor.extract_with_requests(f"{base}/brotli")
+    assert metadata["error"] and "compressed as 'br'" in error
+
+    error, metadata = URLExtractor.extract_with_requests(f"{base}/photo")
+    assert metadata["error"] and "image/png" in error
+
+    limit, content_extractors.WEB_MAX_PDF_BYTES = content_extractors.WEB_MAX_PDF_BYTES, 1024
+    try:
+        error, metadata = URLExtractor.extract_with_requests(f"{base}/notes.pdf")
+    finally:
+        content_extractors.WEB_MAX_PDF_BYTES = limit
+    assert metadata["error"] and "PDF is larger than" in error
+    server.shutdown()
+    print("✅ PDF link routed to the PDF extractor, text used as is, gzip/zlib/raw deflate decoded, "
+          "image, oversized PDF and unknown encodings refused")
+
+
+def test_huge_and_bomb_are_capped():
+    server, base = start_site()
+
+    (content, metadata), peak = peak_memory(lambda: URLExtractor.extract_with_requests(f"{base}/huge"))
+    assert metadata["truncated"] and metadata["download_bytes"] == HTML_MAX_PARSE_BYTES
+    assert "Integration by parts." in content
+    print(f"✅ {len(HUGE_PAGE) / 1e6:.1f}MB page cut at {HTML_MAX_PARSE_BYTES / 1e6:.1f}MB "
+          f"(peak {peak / 1e6:.0f}MB Python memory)")
+
+    (_, metadata), bounded = peak_memory(lambda: URLExtractor.extract_with_requests(f"{base}/bomb"))
+    assert metadata["truncated"] and metadata["download_bytes"] == HTML_MAX_PARSE_BYTES
+    _, unbounded = peak_memory(lambda: len(requests.get(f"{base}/bomb", timeout=30).content))
+    assert bounded < unbounded / 10
+    server.shutdown()
+    print(f"✅ gzip bomb ({len(BOMB) / 1e3:.0f}KB -> 200MB): peak {bounded / 1e6:.0f}MB streamed with cap "
+          f"vs {unbounded / 1e6:.0f}MB with requests.get().content")
+
+
+if __name__ == "__main__":
+    test_sniffing()
+    test_routing_by_content_kind()
+    test_huge_and_bomb_are_capped()
@@ -2,14 +2,19 @@ import streamlit as st
 from streamlit_lottie import st_lottie
 from streamlit_paste_button import paste_image_button
 import requests
-import base64
-from io import BytesIO
+import uuid
 
 # Import our tutoring system
 from tutoring_engine import TutoringEngine
-from utils import process_uploaded_file
+from utils import detect_file_type, process_uploaded_file
+from image_preprocessing import preprocess_image
 import studio_features
+import studio_pipeline
+from config import STUDIO_PREGENERATE_ON_SETUP
 from content_extractors import extract_content, detect_content_type
+from batch_ingestion import ingest_sources, split_inputs
+from session_store import create_session_store
+from openrouter_client import get_client
 
 # Page configuration
 st.set_page_config(
@@ -30,9 +35,47 @@ def load_lottie_url(url: str):
     except:
         return None
 
+# Shared across all browser sessions served by this process
+@st.cache_resource
+def get_session_store():
+    return create_session_store()
+
+# One OpenRouter client per process: shared connection pool, rate-limit
+# state, response cache and metrics for every browser session
+@st.cache_resource
+def get_openrouter_client():
+    return get_client()
+
+def persist_session():
+    """Save the tutoring session so any worker process can resume it."""
+    get_session_store().save_engine(
+        st.session_state.session_id,
+        st.session_state.engine,
+        extra={
+            "setup_complete": st.session_state.setup_complete,
+            "messages": st.session_state.messages,
+            "problem_statement": st.session_state.problem_statement,
+        },
+    )
+
+# Session id lives in the URL so a reload (or another worker) finds the same session
+if 'session_id' not in st.session_state:
+    session_id = st.query_params.get("sid")
+    if not session_id:
+        session_id = uuid.uuid4().hex
+        st.query_params["sid"] = session_id
+    st.session_state.session_id = session_id
+
 # Initialize session state
 if 'engine' not in st.session_state:
-    st.session_state.engine = TutoringEngine()
+    saved_session = get_session_store().load(st.session_state.session_id)
+    if saved_session and "engine" in saved_session:
+        st.session_state.engine = get_session_store().restore_engine(saved_session)
+        st.session_state.setup_complete = saved_session.get("setup_complete", False)
+        st.session_state.messages = saved_session.get("messages", [])
+        st.session_state.problem_statement = saved_session.get("problem_statement")
+    else:
+        st.session_state.engine = TutoringEngine()
 
 if 'setup_complete' not in st.session_state:
     st.session_state.setup_complete = False
@@ -49,6 +92,9 @@ if 'pasted_image' not in st.session_state:
 if 'pasted_image_text' not in st.session_state:
     st.session_state.pasted_image_text = None
 
+if 'studio_batch' not in st.session_state:
+    st.session_state.studio_batch = None
+
 # Sidebar
 with st.sidebar:
     st.title("📚 Sources")
@@ -58,43 +104,59 @@ with st.sidebar:
     st.subheader("Upload Source Material")
 
     # File upload
-    uploaded_file = st.file_uploader(
-        "Upload a file",
+    uploaded_files = st.file_uploader(
+        "Upload files",
         type=["pdf", "docx", "txt", "png", "jpg", "jpeg"],
-        help="Upload PDF, DOCX, text file, or image with your problem"
+        accept_multiple_files=True,
+        help="Upload PDF, DOCX, text files, or images - several at once to load a whole unit"
     )
 
-    if uploaded_file:
-        st.success(f"✓ {uploaded_file.name} uploaded")
+    if uploaded_files:
+        st.success(f"✓ {', '.join(f.name for f in uploaded_files)} uploaded")
 
     st.markdown("**OR**")
 
     # Manual text input
     manual_text = st.text_area(
-        "Enter problem text",
-        placeholder="Paste your homework problem here...",
+        "Enter problem text or links",
+        placeholder="Paste your homework problem here, or YouTube/web links (one per line)...",
         height=100
     )
 
     # Process button
     if st.button("🚀 Start Tutoring", type="primary", use_container_width=True):
-        if uploaded_file or manual_text:
+        text_sources = split_inputs(manual_text)
+        uploaded_file = uploaded_files[0] if uploaded_files else None
+        if uploaded_files or manual_text:
             with st.spinner("Processing your problem..."):
                 problem_text = None
                 image_data = None
 
                 try:
-                    if uploaded_file:
-                        # Determine file type
-                        file_type = None
-                        if uploaded_file.name.endswith('.pdf'):
-                            file_type = 'pdf'
-                        elif uploaded_file.name.endswith('.docx'):
-                            file_type = 'docx'
-                        elif uploaded_file.name.endswith('.txt'):
-                            file_type = 'text'
-                        elif uploaded_file.name.lower().endswith(('.png', '.jpg', '.jpeg')):
-                            file_type = 'image'
+                    # Drop any source indexed for a previous problem
+                    st.session_state.engine.source_index = None
+
+                    if len(uploaded_files) + len(text_sources) > 1:
+                        # Several sources: load them as one unit
+                        st.info(f"📥 Loading {len(uploaded_files) + len(text_sources)} sources...")
+                        batch = ingest_sources(
+                            text_sources,
+                            [(f.name, f.getvalue()) for f in uploaded_files],
+                            describe_image=st.session_state.engine.process_problem_image,
+                        )
+                        for source in batch.failed:
+                            st.warning(f"⚠️ Skipped {source.label}: {source.error}")
+                        if batch.sources:
+                            st.session_state.engine.load_sources(batch.index_sources())
+                            problem_text = batch.knowledge_context()
+                            skipped = f", {len(batch.duplicates)} duplicates skipped" if batch.duplicates else ""
+                            st.success(f"✅ Loaded {len(batch.sources)} sources ({batch.word_count:,} words) "
+                                       f"in {batch.elapsed:.1f}s{skipped}")
+                        else:
+                            problem_text = "Error: None of the sources could be loaded"
+
+                    elif uploaded_file:
+                        file_type = detect_file_type(uploaded_file.name)
 
                         # Process file
                         problem_text, image_data, method = process_uploaded_file(uploaded_file, file_type)
@@ -118,6 +180,12 @@ with st.sidebar:
                                 problem_text = None
                             else:
                                 problem_text = extracted_content
+                                # Index the full source; each chat turn retrieves what it needs
+                                st.session_state.engine.load_source(
+                                    metadata["source_text"],
+                                    source=manual_text.strip(),
+                                    transcript=metadata.get("transcript"),
+                                )
                                 st.success(f"✅ Extracted {metadata.get('word_count', 0)} words from {content_type}")
                         else:
                             # Plain text
@@ -133,6 +201,10 @@ with st.sidebar:
                         if not solution.startswith("Error"):
                             st.session_state.setup_complete = True
                             st.session_state.messages = []
+                            persist_session()
+                            if STUDIO_PREGENERATE_ON_SETUP:
+                                # Pre-compute every Studio panel in the background
+                                st.session_state.studio_batch = studio_pipeline.start_studio_batch(problem_text)
                             st.success(f"✅ Ready! Setup took {gen_time:.1f}s")
                             st.rerun()
                         else:
@@ -152,6 +224,8 @@ with st.sidebar:
             st.session_state.setup_complete = False
             st.session_state.messages = []
             st.session_state.problem_statement = None
+            st.session_state.studio_batch = None
+            get_session_store().delete(st.session_state.session_id)
             st.rerun()
 
     st.markdown("---")
@@ -165,6 +239,11 @@ with st.sidebar:
             st.metric("Messages", len(st.session_state.messages) // 2)
         with col2:
             st.metric("Cost", f"${metrics['total_cost']:.4f}")
+        api_metrics = get_openrouter_client().get_metrics()
+        st.caption(
+            f"API (all sessions): {api_metrics['requests']} requests, "
+            f"{api_metrics['cache_hits']} cached, avg {api_metrics['avg_latency_seconds']:.1f}s"
+        )
 
     st.markdown("---")
 
@@ -222,18 +301,14 @@ with chat_col:
 
         # Process pasted image
         if paste_result.image_data is not None:
-            # Convert PIL image to base64
-            buffered = BytesIO()
-            paste_result.image_data.save(buffered, format="PNG")
-            img_bytes = buffered.getvalue()
-            img_base64 = base64.b64encode(img_bytes).decode()
+            # Downsample/crop/re-encode before sending to the vision model
+            image_data_uri, _ = preprocess_image(paste_result.image_data)
 
             # Store pasted image
-            st.session_state.pasted_image = img_base64
+            st.session_state.pasted_image = image_data_uri
 
-            # Process with vision model - add data URI prefix
+            # Process with vision model
             with st.spinner("Processing pasted image..."):
-                image_data_uri = f"data:image/png;base64,{img_base64}"
                 image_text = st.session_state.engine.process_problem_image(image_data_uri)
                 st.session_state.pasted_image_text = image_text
                 st.success("Image pasted! Add your question below.")
@@ -241,7 +316,7 @@ with chat_col:
         # Show pasted image preview if exists
         if st.session_state.pasted_image:
             with st.expander("📎 Pasted Image Context", expanded=True):
-                st.image(f"data:image/png;base64,{st.session_state.pasted_image}", width=300)
+                st.image(st.session_state.pasted_image, width=300)
                 st.caption("Vision model extracted:")
                 st.info(st.session_state.pasted_image_text)
                 if st.button("❌ Clear Image"):
@@ -286,6 +361,7 @@ with chat_col:
                     "content": error_msg
                 })
 
+            persist_session()
             st.rerun()
     else:
         st.chat_input("Upload a source to get started", disabled=True)
@@ -348,7 +424,20 @@ with studio_col:
         with st.expander("📋 Current Problem", expanded=False):
             st.markdown(st.session_state.problem_statement)
 
-        st.info("✨ Studio features coming soon!\n\nFocus on the chat to work through your problem with Aristotle.")
+        batch = st.session_state.studio_batch
+        if batch is None:
+            if st.button("⚡ Generate all", use_container_width=True):
+                st.session_state.studio_batch = studio_pipeline.start_studio_batch(st.session_state.problem_statement)
+                st.rerun()
+            st.info("✨ Generate every Studio artifact at once, or open a single tool above.\n\nFocus on the chat to work through your problem with Aristotle.")
+        else:
+            status_icons = {"ready": "✅", "running": "⏳", "failed": "❌"}
+            for feature, status in batch.status().items():
+                st.caption(f"{status_icons[status]} {feature.capitalize()}: {status}")
+            if batch.done():
+                st.success(f"All Studio artifacts ready in {batch.wall_time():.1f}s")
+            elif st.button("🔄 Refresh status", use_container_width=True):
+                st.rerun()
     else:
         st.info("✨ Studio output will be saved here.\n\nAfter adding sources, click to add Audio Overview, study guide, mind map and more!")
 
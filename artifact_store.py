@@ -0,0 +1,131 @@
+"""
+Artifact store for Studio outputs.
+
+Every Studio modal used to regenerate its LLM content and media from scratch
+each time its button was pressed, including on reruns of the same problem.
+Artifacts are now cached under (problem hash, feature, model, prompt version)
+so reopening a modal is instant and costs nothing. Changing a feature's model
+or bumping its prompt version naturally invalidates old entries.
+
+An artifact is a dict of named outputs - text, bytes or MediaOutput, e.g.
+{"text": "...", "media": MediaOutput(...)}. The store is bounded by total size
+(memory-mapped media included) and evicts least recently used artifacts first;
+an evicted file-backed MediaOutput deletes its temp file once unreferenced.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from config import STUDIO_ARTIFACT_CACHE_BYTES
+from media_output import MediaOutput
+
+ArtifactKey = Tuple[str, str, str, int]
+
+
+def problem_fingerprint(problem_statement: str) -> str:
+    """
+    Stable hash of a problem statement (whitespace-normalized).
+
+    Args:
+        problem_statement: Problem text
+
+    Returns:
+        Hex digest
+    """
+    normalized = " ".join(problem_statement.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+def artifact_size(artifact: Dict) -> int:
+    """Approximate retained size of an artifact in bytes."""
+    size = 0
+    for value in artifact.values():
+        if isinstance(value, (bytes, bytearray, MediaOutput)):
+            size += len(value)
+        elif isinstance(value, str):
+            size += len(value.encode("utf-8"))
+    return size
+
+
+class ArtifactStore:
+    """
+    Thread-safe, size-bounded LRU store shared by all sessions in the process.
+    """
+
+    def __init__(self, max_bytes: int = STUDIO_ARTIFACT_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self._artifacts: "OrderedDict[ArtifactKey, Dict]" = OrderedDict()
+        self._sizes: Dict[ArtifactKey, int] = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(problem_statement: str, feature: str, model: str, prompt_version: int) -> ArtifactKey:
+        return (problem_fingerprint(problem_statement), feature, model, prompt_version)
+
+    def get(self, key: ArtifactKey) -> Optional[Dict]:
+        """
+        Look up an artifact.
+
+        Returns:
+            The artifact dict, or None on a miss
+        """
+        with self._lock:
+            artifact = self._artifacts.get(key)
+            if artifact is None:
+                self.stats["misses"] += 1
+                return None
+            self._artifacts.move_to_end(key)
+            self.stats["hits"] += 1
+            return artifact
+
+    def put(self, key: ArtifactKey, artifact: Dict):
+        """
+        Store an artifact, evicting least recently used ones to stay under max_bytes.
+        Artifacts larger than the whole budget are not stored.
+        """
+        size = artifact_size(artifact)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._artifacts:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._artifacts[key]
+
+            self._artifacts[key] = artifact
+            self._sizes[key] = size
+            self._total_bytes += size
+
+            while self._total_bytes > self.max_bytes:
+                old_key, _ = self._artifacts.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(old_key)
+                self.stats["evictions"] += 1
+
+    def update(self, key: ArtifactKey, **outputs):
+        """Add outputs (e.g. rendered media) to an existing artifact, or create it."""
+        with self._lock:
+            artifact = dict(self._artifacts.get(key, {}))
+        artifact.update(outputs)
+        self.put(key, artifact)
+
+    def clear(self):
+        with self._lock:
+            self._artifacts.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                "artifacts": len(self._artifacts),
+                "total_bytes": self._total_bytes,
+            }
+
+
+# Process-wide store shared by every session (same problem -> same artifacts)
+artifact_store = ArtifactStore()
@@ -0,0 +1,318 @@
+"""
+Batch ingestion of several sources into one tutoring session.
+
+The sidebar used to take exactly one file or one link. A teacher loading a
+whole unit (a few YouTube lectures, some reading pages, lecture-note PDFs)
+now passes them all to ingest_sources(), which:
+
+- dedupes them up front: YouTube links by video id, web links by a
+  normalized URL (no fragment, tracking parameters or trailing slash),
+  files and pasted text by content hash - and again after extraction, so
+  two URLs serving the same page are indexed once
+- fetches and extracts them concurrently on a thread pool (the work is
+  network-bound), with at most BATCH_PER_HOST_LIMIT requests in flight per
+  host so a unit of ten pages from one course site doesn't hammer it
+- returns a BatchIngestion whose knowledge_context() is a compact overview
+  of every source for the problem statement, and whose index_sources()
+  feeds TutoringEngine.load_sources() - one BM25 index over the whole unit,
+  with each excerpt labelled by the source it came from
+
+Extraction goes through the same paths as single sources
+(content_extractors.extract_content, utils.process_uploaded_file), so the
+transcript and page caches apply to batch loads too.
+"""
+
+import hashlib
+import io
+import threading
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import BATCH_CONTEXT_CHARS, BATCH_MAX_SOURCES, BATCH_MAX_WORKERS, BATCH_PER_HOST_LIMIT
+from content_extractors import YouTubeExtractor, detect_content_type, extract_content
+from transcript_cache import Transcript
+from utils import detect_file_type, process_uploaded_file
+
+# Host every YouTube source is fetched from, whatever the link form
+_YOUTUBE_HOST = "youtube.com"
+
+_KIND_NAMES = {
+    "youtube": "video",
+    "url": "web page",
+    "paste": "pasted text",
+    "text": "text file",
+    "pdf": "PDF",
+    "docx": "document",
+    "image": "image",
+}
+
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a URL for deduplication."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_")
+    ))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/") or "/", query, ""))
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+class IngestedSource:
+    """One source of a batch: what was asked for, and what was extracted."""
+
+    def __init__(self, target: str, kind: str, key: str, host: Optional[str] = None):
+        self.target = target  # Link or file name as given
+        self.label = target  # Display name; becomes the page/video title once extracted
+        self.kind = kind
+        self.key = key
+        self.host = host
+        self.text = ""
+        self.transcript: Optional[Transcript] = None
+        self.metadata: Dict = {}
+        self.error: Optional[str] = None
+        self.duplicate_of: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and self.duplicate_of is None
+
+    @property
+    def word_count(self) -> int:
+        return len(self.text.split())
+
+
+class HostLimiter:
+    """Caps concurrent requests per host (one semaphore per host, created on demand)."""
+
+    def __init__(self, per_host: int):
+        self.per_host = per_host
+        self._lock = threading.Lock()
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+
+    def slot(self, host: Optional[str]):
+        """Context manager holding one of the host's slots (no limit for host None)."""
+        if host is None:
+            return nullcontext()
+        with self._lock:
+            if host not in self._slots:
+                self._slots[host] = threading.BoundedSemaphore(self.per_host)
+            return self._slots[host]
+
+
+class BatchIngestion:
+    """Result of ingest_sources(): the sources in input order, plus timing."""
+
+    def __init__(self, sources: List[IngestedSource], elapsed: float):
+        self.all_sources = sources
+        self.elapsed = elapsed
+
+    @property
+    def sources(self) -> List[IngestedSource]:
+        """Sources that were extracted and are not duplicates."""
+        return [source for source in self.all_sources if source.ok]
+
+    @property
+    def failed(self) -> List[IngestedSource]:
+        return [source for source in self.all_sources if source.error is not None]
+
+    @property
+    def duplicates(self) -> List[IngestedSource]:
+        return [source for source in self.all_sources if source.duplicate_of is not None]
+
+    @property
+    def word_count(self) -> int:
+        return sum(source.word_count for source in self.sources)
+
+    def index_sources(self) -> List[Tuple[str, str, Optional[Transcript]]]:
+        """(text, label, transcript) per source, for TutoringEngine.load_sources()."""
+        return [(source.text, source.label, source.transcript) for source in self.sources]
+
+    def knowledge_context(self, max_chars: int = BATCH_CONTEXT_CHARS) -> str:
+        """
+        Problem statement for the whole unit: a listing of every source with
+        an opening excerpt, sharing a max_chars budget. The full texts are
+        reached through the retrieval index.
+        """
+        sources = self.sources
+        budget = max(200, max_chars // max(1, len(sources)))
+        sections = []
+        for number, source in enumerate(sources, start=1):
+            details = [_KIND_NAMES.get(source.kind, source.kind)]
+            if source.transcript is not None:
+                details.append(f"{source.transcript.duration / 60:.0f} min")
+            details.append(f"{source.word_count:,} words")
+            excerpt = source.text if len(source.text) <= budget else source.text[:budget].rsplit(" ", 1)[0] + "..."
+            sections.append(f"[{number}] {source.label} ({', '.join(details)})\n{excerpt}")
+
+        return (
+            f"Study unit: {len(sources)} sources ({self.word_count:,} words).\n"
+            "The full text of every source is indexed; the most relevant excerpts are retrieved for each "
+            "question. The student may ask about any of them.\n\n" + "\n\n".join(sections)
+        )
+
+
+def split_inputs(text: str) -> List[str]:
+    """
+    Split the sidebar text box into sources: one per line if every line is
+    a link, otherwise the whole text is a single pasted source.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) > 1 and all(detect_content_type(line) != "text" for line in lines):
+        return lines
+    return [text] if text.strip() else []
+
+
+def plan_sources(inputs: Sequence[str], files: Sequence[Tuple[str, bytes]] = ()) -> List[IngestedSource]:
+    """
+    Turn raw inputs into IngestedSource entries, marking duplicates.
+
+    Args:
+        inputs: Links or pasted text, one source each
+        files: (file name, file bytes) per uploaded file
+
+    Returns:
+        One entry per input, in order (duplicates and unsupported files
+        included, flagged)
+    """
+    planned: List[IngestedSource] = []
+    for raw in inputs:
+        text = raw.strip()
+        if not text:
+            continue
+        kind = detect_content_type(text)
+        if kind == "youtube":
+            video_id = YouTubeExtractor.extract_video_id(text)
+            planned.append(IngestedSource(text, kind, f"youtube:{video_id or text}", _YOUTUBE_HOST))
+        elif kind == "url":
+            key = normalize_url(text)
+            planned.append(IngestedSource(text, kind, key, urlsplit(key).netloc))
+        else:
+            source = IngestedSource("Pasted text", "paste", f"text:{_digest(text.encode('utf-8'))}")
+            source.text = text
+            planned.append(source)
+
+    for name, data in files:
+        file_type = detect_file_type(name)
+        source = IngestedSource(name, file_type or "file", f"file:{_digest(data)}")
+        if file_type is None:
+            source.error = "Unsupported file type"
+        source.metadata["data"] = data
+        planned.append(source)
+
+    seen: Dict[str, str] = {}
+    for source in planned:
+        if source.key in seen:
+            source.duplicate_of = seen[source.key]
+        else:
+            seen[source.key] = source.label
+    return planned
+
+
+def _extract(source: IngestedSource, limiter: HostLimiter, describe_image: Optional[Callable[[str], str]]):
+    """Fill in one source's text (runs on a worker thread)."""
+    try:
+        if source.kind in ("youtube", "url"):
+            with limiter.slot(source.host):
+                content, metadata, _ = extract_content(source.target, source.kind)
+            if metadata.get("error"):
+                source.error = content[len("Error: "):] if content.startswith("Error: ") else content
+                return
+            source.text = metadata.pop("source_text")
+            source.transcript = metadata.pop("transcript", None)
+            source.metadata = metadata
+            if metadata.get("title") not in (None, "", "Unknown"):
+                source.label = metadata["title"]
+        elif source.kind != "paste":
+            text, image_data, _ = process_uploaded_file(io.BytesIO(source.metadata.pop("data")), source.kind)
+            if image_data:
+                if describe_image is None:
+                    source.error = "Image sources need a vision model"
+                    return
+                text = describe_image(image_data)
+            if not text or text.startswith("Error"):
+                source.error = text or "No text found"
+                return
+            source.text = text
+    except Exception as e:
+        source.error = str(e)
+
+
+def _interleave_hosts(sources: List[IngestedSource]) -> List[IngestedSource]:
+    """
+    Order work round-robin across hosts, so workers waiting on one busy
+    host's limit don't hold up sources from other hosts behind them.
+    """
+    queues: Dict[Optional[str], List[IngestedSource]] = {}
+    for source in sources:
+        queues.setdefault(source.host, []).append(source)
+    ordered = []
+    while queues:
+        for host in list(queues):
+            ordered.append(queues[host].pop(0))
+            if not queues[host]:
+                del queues[host]
+    return ordered
+
+
+def ingest_sources(
+    inputs: Sequence[str],
+    files: Sequence[Tuple[str, bytes]] = (),
+    describe_image: Optional[Callable[[str], str]] = None,
+    max_workers: int = BATCH_MAX_WORKERS,
+    per_host: int = BATCH_PER_HOST_LIMIT,
+) -> BatchIngestion:
+    """
+    Fetch and extract several sources concurrently.
+
+    Args:
+        inputs: YouTube links, web links or pasted text, one source each
+        files: (file name, file bytes) per uploaded file
+        describe_image: Turns a base64 image into text (e.g.
+            TutoringEngine.process_problem_image); image files fail without it
+        max_workers: Sources extracted at once
+        per_host: Requests in flight per host
+
+    Returns:
+        BatchIngestion with every source in input order
+
+    Raises:
+        ValueError: If more than BATCH_MAX_SOURCES sources are given
+    """
+    start_time = time.time()
+    planned = plan_sources(inputs, files)
+    if len(planned) > BATCH_MAX_SOURCES:
+        raise ValueError(f"At most {BATCH_MAX_SOURCES} sources can be loaded at once (got {len(planned)})")
+
+    work = _interleave_hosts([source for source in planned if source.ok])
+    if work:
+        limiter = HostLimiter(per_host)
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(work))) as pool:
+            list(pool.map(lambda source: _extract(source, limiter, describe_image), work))
+
+    # Different links can serve the same content (mirrors, redirects)
+    seen: Dict[str, str] = {}
+    for source in planned:
+        if not source.ok:
+            continue
+        digest = _digest(source.text.encode("utf-8"))
+        if digest in seen:
+            source.duplicate_of = seen[digest]
+        else:
+            seen[digest] = source.label
+
+    # Labels name excerpts in the shared index, so they must be unique
+    labels: Dict[str, int] = {}
+    for source in planned:
+        if source.ok:
+            labels[source.label] = labels.get(source.label, 0) + 1
+            if labels[source.label] > 1:
+                source.label = f"{source.label} ({labels[source.label]})"
+
+    return BatchIngestion(planned, time.time() - start_time)
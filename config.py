@@ -7,6 +7,14 @@ load_dotenv()
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
 OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
 
+# Shared OpenRouter client (openrouter_client.get_client) - one per API key per process
+OPENROUTER_POOL_SIZE = 16  # Keep-alive connections shared by all sessions
+OPENROUTER_MAX_CONCURRENT = 16  # Requests in flight across all sessions
+OPENROUTER_MAX_RETRIES = 2  # Retries after a 429, honouring Retry-After
+OPENROUTER_RETRY_BACKOFF_SECONDS = 2.0  # Used when a 429 carries no Retry-After
+OPENROUTER_RESPONSE_CACHE_TTL_SECONDS = 600  # Identical non-streaming requests (0 disables)
+OPENROUTER_RESPONSE_CACHE_MAX_ENTRIES = 256
+
 # Model Configuration - Optimized for Speed & Quality
 MODELS = {
     # For generating reference solutions - FAST & ACCURATE
@@ -123,6 +131,67 @@ ENABLE_STREAMING = True
 ENABLE_CACHING = True
 MAX_CONVERSATION_LENGTH = 20  # Prevent context overflow
 
+# Vision input preprocessing (image_preprocessing.py)
+VISION_MAX_LONG_SIDE = 2048  # gpt-4o-mini high detail fits images into 2048x2048...
+VISION_MAX_SHORT_SIDE = 768  # ...then scales the short side to 768 before tiling
+VISION_JPEG_QUALITY = 85
+VISION_GRAYSCALE_THRESHOLD = 4.0  # Mean channel spread below this counts as grayscale
+
+# Perceptual-hash cache for vision extraction (vision_cache.py)
+VISION_HASH_SIZE = 16  # 16x16 = 256-bit dHash
+VISION_CACHE_MAX_DISTANCE = 4  # Max differing dHash bits for a near match (-1 = exact matches only)
+VISION_CACHE_MAX_ENTRIES = 256
+
+# PDF extraction limits - large textbooks are streamed page by page and capped
+PDF_MAX_PAGES = 500
+PDF_MAX_CHARS = 500_000
+PDF_PARALLEL_MIN_PAGES = 40  # Below this, process pool startup costs more than it saves
+PDF_PAGES_PER_TASK = 16
+PDF_POOL_WORKERS = min(4, os.cpu_count() or 1)  # Extraction processes shared by all sessions and batch loads
+
+# Session persistence - lets several worker processes serve the same session
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "sqlite")  # memory | sqlite | redis
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", "sessions.db")
+SESSION_TTL_SECONDS = 7 * 24 * 3600  # Idle sessions expire after a week
+SESSION_PURGE_INTERVAL_SECONDS = 3600  # Expired sessions are swept on the first save after this long
+SESSION_HISTORY_PAGE_MESSAGES = 20  # Conversations are saved in immutable pages of this many messages
+SESSION_INDEX_CACHE_ENTRIES = 8  # Deserialized source indexes kept per process
+SESSION_CLAIM_SECONDS = 300  # A service request's hold on its session (outlasts any model call)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+# YouTube transcript cache (transcript_cache.py)
+TRANSCRIPT_CACHE_PATH = os.getenv("TRANSCRIPT_CACHE_PATH", "transcripts.db")
+TRANSCRIPT_CACHE_TTL_SECONDS = 30 * 24 * 3600  # Refetch captions after a month
+TRANSCRIPT_NEGATIVE_TTL_SECONDS = 24 * 3600  # "Transcripts disabled" is rechecked daily
+TRANSCRIPT_CACHE_PURGE_INTERVAL_SECONDS = 3600  # Expired entries are swept on the first store after this long
+
+# Web page cache (page_cache.py) - stores cleaned text, revalidated with ETag/Last-Modified
+PAGE_CACHE_PATH = os.getenv("PAGE_CACHE_PATH", "pages.db")
+PAGE_CACHE_MAX_HEURISTIC_SECONDS = 24 * 3600  # Cap for pages with Last-Modified but no Cache-Control
+PAGE_CACHE_MAX_AGE_SECONDS = 30 * 24 * 3600  # Pages not fetched or revalidated for a month are deleted
+PAGE_CACHE_PURGE_INTERVAL_SECONDS = 3600  # Old pages are swept on the first store after this long
+PAGE_EXTRACTOR_VERSION = 2  # Bump when URLExtractor's text cleaning changes; text cached by other versions is refetched
+WEB_POOL_SIZE = 8  # Keep-alive connections per host for URLExtractor's shared session
+HTML_MAX_PARSE_BYTES = 4 * 1024 * 1024  # Only the first 4MB of a page is downloaded and parsed
+WEB_MAX_PDF_BYTES = 20 * 1024 * 1024  # Larger linked PDFs are refused
+WEB_DOWNLOAD_CHUNK_BYTES = 64 * 1024  # Read/decompression step for streamed downloads
+
+# Retrieval over long sources (retrieval.py) - replaces fixed-length truncation
+RETRIEVAL_CHUNK_WORDS = 120
+RETRIEVAL_CHUNK_OVERLAP_WORDS = 30
+RETRIEVAL_TOP_K = 4  # Chunks injected into each tutoring turn
+RETRIEVAL_OVERVIEW_CHARS = 2000  # Opening excerpt kept in the problem statement
+
+# Batch ingestion of several sources per session (batch_ingestion.py)
+BATCH_MAX_SOURCES = 20
+BATCH_MAX_WORKERS = 8  # Sources fetched/extracted at once
+BATCH_PER_HOST_LIMIT = 2  # Requests in flight per host (YouTube counts as one host)
+BATCH_CONTEXT_CHARS = 6000  # Overview of all sources in the problem statement
+
+# Headless tutoring service (tutoring_service.py)
+SERVICE_HOST = os.getenv("SERVICE_HOST", "0.0.0.0")
+SERVICE_PORT = int(os.getenv("SERVICE_PORT", "8000"))
+
 # UI Configuration
 APP_TITLE = "Aristotle AI Tutor"
 APP_DESCRIPTION = """An AI-powered Socratic tutor that helps you learn by guiding you to discover solutions yourself.
@@ -145,3 +214,39 @@ STUDIO_MODELS = {
     "infographic": "openai/gpt-4o-mini",  # Data structuring for visuals
     "slidedeck": "anthropic/claude-haiku-4.5:nitro",  # Markdown slides generation
 }
+
+# Studio artifact cache (artifact_store.py) - total text + media bytes kept in memory
+STUDIO_ARTIFACT_CACHE_BYTES = 256 * 1024 * 1024
+
+# "Generate all" Studio pipeline (studio_pipeline.py) - pools are shared by all sessions
+STUDIO_PREGENERATE_ON_SETUP = True  # Start generating every artifact as soon as setup completes
+STUDIO_TEXT_WORKERS = 16  # Concurrent Studio model calls
+STUDIO_RENDER_WORKERS = 3  # Render worker processes (job_queue.py), shared by all sessions
+JOB_HISTORY_LIMIT = 200  # Finished render jobs kept for status/result lookups
+STUDIO_PROGRESSIVE_AUDIO = True  # Play audio overviews sentence by sentence as they are synthesized
+STUDIO_PERSIST_OUTPUTS = os.getenv("STUDIO_PERSIST_OUTPUTS", "false").lower() == "true"  # Also write media to studio_outputs/
+MEDIA_MMAP_THRESHOLD = 8 * 1024 * 1024  # Larger rendered media stays in a memory-mapped temp file
+
+# Managed studio_outputs/ directory (managed_outputs.py)
+STUDIO_OUTPUT_DIR = "studio_outputs"
+STUDIO_OUTPUT_MAX_BYTES = 1024 * 1024 * 1024  # Oldest files are removed beyond 1 GB
+STUDIO_OUTPUT_MAX_AGE_SECONDS = 7 * 24 * 3600
+STUDIO_OUTPUT_GC_INTERVAL_SECONDS = 600
+
+# Slide deck PDFs (slide_renderer.py)
+SLIDE_CACHE_MAX_ENTRIES = 512  # Rendered single-slide PDFs kept for re-use
+SLIDE_FONT_DIRS = ["/usr/share/fonts/truetype/dejavu", "/usr/share/fonts/dejavu", "/Library/Fonts", "C:/Windows/Fonts"]
+
+# Still-image video encoding (video_encoder.py)
+VIDEO_STILL_FPS = 1  # A static frame needs no more than one frame per second
+VIDEO_X264_PRESET = "veryfast"
+VIDEO_COPY_AUDIO = True  # Mux the MP3 narration as-is instead of re-encoding to AAC
+VIDEO_SEGMENT_WORDS = 40  # Narration words per slide (~15 seconds of speech)
+VIDEO_MAX_SEGMENTS = 12
+VIDEO_SEGMENT_WORKERS = 4  # Segments narrated/encoded concurrently within one render
+
+# Text-to-speech pipeline (tts_pipeline.py)
+TTS_BACKEND = os.getenv("TTS_BACKEND", "gtts")  # "gtts" (network) or "pyttsx3" (offline)
+TTS_WORKERS = 6  # Concurrent sentence syntheses per process
+TTS_MAX_CHUNK_CHARS = 200  # Long sentences are split at clause boundaries
+TTS_CACHE_MAX_BYTES = 32 * 1024 * 1024  # Per-sentence audio cache
@@ -3,12 +3,41 @@ Content extraction utilities for YouTube videos and web URLs.
 Optimized for educational content with focus on latency and accuracy.
 """
 
+import io
+import os
 import re
-from typing import Tuple, Optional, Dict
+import zlib
+from typing import Iterator, Tuple, Optional, Dict
+from urllib.parse import unquote, urlparse
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import time
 
+from config import (
+    HTML_MAX_PARSE_BYTES,
+    RETRIEVAL_OVERVIEW_CHARS,
+    WEB_DOWNLOAD_CHUNK_BYTES,
+    WEB_MAX_PDF_BYTES,
+    WEB_POOL_SIZE,
+)
+from page_cache import CachedPage, page_cache
+from transcript_cache import (
+    STATUS_DISABLED,
+    STATUS_NOT_FOUND,
+    STATUS_OK,
+    CachedTranscript,
+    Transcript,
+    transcript_cache,
+)
+
+# lxml is the fast path for web pages; BeautifulSoup is the fallback
+try:
+    from lxml import etree
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
 # Try to import youtube_transcript_api with error handling
 try:
     from youtube_transcript_api import YouTubeTranscriptApi
@@ -18,6 +47,106 @@ except Exception as e:
     YOUTUBE_API_AVAILABLE = False
     print(f"Warning: YouTube Transcript API not available: {e}")
 
+_RETRIEVAL_NOTE = "\nThe full source is indexed; the most relevant excerpts are retrieved for each question."
+
+
+def _overview(content: str) -> str:
+    """Opening excerpt of a long source (the rest is reached through retrieval)."""
+    if len(content) <= RETRIEVAL_OVERVIEW_CHARS:
+        return content
+    return content[:RETRIEVAL_OVERVIEW_CHARS].rsplit(" ", 1)[0] + "..."
+
+
+# One keep-alive session for all web page fetches (urllib3 pools are thread-safe)
+_http_session = requests.Session()
+_http_session.mount("https://", HTTPAdapter(pool_maxsize=WEB_POOL_SIZE))
+_http_session.mount("http://", HTTPAdapter(pool_maxsize=WEB_POOL_SIZE))
+
+# Magic numbers of binary formats that are never worth parsing as a page
+_BINARY_MAGIC = (b"\x89PNG", b"GIF8", b"\xff\xd8\xff", b"PK\x03\x04", b"\x1f\x8b", b"RIFF", b"ID3", b"OggS")
+
+
+class UnsupportedContentEncoding(ValueError):
+    """A response was compressed with an encoding _iter_body can't decode."""
+
+    def __init__(self, encoding: str):
+        super().__init__(f"Unsupported Content-Encoding: {encoding}")
+        self.encoding = encoding
+
+
+def _iter_body(response: requests.Response) -> Iterator[bytes]:
+    """
+    Stream a response body, decompressing it incrementally.
+
+    Decompression output is capped at WEB_DOWNLOAD_CHUNK_BYTES per step, so
+    a small gzip body that inflates to gigabytes is still consumed in
+    bounded pieces and the caller can stop at any point.
+
+    Raises:
+        UnsupportedContentEncoding: For encodings other than gzip and deflate
+    """
+    encoding = response.headers.get("Content-Encoding", "").strip().lower()
+    if encoding in ("", "identity"):
+        decoder = None
+    elif encoding in ("gzip", "x-gzip", "deflate"):
+        decoder = zlib.decompressobj(zlib.MAX_WBITS | 32)  # Auto-detects gzip and zlib headers
+    else:
+        raise UnsupportedContentEncoding(encoding)
+
+    # Some servers send "deflate" as a bare deflate stream, without the zlib header
+    try_raw_deflate = encoding == "deflate"
+    for raw in response.raw.stream(WEB_DOWNLOAD_CHUNK_BYTES, decode_content=False):
+        if decoder is None:
+            yield raw
+            continue
+        while raw:
+            try:
+                piece = decoder.decompress(raw, WEB_DOWNLOAD_CHUNK_BYTES)
+            except zlib.error:
+                if not try_raw_deflate:
+                    raise
+                decoder, try_raw_deflate = zlib.decompressobj(-zlib.MAX_WBITS), False
+                continue
+            try_raw_deflate = False
+            raw = decoder.unconsumed_tail
+            if piece:
+                yield piece
+    if decoder is not None:
+        tail = decoder.flush()
+        if tail:
+            yield tail
+
+
+def sniff_content_kind(content_type: str, head: bytes) -> str:
+    """
+    Classify a response from its Content-Type and first bytes.
+
+    Magic numbers win over the header, since servers often send PDFs as
+    application/octet-stream (or HTML error pages as application/pdf).
+
+    Returns:
+        "pdf", "html", "text" or "binary"
+    """
+    mime = content_type.split(";", 1)[0].strip().lower()
+    stripped = head.lstrip(b"\xef\xbb\xbf \t\r\n")
+    if head.startswith(b"%PDF-"):
+        return "pdf"
+    if head.startswith(_BINARY_MAGIC) or mime.startswith(("image/", "audio/", "video/")):
+        return "binary"
+    if stripped[:1] == b"<" or mime in ("text/html", "application/xhtml+xml"):
+        return "html"
+    if mime.startswith("text/") or mime in ("application/json", "application/xml"):
+        return "text"
+    if mime in ("", "application/octet-stream") and b"\x00" not in head:
+        return "text"
+    return "binary"
+
+
+_TRANSCRIPT_ERRORS = {
+    STATUS_DISABLED: "Error: Transcripts are disabled for this video. The video owner has disabled captions.",
+    STATUS_NOT_FOUND: "Error: No transcript found. This video may not have captions available.",
+}
+
 
 class YouTubeExtractor:
     """
@@ -53,6 +182,10 @@ class YouTubeExtractor:
         """
         Get transcript from YouTube video.
 
+        Transcripts, and "no transcript" results, are cached per video and
+        language list (see transcript_cache.py), so only the first request
+        for a video calls YouTube.
+
         Args:
             video_id: YouTube video ID
             languages: Preferred languages for transcript
@@ -62,7 +195,13 @@ class YouTubeExtractor:
         """
         start_time = time.time()
 
+        cached = transcript_cache.get(video_id, languages)
+        if cached is not None and not cached.expired:
+            return YouTubeExtractor._cached_result(video_id, cached, start_time)
+
         if not YOUTUBE_API_AVAILABLE:
+            if cached is not None:
+                return YouTubeExtractor._cached_result(video_id, cached, start_time)
             return "Error: YouTube Transcript API not available. Please install: pip install youtube-transcript-api", {
                 "error": True,
                 "extraction_time": time.time() - start_time,
@@ -73,47 +212,22 @@ class YouTubeExtractor:
             transcript_list = YouTubeTranscriptApi.get_transcript(
                 video_id, languages=languages
             )
-
-            if not transcript_list:
-                return "Error: No transcript found for this video", {
-                    "error": True,
-                    "extraction_time": time.time() - start_time,
-                }
-
-            # Combine transcript segments
-            full_text = " ".join([segment["text"] for segment in transcript_list])
-
-            # Calculate metadata
-            duration = (
-                transcript_list[-1]["start"] + transcript_list[-1]["duration"]
-                if transcript_list
-                else 0
-            )
-            extraction_time = time.time() - start_time
-
-            metadata = {
-                "video_id": video_id,
-                "duration_seconds": duration,
-                "segments_count": len(transcript_list),
-                "extraction_time": extraction_time,
-                "word_count": len(full_text.split()),
-                "has_timestamps": True,
-                "title": f"YouTube Video {video_id}",
-            }
-
-            return full_text, metadata
-
         except TranscriptsDisabled:
-            return "Error: Transcripts are disabled for this video. The video owner has disabled captions.", {
+            transcript_cache.put_negative(video_id, languages, STATUS_DISABLED)
+            return _TRANSCRIPT_ERRORS[STATUS_DISABLED], {
                 "error": True,
                 "extraction_time": time.time() - start_time,
             }
         except NoTranscriptFound:
-            return "Error: No transcript found. This video may not have captions available.", {
+            transcript_cache.put_negative(video_id, languages, STATUS_NOT_FOUND)
+            return _TRANSCRIPT_ERRORS[STATUS_NOT_FOUND], {
                 "error": True,
                 "extraction_time": time.time() - start_time,
             }
         except Exception as e:
+            # Transient failure - an expired copy beats no transcript
+            if cached is not None and cached.status == STATUS_OK:
+                return YouTubeExtractor._cached_result(video_id, cached, start_time)
             error_msg = str(e)
             if "no element found" in error_msg.lower():
                 return "Error: Unable to parse YouTube response. The video may be unavailable or private.", {
@@ -125,6 +239,45 @@ class YouTubeExtractor:
                 "extraction_time": time.time() - start_time,
             }
 
+        if not transcript_list:
+            return "Error: No transcript found for this video", {
+                "error": True,
+                "extraction_time": time.time() - start_time,
+            }
+
+        transcript = Transcript.from_segments(transcript_list)
+        transcript_cache.put(video_id, languages, transcript)
+        return YouTubeExtractor._transcript_result(video_id, transcript, start_time, cached=False)
+
+    @staticmethod
+    def _transcript_result(video_id: str, transcript: Transcript, start_time: float, cached: bool) -> Tuple[str, Dict]:
+        """Build the (text, metadata) pair for a transcript."""
+        full_text = transcript.text
+        metadata = {
+            "video_id": video_id,
+            "duration_seconds": transcript.duration,
+            "segments_count": len(transcript),
+            "extraction_time": time.time() - start_time,
+            "word_count": len(full_text.split()),
+            "has_timestamps": True,
+            "title": f"YouTube Video {video_id}",
+            "cached": cached,
+            "transcript": transcript,  # Timed segments, for the retrieval index
+        }
+        return full_text, metadata
+
+    @staticmethod
+    def _cached_result(video_id: str, cached: CachedTranscript, start_time: float) -> Tuple[str, Dict]:
+        if cached.status != STATUS_OK:
+            return _TRANSCRIPT_ERRORS[cached.status], {
+                "error": True,
+                "cached": True,
+                "extraction_time": time.time() - start_time,
+            }
+        text, metadata = YouTubeExtractor._transcript_result(video_id, cached.transcript, start_time, cached=True)
+        metadata["stale"] = cached.expired
+        return text, metadata
+
     @staticmethod
     def extract_from_url(url: str) -> Tuple[str, Dict]:
         """
@@ -162,10 +315,10 @@ class YouTubeExtractor:
 Duration: {metadata.get('duration_seconds', 0) / 60:.1f} minutes
 Word Count: {metadata.get('word_count', 0)} words
 
-Transcript:
-{transcript[:5000]}{'...' if len(transcript) > 5000 else ''}
+Transcript (opening):
+{_overview(transcript)}
 
-Note: This is educational content from a video. The student may have questions about concepts explained in this video.
+Note: This is educational content from a video. The student may have questions about concepts explained in this video.{_RETRIEVAL_NOTE if len(transcript) > RETRIEVAL_OVERVIEW_CHARS else ''}
 """
         return formatted
 
@@ -176,11 +329,230 @@ class URLExtractor:
     Optimized for educational websites, documentation, and articles.
     """
 
+    HEADERS = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.5",
+        "Accept-Encoding": "gzip, deflate",
+    }
+
+    # Page chrome dropped from the extracted text
+    BOILERPLATE_TAGS = ("script", "style", "nav", "footer", "header", "aside", "iframe", "noscript")
+    MAIN_CLASS = re.compile('content|main|article', re.I)
+
+    @staticmethod
+    def parse_html(html: bytes, encoding: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Clean a page down to its readable text.
+
+        Uses the streaming lxml parser when available, BeautifulSoup otherwise.
+
+        Args:
+            html: Raw page bytes
+            encoding: Charset from the Content-Type header, if any
+
+        Returns:
+            Tuple of (content, title)
+        """
+        if LXML_AVAILABLE:
+            parsed = URLExtractor._parse_html_lxml(html, encoding)
+            if parsed is not None:
+                return parsed
+        return URLExtractor._parse_html_soup(html)
+
+    @staticmethod
+    def _parse_html_lxml(html: bytes, encoding: Optional[str] = None,
+                         max_bytes: int = HTML_MAX_PARSE_BYTES) -> Optional[Tuple[str, str]]:
+        """
+        Streaming lxml extraction.
+
+        The page is fed to an incremental parser in 64KB pieces and every
+        boilerplate element is emptied as soon as it has been parsed, so
+        scripts, menus and footers never accumulate in the tree. Only the
+        first max_bytes of the page are parsed, which bounds the work on
+        multi-megabyte pages (the main content comes first in practice).
+
+        Returns:
+            Tuple of (content, title), or None if lxml could not build a tree
+        """
+        parser = etree.HTMLPullParser(
+            events=("end",), tag=URLExtractor.BOILERPLATE_TAGS,
+            encoding=encoding, remove_comments=True, remove_pis=True,
+        )
+        view = memoryview(html)[:max_bytes]
+        try:
+            for offset in range(0, len(view), 65536):
+                parser.feed(bytes(view[offset:offset + 65536]))
+                for _, element in parser.read_events():
+                    element.clear(keep_tail=True)
+            root = parser.close()
+            for _, element in parser.read_events():
+                element.clear(keep_tail=True)
+        except etree.LxmlError:
+            return None
+        if root is None:
+            return None
+
+        # Same main-content preference as the BeautifulSoup path
+        main_content = next(root.iter("main"), None)
+        if main_content is None:
+            main_content = next(root.iter("article"), None)
+        if main_content is None:
+            main_content = next(
+                (div for div in root.iter("div")
+                 if any(URLExtractor.MAIN_CLASS.search(name) for name in (div.get("class") or "").split())),
+                None,
+            )
+
+        lines = [
+            line.strip()
+            for piece in (main_content if main_content is not None else root).itertext()
+            for line in piece.splitlines()
+            if line.strip()
+        ]
+        content = "\n".join(lines)
+
+        title = "Unknown"
+        title_element = next(root.iter("title"), None)
+        if title_element is not None and (title_element.text or "").strip():
+            title = title_element.text.strip()
+        else:
+            heading = next(root.iter("h1"), None)
+            if heading is not None:
+                title = "".join(heading.itertext()).strip()
+
+        return content, title
+
+    @staticmethod
+    def _parse_html_soup(html: bytes) -> Tuple[str, str]:
+        """BeautifulSoup extraction (fallback when lxml is unavailable)."""
+        # Try multiple parsers in order of preference
+        parsers = ['lxml', 'html.parser', 'html5lib']
+        soup = None
+
+        for parser in parsers:
+            try:
+                soup = BeautifulSoup(html, parser)
+                break
+            except Exception:
+                continue
+
+        if soup is None:
+            soup = BeautifulSoup(html, "html.parser")
+
+        # Remove unwanted elements
+        for element in soup(list(URLExtractor.BOILERPLATE_TAGS)):
+            element.decompose()
+
+        # Try to find main content
+        main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=URLExtractor.MAIN_CLASS)
+
+        if main_content:
+            text = main_content.get_text(separator="\n", strip=True)
+        else:
+            text = soup.get_text(separator="\n", strip=True)
+
+        # Clean up whitespace
+        lines = [line.strip() for line in text.splitlines() if line.strip()]
+        content = "\n".join(lines)
+
+        # Get title
+        title = "Unknown"
+        if soup.title and soup.title.string:
+            title = soup.title.string.strip()
+        elif soup.find('h1'):
+            title = soup.find('h1').get_text(strip=True)
+
+        return content, title
+
+    @staticmethod
+    def _page_result(url: str, page: CachedPage, start_time: float, **flags) -> Tuple[str, Dict]:
+        """Build the (content, metadata) pair for a cached page."""
+        metadata = {
+            "url": url,
+            "title": page.title,
+            "extraction_time": time.time() - start_time,
+            "word_count": len(page.content.split()),
+            "success": True,
+            "method": "page-cache",
+            "cached": True,
+        }
+        metadata.update(flags)
+        return page.content, metadata
+
+    @staticmethod
+    def _download(response: requests.Response) -> Tuple[str, bytes, bool]:
+        """
+        Read a streamed response up to the byte cap for its kind.
+
+        Pages are read up to HTML_MAX_PARSE_BYTES (nothing beyond is parsed
+        anyway) and cut there; PDFs up to WEB_MAX_PDF_BYTES, and a larger
+        PDF is refused, since a truncated PDF can't be parsed. Binary
+        files are refused after the first chunk.
+
+        Returns:
+            Tuple of (kind, decoded body, truncated)
+        """
+        chunks = _iter_body(response)
+        head = next(chunks, b"")
+        kind = sniff_content_kind(response.headers.get("Content-Type", ""), head)
+        if kind == "binary":
+            raise ValueError(f"Unsupported content type: {response.headers.get('Content-Type', 'unknown')}")
+
+        limit = WEB_MAX_PDF_BYTES if kind == "pdf" else HTML_MAX_PARSE_BYTES
+        too_large = f"PDF is larger than {WEB_MAX_PDF_BYTES // (1024 * 1024)}MB"
+        declared = response.headers.get("Content-Length", "")
+        if kind == "pdf" and declared.isdigit() and int(declared) > limit and not response.headers.get("Content-Encoding"):
+            raise ValueError(too_large)
+
+        body = bytearray(head)
+        for chunk in chunks:
+            body += chunk
+            if len(body) > limit:
+                break
+        if len(body) <= limit:
+            return kind, bytes(body), False
+        if kind == "pdf":
+            raise ValueError(too_large)
+        return kind, bytes(body[:limit]), True
+
+    @staticmethod
+    def _extract_body(url: str, kind: str, body: bytes, charset: Optional[str]) -> Tuple[str, str, str]:
+        """
+        Turn a downloaded body into text according to its kind.
+
+        Returns:
+            Tuple of (content, title, method)
+        """
+        if kind == "pdf":
+            from utils import extract_text_from_pdf
+
+            content = extract_text_from_pdf(io.BytesIO(body))
+            if content.startswith("Error extracting PDF text"):
+                raise ValueError(content.replace("Error extracting", "Could not extract", 1))
+            title = unquote(os.path.basename(urlparse(url).path)) or "PDF document"
+            return content, title, "requests+pdf"
+        if kind == "text":
+            text = body.decode(charset or "utf-8", errors="replace")
+            content = "\n".join(line.strip() for line in text.splitlines() if line.strip())
+            title = unquote(os.path.basename(urlparse(url).path)) or "Text document"
+            return content, title, "requests+text"
+        content, title = URLExtractor.parse_html(body, charset)
+        return content, title, "requests+lxml" if LXML_AVAILABLE else "requests+beautifulsoup"
+
     @staticmethod
     def extract_with_requests(url: str) -> Tuple[str, Dict]:
         """
         Extract content using requests + BeautifulSoup with multiple parsers.
 
+        The cleaned text is cached per URL (see page_cache.py): a fresh entry
+        is returned without any network call, a stale one is revalidated with
+        If-None-Match / If-Modified-Since and reused on 304 Not Modified.
+
+        The body is streamed with a byte cap (see _download); PDFs behind a
+        link go to the PDF extractor, plain text is used as is, and other
+        binary files are refused without being read.
+
         Args:
             url: Web URL to extract
 
@@ -189,54 +561,26 @@ class URLExtractor:
         """
         start_time = time.time()
 
+        cached = page_cache.get(url)
+        if cached is not None and cached.is_fresh():
+            return URLExtractor._page_result(url, cached, start_time)
+
         try:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
-                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.5",
-                "Accept-Encoding": "gzip, deflate",
-                "Connection": "keep-alive",
-            }
-            
-            response = requests.get(url, headers=headers, timeout=15, allow_redirects=True)
-            response.raise_for_status()
-
-            # Try multiple parsers in order of preference
-            parsers = ['lxml', 'html.parser', 'html5lib']
-            soup = None
-            
-            for parser in parsers:
-                try:
-                    soup = BeautifulSoup(response.content, parser)
-                    break
-                except Exception:
-                    continue
-            
-            if soup is None:
-                soup = BeautifulSoup(response.content, "html.parser")
-
-            # Remove unwanted elements
-            for element in soup(["script", "style", "nav", "footer", "header", "aside", "iframe", "noscript"]):
-                element.decompose()
-
-            # Try to find main content
-            main_content = soup.find('main') or soup.find('article') or soup.find('div', class_=re.compile('content|main|article', re.I))
-            
-            if main_content:
-                text = main_content.get_text(separator="\n", strip=True)
-            else:
-                text = soup.get_text(separator="\n", strip=True)
-
-            # Clean up whitespace
-            lines = [line.strip() for line in text.splitlines() if line.strip()]
-            content = "\n".join(lines)
-
-            # Get title
-            title = "Unknown"
-            if soup.title and soup.title.string:
-                title = soup.title.string.strip()
-            elif soup.find('h1'):
-                title = soup.find('h1').get_text(strip=True)
+            headers = dict(URLExtractor.HEADERS)
+            if cached is not None:
+                headers.update(cached.conditional_headers())
+
+            with _http_session.get(url, headers=headers, timeout=15, allow_redirects=True, stream=True) as response:
+                if response.status_code == 304 and cached is not None:
+                    page = page_cache.refresh(cached, response.headers)
+                    return URLExtractor._page_result(url, page, start_time, revalidated=True)
+                response.raise_for_status()
+                kind, body, truncated = URLExtractor._download(response)
+                charset = response.encoding if "charset" in response.headers.get("Content-Type", "").lower() else None
+                response_headers = response.headers
+
+            content, title, method = URLExtractor._extract_body(url, kind, body, charset)
+            page_cache.put(url, content, title, response_headers)
 
             metadata = {
                 "url": url,
@@ -244,22 +588,41 @@ class URLExtractor:
                 "extraction_time": time.time() - start_time,
                 "word_count": len(content.split()),
                 "success": True,
-                "method": "requests+beautifulsoup",
+                "method": method,
+                "cached": False,
+                "content_kind": kind,
+                "download_bytes": len(body),
+                "truncated": truncated,
             }
 
             return content, metadata
 
         except requests.exceptions.Timeout:
+            if cached is not None:
+                return URLExtractor._page_result(url, cached, start_time, stale=True)
             return "Error: Request timed out. The website took too long to respond.", {
                 "error": True,
                 "extraction_time": time.time() - start_time,
             }
         except requests.exceptions.ConnectionError:
+            if cached is not None:
+                return URLExtractor._page_result(url, cached, start_time, stale=True)
             return "Error: Could not connect to the website. Check your internet connection.", {
                 "error": True,
                 "extraction_time": time.time() - start_time,
             }
+        except UnsupportedContentEncoding as e:
+            if cached is not None:
+                return URLExtractor._page_result(url, cached, start_time, stale=True)
+            message = (f"Error: The website sent the page compressed as '{e.encoding}', which can't be decoded "
+                       "(only gzip and deflate are supported).")
+            return message, {
+                "error": True,
+                "extraction_time": time.time() - start_time,
+            }
         except requests.exceptions.HTTPError as e:
+            if e.response.status_code >= 500 and cached is not None:
+                return URLExtractor._page_result(url, cached, start_time, stale=True)
             return f"Error: HTTP {e.response.status_code} - {e.response.reason}", {
                 "error": True,
                 "extraction_time": time.time() - start_time,
@@ -302,10 +665,10 @@ class URLExtractor:
 URL: {metadata.get('url', 'N/A')}
 Word Count: {metadata.get('word_count', 0)} words
 
-Content:
-{content[:8000]}{'...' if len(content) > 8000 else ''}
+Content (opening):
+{_overview(content)}
 
-Note: This is educational content from a website. The student may have questions about concepts from this article/page.
+Note: This is educational content from a website. The student may have questions about concepts from this article/page.{_RETRIEVAL_NOTE if len(content) > RETRIEVAL_OVERVIEW_CHARS else ''}
 """
         return formatted
 
@@ -348,7 +711,11 @@ def extract_content(
         content_type: Optional content type override
 
     Returns:
-        Tuple of (extracted_content, metadata, processing_method)
+        Tuple of (extracted_content, metadata, processing_method). For YouTube
+        and web sources extracted_content is a short overview, and
+        metadata["source_text"] holds the full text for the retrieval index
+        (see TutoringEngine.load_source), plus metadata["transcript"] with the
+        timed segments for YouTube.
     """
     # Auto-detect if not specified
     if content_type is None:
@@ -357,11 +724,15 @@ def extract_content(
     if content_type == "youtube":
         content, metadata = YouTubeExtractor.extract_from_url(input_text)
         formatted = YouTubeExtractor.format_for_tutoring(content, metadata)
+        if not metadata.get("error"):
+            metadata["source_text"] = content
         return formatted, metadata, "youtube_transcript"
 
     elif content_type == "url":
         content, metadata = URLExtractor.extract_from_url(input_text)
         formatted = URLExtractor.format_for_tutoring(content, metadata)
+        if not metadata.get("error"):
+            metadata["source_text"] = content
         return formatted, metadata, "web_crawl"
 
     else:
@@ -0,0 +1,178 @@
+"""
+Image preprocessing before vision model calls.
+
+Uploads and pasted screenshots used to be sent as full-resolution lossless
+PNG, which means multi-megabyte base64 payloads for gpt-4o-mini. This stage
+shrinks them to what the model actually looks at:
+
+1. Auto-orient from EXIF (phone photos of homework)
+2. Crop uniform margins around the content
+3. Downsample to the model's effective resolution (fit 2048x2048, short side 768)
+4. Convert to grayscale when the image has no meaningful colour
+5. Encode as PNG, JPEG and WebP and keep the smallest
+"""
+
+import base64
+import io
+import math
+import time
+from typing import Dict, Tuple
+
+from PIL import Image, ImageChops, ImageOps, ImageStat
+
+from config import (
+    VISION_GRAYSCALE_THRESHOLD,
+    VISION_JPEG_QUALITY,
+    VISION_MAX_LONG_SIDE,
+    VISION_MAX_SHORT_SIDE,
+)
+
+MIME_TYPES = {"PNG": "image/png", "JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+# Pixels within this distance of the background colour count as margin
+CROP_TOLERANCE = 12
+CROP_PADDING = 16
+
+
+def _flatten(image: Image.Image) -> Image.Image:
+    """Drop alpha/palette modes by compositing onto white."""
+    if image.mode in ("RGBA", "LA", "P"):
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        background.paste(image, mask=image.split()[-1])
+        return background
+    if image.mode not in ("RGB", "L"):
+        return image.convert("RGB")
+    return image
+
+
+def crop_whitespace(image: Image.Image) -> Image.Image:
+    """
+    Crop uniform margins, using the top-left pixel as the background colour.
+
+    Args:
+        image: RGB or L image
+
+    Returns:
+        Cropped image (unchanged if no margin was found)
+    """
+    background = Image.new(image.mode, image.size, image.getpixel((0, 0)))
+    diff = ImageChops.difference(image, background).convert("L")
+    diff = diff.point(lambda value: 255 if value > CROP_TOLERANCE else 0)
+    bbox = diff.getbbox()
+    if not bbox:
+        return image
+
+    left, top, right, bottom = bbox
+    bbox = (
+        max(0, left - CROP_PADDING),
+        max(0, top - CROP_PADDING),
+        min(image.width, right + CROP_PADDING),
+        min(image.height, bottom + CROP_PADDING),
+    )
+    if bbox == (0, 0, image.width, image.height):
+        return image
+    return image.crop(bbox)
+
+
+def fit_to_vision_resolution(image: Image.Image) -> Image.Image:
+    """
+    Downsample to the resolution the vision model actually uses.
+
+    OpenAI high-detail vision scales images to fit 2048x2048 and then to a
+    768px short side before tiling, so anything larger is wasted upload.
+    """
+    width, height = image.size
+    scale = min(
+        1.0,
+        VISION_MAX_LONG_SIDE / max(width, height),
+        VISION_MAX_SHORT_SIDE / min(width, height),
+    )
+    if scale >= 1.0:
+        return image
+    new_size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return image.resize(new_size, Image.LANCZOS)
+
+
+def is_effectively_grayscale(image: Image.Image) -> bool:
+    """True when the R, G and B channels are nearly identical."""
+    if image.mode == "L":
+        return True
+    r, g, b = image.split()
+    spread = ImageChops.lighter(ImageChops.difference(r, g), ImageChops.difference(g, b))
+    return ImageStat.Stat(spread).mean[0] < VISION_GRAYSCALE_THRESHOLD
+
+
+def estimate_vision_tokens(width: int, height: int) -> int:
+    """
+    Estimate high-detail vision input tokens (85 base + 170 per 512px tile)
+    after the model's own resizing.
+    """
+    scale = min(1.0, 2048 / max(width, height))
+    width, height = width * scale, height * scale
+    scale = min(1.0, 768 / min(width, height))
+    width, height = width * scale, height * scale
+    tiles = math.ceil(width / 512) * math.ceil(height / 512)
+    return 85 + 170 * tiles
+
+
+def _encode(image: Image.Image, fmt: str) -> bytes:
+    buffer = io.BytesIO()
+    if fmt == "PNG":
+        image.save(buffer, format="PNG", optimize=True)
+    elif fmt == "JPEG":
+        image.save(buffer, format="JPEG", quality=VISION_JPEG_QUALITY, optimize=True)
+    else:
+        image.save(buffer, format="WEBP", quality=VISION_JPEG_QUALITY, method=4)
+    return buffer.getvalue()
+
+
+def preprocess_image(image: Image.Image, measure_baseline: bool = False) -> Tuple[str, Dict]:
+    """
+    Prepare an image for the vision model.
+
+    Args:
+        image: PIL Image (upload or paste)
+        measure_baseline: Also encode the original as full-size PNG (the
+            previous behaviour) so the report can show bytes and time saved
+
+    Returns:
+        Tuple of (data_uri, report)
+    """
+    report = {"original_size": image.size}
+
+    if measure_baseline:
+        start_time = time.perf_counter()
+        buffer = io.BytesIO()
+        image.save(buffer, format="PNG")
+        baseline_uri = base64.b64encode(buffer.getvalue())
+        report["baseline_bytes"] = len(baseline_uri)
+        report["baseline_time"] = time.perf_counter() - start_time
+
+    start_time = time.perf_counter()
+
+    processed = _flatten(ImageOps.exif_transpose(image))
+    cropped = crop_whitespace(processed)
+    report["cropped"] = cropped.size != processed.size
+    processed = fit_to_vision_resolution(cropped)
+
+    report["grayscale"] = is_effectively_grayscale(processed)
+    if report["grayscale"] and processed.mode != "L":
+        processed = processed.convert("L")
+
+    candidates = {fmt: _encode(processed, fmt) for fmt in ("PNG", "JPEG", "WEBP")}
+    fmt, data = min(candidates.items(), key=lambda item: len(item[1]))
+    encoded = base64.b64encode(data).decode()
+
+    report.update({
+        "final_size": processed.size,
+        "format": fmt,
+        "final_bytes": len(encoded),
+        "preprocess_time": time.perf_counter() - start_time,
+        "estimated_tokens_before": estimate_vision_tokens(*image.size),
+        "estimated_tokens_after": estimate_vision_tokens(*processed.size),
+    })
+    if measure_baseline:
+        report["bytes_saved"] = report["baseline_bytes"] - report["final_bytes"]
+
+    return f"data:{MIME_TYPES[fmt]};base64,{encoded}", report
@@ -0,0 +1,296 @@
+"""
+Background job queue for Studio media rendering.
+
+gTTS synthesis, frame drawing and video encoding used to run inside the
+Streamlit dialog, pinning the script thread for 30-60 seconds. Renders are now
+submitted to a local queue backed by a bounded pool of worker processes shared
+by every session, so long renders never block the chat and concurrent users
+can't oversubscribe the CPU.
+
+Jobs support status and progress polling, cancellation and result retrieval:
+
+    job = get_render_queue().submit(render_video, script, problem_statement)
+    job.status()   # {"state": "running", "progress": 0.4, "message": "Encoding video"}
+    job.cancel()
+    job.result(timeout=60)
+
+Jobs wait in a parent-side queue and are handed to the pool only when a
+worker is free (ProcessPoolExecutor would otherwise pre-queue work items
+that can no longer be cancelled), so a queued job really is queued: it
+reports QUEUED and cancelling it drops it.
+
+Job functions report progress (and pick up cancellation requests) by calling
+report_progress(); outside a worker process it is a no-op, so the same
+functions still work when called inline.
+"""
+
+import itertools
+import multiprocessing
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Optional
+
+from config import JOB_HISTORY_LIMIT, STUDIO_RENDER_WORKERS
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+
+class JobCancelled(Exception):
+    """Raised inside a job when cancellation was requested."""
+
+
+# Set in worker processes while a job runs: (job_id, progress proxy, cancel proxy)
+_current_job = None
+
+
+def _run_job(job_id: str, progress, cancelled, func: Callable, args: tuple, kwargs: dict):
+    """Worker-side wrapper that exposes the job context to report_progress."""
+    global _current_job
+    _current_job = (job_id, progress, cancelled)
+    try:
+        check_cancelled()
+        return func(*args, **kwargs)
+    finally:
+        _current_job = None
+
+
+def check_cancelled():
+    """Raise JobCancelled if the running job has been cancelled."""
+    if _current_job is None:
+        return
+    job_id, _, cancelled = _current_job
+    if cancelled.get(job_id):
+        raise JobCancelled(f"Job {job_id} was cancelled")
+
+
+def report_progress(fraction: float, message: str = ""):
+    """
+    Report progress from inside a job and act as a cancellation checkpoint.
+
+    Args:
+        fraction: Completion between 0 and 1
+        message: Short description of the current stage
+    """
+    if _current_job is None:
+        return
+    job_id, progress, _ = _current_job
+    progress[job_id] = (fraction, message)
+    check_cancelled()
+
+
+class Job:
+    """Handle for a submitted job."""
+
+    def __init__(self, job_id: str, future: Future, queue: "JobQueue"):
+        self.id = job_id
+        self.future = future
+        self._queue = queue
+
+    @property
+    def state(self) -> str:
+        if self.future.cancelled():
+            return CANCELLED
+        if self.future.done():
+            error = self.future.exception()
+            if error is None:
+                return DONE
+            return CANCELLED if isinstance(error, JobCancelled) else FAILED
+        return RUNNING if self.future.running() else QUEUED
+
+    def status(self) -> Dict:
+        """
+        Current job status.
+
+        Returns:
+            Dict with state, progress (0-1), message and error (if failed)
+        """
+        state = self.state
+        if state == DONE:
+            return {"state": state, "progress": 1.0, "message": "Done", "error": None}
+        if state in (FAILED, CANCELLED):
+            error = None if self.future.cancelled() else str(self.future.exception())
+            return {"state": state, "progress": 0.0, "message": state.capitalize(), "error": error}
+
+        fraction, message = self._queue._read_progress(self.id)
+        return {"state": state, "progress": fraction, "message": message, "error": None}
+
+    def done(self) -> bool:
+        return self.future.done()
+
+    def result(self, timeout: Optional[float] = None):
+        """Wait for and return the job's result (re-raises its exception)."""
+        return self.future.result(timeout)
+
+    def cancel(self) -> bool:
+        """
+        Cancel the job. Queued jobs are dropped immediately (they were never
+        handed to a worker); running jobs stop at their next
+        report_progress() checkpoint.
+
+        Returns:
+            False if the job had already finished
+        """
+        if self.future.done():
+            return False
+        if self.future.cancel():
+            return True
+        self._queue._request_cancel(self.id)
+        return True
+
+    def add_done_callback(self, fn: Callable[["Job"], None]):
+        """Call fn(job) in the parent process once the job finishes."""
+        self.future.add_done_callback(lambda _: fn(self))
+
+
+class JobQueue:
+    """
+    Process-pool job queue. Worker processes and the progress manager are
+    started lazily on the first submit.
+    """
+
+    def __init__(self, max_workers: int = STUDIO_RENDER_WORKERS, history_limit: int = JOB_HISTORY_LIMIT):
+        self.max_workers = max_workers
+        self.history_limit = history_limit
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._manager = None
+        self._progress = None
+        self._cancelled = None
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._pending = deque()  # (job, func, args, kwargs) not yet handed to a worker
+        self._dispatched = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def _start(self):
+        # spawn, not fork: the Streamlit server is multi-threaded
+        context = multiprocessing.get_context("spawn")
+        self._manager = context.Manager()
+        self._progress = self._manager.dict()
+        self._cancelled = self._manager.dict()
+        self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=context)
+
+    def submit(self, func: Callable, *args, **kwargs) -> Job:
+        """
+        Queue func(*args, **kwargs) to run in a worker process.
+
+        func must be importable (module-level) so it can be pickled.
+
+        Returns:
+            Job handle
+        """
+        with self._lock:
+            if self._executor is None:
+                self._start()
+
+            job_id = f"job-{next(self._ids)}"
+            job = Job(job_id, Future(), self)
+            self._jobs[job_id] = job
+            self._pending.append((job, func, args, kwargs))
+            self._trim_history()
+            self._dispatch()
+
+        job.add_done_callback(self._forget_progress)
+        return job
+
+    def _dispatch(self):
+        """Hand pending jobs to the pool while workers are free (caller holds the lock)."""
+        while self._pending and self._dispatched < self.max_workers:
+            job, func, args, kwargs = self._pending.popleft()
+            if not job.future.set_running_or_notify_cancel():
+                continue  # Cancelled while queued
+            worker_future = self._executor.submit(
+                _run_job, job.id, self._progress, self._cancelled, func, args, kwargs
+            )
+            self._dispatched += 1
+            worker_future.add_done_callback(lambda done, job=job: self._on_worker_done(job, done))
+
+    def _on_worker_done(self, job: Job, worker_future: Future):
+        """Pass a worker's outcome to the job's future and start the next job."""
+        with self._lock:
+            self._dispatched -= 1
+            if self._executor is not None:
+                self._dispatch()
+        if worker_future.cancelled():
+            job.future.set_exception(JobCancelled(f"Job {job.id} was cancelled"))
+        elif worker_future.exception() is not None:
+            job.future.set_exception(worker_future.exception())
+        else:
+            job.future.set_result(worker_future.result())
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id: str) -> Optional[Dict]:
+        job = self.get(job_id)
+        return job.status() if job else None
+
+    def cancel(self, job_id: str) -> bool:
+        job = self.get(job_id)
+        return job.cancel() if job else False
+
+    def result(self, job_id: str, timeout: Optional[float] = None):
+        job = self.get(job_id)
+        if job is None:
+            raise KeyError(job_id)
+        return job.result(timeout)
+
+    def _read_progress(self, job_id: str):
+        try:
+            return self._progress.get(job_id, (0.0, ""))
+        except Exception:
+            return 0.0, ""
+
+    def _request_cancel(self, job_id: str):
+        self._cancelled[job_id] = True
+
+    def _forget_progress(self, job: Job):
+        try:
+            self._progress.pop(job.id, None)
+            self._cancelled.pop(job.id, None)
+        except Exception:
+            pass  # Manager already shut down (interpreter exit)
+
+    def _trim_history(self):
+        """Drop the oldest finished jobs beyond the history limit."""
+        excess = len(self._jobs) - self.history_limit
+        for job_id in list(self._jobs):
+            if excess <= 0:
+                break
+            if self._jobs[job_id].done():
+                del self._jobs[job_id]
+                excess -= 1
+
+    def shutdown(self, cancel_pending: bool = True):
+        """Stop the workers; queued jobs are cancelled, or run first if cancel_pending is False."""
+        with self._lock:
+            queued = [job for job, *_ in self._pending]
+        if cancel_pending:
+            for job in queued:
+                job.future.cancel()
+        else:
+            wait([job.future for job in queued])
+        with self._lock:
+            executor, self._executor = self._executor, None
+            self._pending.clear()
+        if executor is not None:
+            executor.shutdown(wait=True)
+            self._manager.shutdown()
+
+
+_render_queue: Optional[JobQueue] = None
+_render_queue_lock = threading.Lock()
+
+
+def get_render_queue() -> JobQueue:
+    """Process-wide render queue shared by every session."""
+    global _render_queue
+    with _render_queue_lock:
+        if _render_queue is None:
+            _render_queue = JobQueue()
+        return _render_queue
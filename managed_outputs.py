@@ -0,0 +1,179 @@
+"""
+Managed directory for persisted Studio outputs (studio_outputs/).
+
+studio_features used to write timestamped MP3/MP4/PNG/PDF files there forever,
+intermediates included, and second-resolution timestamps could collide when
+two students rendered at the same moment. Persisted outputs (see
+STUDIO_PERSIST_OUTPUTS) now go through ManagedOutputDir:
+
+- files are named by content hash (<kind>_<sha256 prefix>.<ext>), so
+  identical renders are stored once and names never collide
+- writes go to a unique temp file in the same directory and are renamed into
+  place atomically, so concurrent writers never see partial files
+- a background GC thread enforces an age quota and a total size quota,
+  removing the least recently used files first
+
+GC only touches files it wrote itself: content-hash names and stale temp
+files. Anything else in the directory - the timestamped outputs of older
+versions, the sample files checked into the repository - is left alone.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+
+from config import (
+    STUDIO_OUTPUT_DIR,
+    STUDIO_OUTPUT_GC_INTERVAL_SECONDS,
+    STUDIO_OUTPUT_MAX_AGE_SECONDS,
+    STUDIO_OUTPUT_MAX_BYTES,
+)
+from media_output import MediaOutput
+
+TEMP_PREFIX = ".tmp_"
+STALE_TEMP_SECONDS = 3600
+
+_MANAGED_NAME = re.compile(r"^[a-z0-9_]+_[0-9a-f]{16}\.[a-z0-9]+$")
+
+
+def content_digest(data: Union[bytes, MediaOutput]) -> str:
+    """SHA-256 hex digest of raw bytes or a MediaOutput's contents."""
+    view = data._view() if isinstance(data, MediaOutput) else data
+    return hashlib.sha256(view).hexdigest()
+
+
+class ManagedOutputDir:
+    """Content-addressed output directory with age/size quotas and background GC."""
+
+    def __init__(
+        self,
+        root: Union[str, Path] = STUDIO_OUTPUT_DIR,
+        max_bytes: int = STUDIO_OUTPUT_MAX_BYTES,
+        max_age_seconds: float = STUDIO_OUTPUT_MAX_AGE_SECONDS,
+        gc_interval_seconds: float = STUDIO_OUTPUT_GC_INTERVAL_SECONDS,
+    ):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.max_age_seconds = max_age_seconds
+        self.gc_interval_seconds = gc_interval_seconds
+        self._gc_thread: Optional[threading.Thread] = None
+        self._gc_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def store(self, data: Union[bytes, MediaOutput], kind: str, extension: str) -> Path:
+        """
+        Persist data under a content-hash name (no-op if already stored).
+
+        Args:
+            data: Raw bytes or a MediaOutput
+            kind: Name prefix, e.g. "audio_overview"
+            extension: File extension without the dot, e.g. "mp3"
+
+        Returns:
+            Path of the stored file
+        """
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.start_background_gc()
+
+        target = self.root / f"{kind}_{content_digest(data)[:16]}.{extension}"
+        if target.exists():
+            os.utime(target)  # Refresh for the LRU size quota
+            return target
+
+        handle, temp_path = tempfile.mkstemp(dir=self.root, prefix=TEMP_PREFIX)
+        try:
+            with os.fdopen(handle, "wb") as out:
+                out.write(data._view() if isinstance(data, MediaOutput) else data)
+            os.replace(temp_path, target)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+        return target
+
+    def _owned_files(self) -> List[os.DirEntry]:
+        try:
+            entries = list(os.scandir(self.root))
+        except FileNotFoundError:
+            return []
+        return [
+            entry for entry in entries
+            if entry.is_file() and (
+                _MANAGED_NAME.match(entry.name)
+                or entry.name.startswith(TEMP_PREFIX)
+            )
+        ]
+
+    def collect_garbage(self, now: Optional[float] = None) -> Dict:
+        """
+        Delete expired files, then the least recently used ones until the
+        directory is within its size quota.
+
+        Returns:
+            Dict with removed count, freed_bytes and remaining_bytes
+        """
+        now = now or time.time()
+        removed, freed = 0, 0
+
+        with self._gc_lock:
+            files = []
+            for entry in self._owned_files():
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                age = now - stat.st_mtime
+                is_temp = entry.name.startswith(TEMP_PREFIX)
+                if (is_temp and age > STALE_TEMP_SECONDS) or (not is_temp and age > self.max_age_seconds):
+                    if self._remove(entry.path):
+                        removed, freed = removed + 1, freed + stat.st_size
+                elif not is_temp:
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+
+            total = sum(size for _, size, _ in files)
+            for _, size, path in sorted(files):
+                if total <= self.max_bytes:
+                    break
+                if self._remove(path):
+                    removed, freed, total = removed + 1, freed + size, total - size
+
+        return {"removed": removed, "freed_bytes": freed, "remaining_bytes": total}
+
+    @staticmethod
+    def _remove(path: str) -> bool:
+        try:
+            os.unlink(path)
+            return True
+        except OSError:
+            return False
+
+    def start_background_gc(self):
+        """Start the periodic GC daemon thread (idempotent)."""
+        with self._gc_lock:
+            if self._gc_thread is not None and self._gc_thread.is_alive():
+                return
+            self._stop.clear()
+            self._gc_thread = threading.Thread(target=self._gc_loop, name="studio-output-gc", daemon=True)
+            self._gc_thread.start()
+
+    def stop_background_gc(self):
+        self._stop.set()
+
+    def _gc_loop(self):
+        while not self._stop.is_set():
+            try:
+                self.collect_garbage()
+            except Exception as e:
+                print(f"Studio output GC error: {e}")
+            self._stop.wait(self.gc_interval_seconds)
+
+
+# Global instance
+studio_outputs = ManagedOutputDir()
@@ -0,0 +1,133 @@
+"""
+In-memory / memory-mapped outputs for rendered Studio media.
+
+Renderers used to write every MP3, MP4 and PDF into studio_outputs/ and then
+immediately read the file back into memory for st.audio, st.video and
+st.download_button. They now return a MediaOutput instead:
+
+- small outputs (MP3s, PDFs) are rendered straight into an in-memory buffer
+- outputs of MEDIA_MMAP_THRESHOLD bytes or more (long videos) stay in a temp
+  file that is memory-mapped on demand, so they live in the OS page cache
+  rather than the Python heap; the file is deleted when the output is
+  garbage-collected (e.g. evicted from the artifact store)
+
+Nothing is written to studio_outputs/ unless STUDIO_PERSIST_OUTPUTS is set.
+Retained media is capped by the artifact store's byte budget, which counts
+file-backed outputs too.
+
+A file-backed output pickles as its path, and pickling hands over ownership of
+the temp file. This is how render job results cross the process boundary
+(job_queue.py) without copying the video through the result pipe.
+"""
+
+import mmap
+import os
+import tempfile
+import weakref
+from pathlib import Path
+from typing import Optional, Union
+
+from config import MEDIA_MMAP_THRESHOLD
+
+PathLike = Union[str, Path]
+
+
+def _release(mapped: list, path: Optional[str]):
+    """Finalizer: close the mapping and delete the owned temp file."""
+    if mapped and mapped[0] is not None:
+        mapped[0].close()
+    if path:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class MediaOutput:
+    """Rendered media held in memory or in an owned, memory-mapped temp file."""
+
+    def __init__(self, file_name: str, mime: str, data: Optional[bytes] = None, path: Optional[PathLike] = None):
+        if (data is None) == (path is None):
+            raise ValueError("MediaOutput needs exactly one of data or path")
+        self.file_name = file_name
+        self.mime = mime
+        self._data = data
+        self.path = str(path) if path is not None else None
+        self._size = len(data) if data is not None else os.path.getsize(self.path)
+        self._mapped = [None]
+        self._finalizer = weakref.finalize(self, _release, self._mapped, self.path) if self.path else None
+
+    @classmethod
+    def from_bytes(cls, data: bytes, file_name: str, mime: str) -> "MediaOutput":
+        """Wrap bytes rendered in memory."""
+        return cls(file_name, mime, data=bytes(data))
+
+    @classmethod
+    def from_file(cls, path: PathLike, file_name: str, mime: str,
+                  mmap_threshold: int = MEDIA_MMAP_THRESHOLD) -> "MediaOutput":
+        """
+        Take ownership of a rendered temp file. Files below the threshold are
+        read into memory and deleted; larger ones stay on disk, memory-mapped.
+        """
+        if os.path.getsize(path) >= mmap_threshold:
+            return cls(file_name, mime, path=path)
+        with open(path, "rb") as media_file:
+            data = media_file.read()
+        os.unlink(path)
+        return cls(file_name, mime, data=data)
+
+    @property
+    def is_file_backed(self) -> bool:
+        return self.path is not None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _view(self):
+        if self._data is not None:
+            return self._data
+        if self._mapped[0] is None:
+            if self._size == 0:
+                return b""
+            with open(self.path, "rb") as media_file:
+                self._mapped[0] = mmap.mmap(media_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._mapped[0]
+
+    def getvalue(self) -> bytes:
+        """The media as bytes (what st.audio / st.video / st.download_button take)."""
+        view = self._view()
+        return view if isinstance(view, bytes) else view[:]
+
+    def head(self, size: int) -> bytes:
+        """First `size` bytes, without copying the rest (format sniffing, tests)."""
+        return self._view()[:size]
+
+    def save(self, directory: PathLike, file_name: Optional[str] = None) -> Path:
+        """Persist a copy to disk. Returns the written path."""
+        target = Path(directory) / (file_name or self.file_name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with open(target, "wb") as out:
+            out.write(self._view())
+        return target
+
+    def __getstate__(self):
+        state = {"file_name": self.file_name, "mime": self.mime, "data": self._data, "path": self.path}
+        if self._finalizer is not None:
+            # The unpickled copy now owns the temp file
+            self._finalizer.detach()
+            self._finalizer = None
+        return state
+
+    def __setstate__(self, state):
+        self.__init__(state["file_name"], state["mime"], data=state["data"], path=state["path"])
+
+    def __repr__(self) -> str:
+        where = "mmap" if self.is_file_backed else "memory"
+        return f"MediaOutput({self.file_name!r}, {self._size} bytes, {where})"
+
+
+def new_temp_path(suffix: str) -> Path:
+    """Reserve a unique temp file path for a renderer to write into."""
+    handle, path = tempfile.mkstemp(prefix="studio_", suffix=suffix)
+    os.close(handle)
+    return Path(path)
@@ -1,8 +1,186 @@
+"""
+OpenRouter API client, shared by every Streamlit session in the process.
+
+Use get_client() rather than constructing OpenRouterClient directly: it keeps
+one client per API key, so all sessions (tutoring_engine, studio_features,
+the FastAPI service) share:
+
+- a requests.Session with a keep-alive connection pool (no TLS handshake per call)
+- a concurrency limit on in-flight requests
+- rate-limit state: a 429 makes every caller wait out the same Retry-After
+  window, and the request is retried up to OPENROUTER_MAX_RETRIES times
+- a TTL cache of identical non-streaming responses, for temperature-0
+  requests (or callers that opt in) - sampled replies are meant to vary
+- request/token/latency metrics (get_metrics())
+
+All shared state is guarded by locks. The requests.Session is never mutated
+after construction; its urllib3 connection pool is thread-safe.
+"""
+
+import copy
+import hashlib
 import json
+import threading
 import time
+from collections import OrderedDict
 from typing import List, Dict, Optional, Generator
 import requests
-from config import OPENROUTER_API_KEY, OPENROUTER_BASE_URL, ENABLE_STREAMING, ENABLE_CACHING
+from requests.adapters import HTTPAdapter
+from config import (
+    OPENROUTER_API_KEY,
+    OPENROUTER_BASE_URL,
+    OPENROUTER_MAX_CONCURRENT,
+    OPENROUTER_MAX_RETRIES,
+    OPENROUTER_POOL_SIZE,
+    OPENROUTER_RESPONSE_CACHE_MAX_ENTRIES,
+    OPENROUTER_RESPONSE_CACHE_TTL_SECONDS,
+    OPENROUTER_RETRY_BACKOFF_SECONDS,
+    ENABLE_STREAMING,
+    ENABLE_CACHING,
+)
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given in seconds (None if absent/unparseable)."""
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+class RateLimitState:
+    """
+    Rate-limit state shared by all callers of one client. After a 429, every
+    request waits until the Retry-After window has passed (or an exponential
+    back-off, if the response gave none) instead of hitting the API again.
+    """
+
+    def __init__(self, backoff_seconds: float = OPENROUTER_RETRY_BACKOFF_SECONDS):
+        self.backoff_seconds = backoff_seconds
+        self.remaining: Optional[int] = None
+        self._blocked_until = 0.0
+        self._consecutive = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until no rate-limit window is active."""
+        while True:
+            with self._lock:
+                delay = self._blocked_until - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    def record(self, response: requests.Response) -> bool:
+        """
+        Update the state from a response.
+
+        Returns:
+            True if the response was a 429 (rate limited)
+        """
+        remaining = response.headers.get("X-RateLimit-Remaining")
+        with self._lock:
+            if remaining is not None and remaining.isdigit():
+                self.remaining = int(remaining)
+            if response.status_code != 429:
+                self._consecutive = 0
+                return False
+
+            self._consecutive += 1
+            delay = _retry_after_seconds(response.headers.get("Retry-After"))
+            if delay is None:
+                delay = self.backoff_seconds * 2 ** (self._consecutive - 1)
+            self._blocked_until = max(self._blocked_until, time.monotonic() + delay)
+            return True
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "blocked_for_seconds": max(0.0, self._blocked_until - time.monotonic()),
+                "remaining": self.remaining,
+            }
+
+
+class ResponseCache:
+    """Bounded LRU of non-streaming responses keyed by a hash of the request payload."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = OPENROUTER_RESPONSE_CACHE_TTL_SECONDS,
+        max_entries: int = OPENROUTER_RESPONSE_CACHE_MAX_ENTRIES,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl_seconds > 0 and self.max_entries > 0
+
+    @staticmethod
+    def make_key(payload: Dict) -> str:
+        return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, response = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return copy.deepcopy(response)
+
+    def put(self, key: str, response: Dict):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, copy.deepcopy(response))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+class ClientMetrics:
+    """Thread-safe counters aggregated across all sessions using a client."""
+
+    FIELDS = (
+        "requests", "errors", "rate_limited", "retries", "cache_hits", "cache_misses",
+        "prompt_tokens", "completion_tokens", "in_flight",
+    )
+
+    def __init__(self):
+        self._counters = dict.fromkeys(self.FIELDS, 0)
+        self._counters["total_latency_seconds"] = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, **increments):
+        with self._lock:
+            for name, value in increments.items():
+                self._counters[name] += value
+
+    def record_usage(self, usage: Optional[Dict]):
+        if usage:
+            self.add(
+                prompt_tokens=usage.get("prompt_tokens") or 0,
+                completion_tokens=usage.get("completion_tokens") or 0,
+            )
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counters = dict(self._counters)
+        completed = counters["requests"] - counters["in_flight"]
+        counters["avg_latency_seconds"] = counters["total_latency_seconds"] / completed if completed else 0.0
+        return counters
 
 
 class OpenRouterClient:
@@ -21,6 +199,16 @@ class OpenRouterClient:
             "X-Title": "Aristotle AI Tutor",  # Optional, shows in rankings
         }
 
+        # Shared by every session using this client (see get_client)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=OPENROUTER_POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.rate_limit = RateLimitState()
+        self.response_cache = ResponseCache()
+        self.metrics = ClientMetrics()
+        self._slots = threading.BoundedSemaphore(OPENROUTER_MAX_CONCURRENT)
+
     def chat_completion(
         self,
         model: str,
@@ -28,6 +216,7 @@ class OpenRouterClient:
         stream: bool = ENABLE_STREAMING,
         temperature: float = 0.7,
         max_tokens: Optional[int] = None,
+        cache: Optional[bool] = None,
     ) -> Dict | Generator:
         """
         Make a chat completion request to OpenRouter.
@@ -38,9 +227,12 @@ class OpenRouterClient:
             stream: Whether to stream the response
             temperature: Sampling temperature
             max_tokens: Maximum tokens to generate
+            cache: Serve identical non-streaming requests from the response
+                cache. Defaults to caching only temperature-0 requests.
 
         Returns:
-            Response dictionary or generator for streaming
+            Response dictionary or generator for streaming. Close a generator
+            you stop reading early, so its concurrency slot is released.
         """
         payload = {
             "model": model,
@@ -57,55 +249,99 @@ class OpenRouterClient:
 
         if stream:
             return self._stream_completion(payload)
-        else:
-            return self._sync_completion(payload)
-
-    def _sync_completion(self, payload: Dict) -> Dict:
-        """Synchronous completion request."""
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=self.headers,
-            json=payload,
-            timeout=120,
-        )
+        if cache is None:
+            cache = temperature == 0
+        return self._sync_completion(payload, cache)
+
+    def _post(self, payload: Dict, stream: bool = False) -> requests.Response:
+        """
+        POST a completion over the shared session, waiting out and retrying
+        429s. The caller must hold a concurrency slot.
+        """
+        for attempt in range(OPENROUTER_MAX_RETRIES + 1):
+            self.rate_limit.wait()
+            response = self.session.post(
+                f"{self.base_url}/chat/completions",
+                headers=self.headers,
+                json=payload,
+                stream=stream,
+                timeout=120,
+            )
+            if not self.rate_limit.record(response):
+                break
+            self.metrics.add(rate_limited=1)
+            if attempt < OPENROUTER_MAX_RETRIES:
+                self.metrics.add(retries=1)
+                response.close()
 
         if response.status_code != 200:
+            self.metrics.add(errors=1)
             raise Exception(
                 f"OpenRouter API error: {response.status_code} - {response.text}"
             )
-
-        return response.json()
+        return response
+
+    def _sync_completion(self, payload: Dict, cache: bool = False) -> Dict:
+        """Synchronous completion request (with cache, identical requests are served from the response cache)."""
+        cache_key = ResponseCache.make_key(payload) if cache and self.response_cache.enabled else None
+        if cache_key:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                self.metrics.add(cache_hits=1)
+                return cached
+            self.metrics.add(cache_misses=1)
+
+        start_time = time.perf_counter()
+        self.metrics.add(requests=1, in_flight=1)
+        try:
+            with self._slots:
+                result = self._post(payload).json()
+        finally:
+            self.metrics.add(in_flight=-1, total_latency_seconds=time.perf_counter() - start_time)
+
+        self.metrics.record_usage(result.get("usage"))
+        if cache_key:
+            self.response_cache.put(cache_key, result)
+        return result
 
     def _stream_completion(self, payload: Dict) -> Generator:
         """
         Streaming completion request.
         Yields chunks as they arrive for reduced perceived latency (10-100x improvement).
         """
-        response = requests.post(
-            f"{self.base_url}/chat/completions",
-            headers=self.headers,
-            json=payload,
-            stream=True,
-            timeout=120,
-        )
-
-        if response.status_code != 200:
-            raise Exception(
-                f"OpenRouter API error: {response.status_code} - {response.text}"
-            )
-
-        for line in response.iter_lines():
-            if line:
-                line = line.decode("utf-8")
-                if line.startswith("data: "):
-                    data = line[6:]  # Remove "data: " prefix
-                    if data == "[DONE]":
-                        break
-                    try:
-                        chunk = json.loads(data)
-                        yield chunk
-                    except json.JSONDecodeError:
-                        continue
+        start_time = time.perf_counter()
+        self.metrics.add(requests=1, in_flight=1)
+        self._slots.acquire()
+        try:
+            response = self._post(payload, stream=True)
+            try:
+                for line in response.iter_lines():
+                    if line:
+                        line = line.decode("utf-8")
+                        if line.startswith("data: "):
+                            data = line[6:]  # Remove "data: " prefix
+                            if data == "[DONE]":
+                                break
+                            try:
+                                chunk = json.loads(data)
+                            except json.JSONDecodeError:
+                                continue
+                            self.metrics.record_usage(chunk.get("usage"))
+                            yield chunk
+            finally:
+                response.close()
+        finally:
+            # Also runs when the caller closes the generator mid-stream
+            self._slots.release()
+            self.metrics.add(in_flight=-1, total_latency_seconds=time.perf_counter() - start_time)
+
+    def get_metrics(self) -> Dict:
+        """Process-wide request metrics for this client."""
+        return {
+            **self.metrics.snapshot(),
+            "cached_responses": len(self.response_cache),
+            "rate_limit": self.rate_limit.get_stats(),
+        }
 
     def chat_completion_with_vision(
         self,
@@ -269,5 +505,26 @@ class OpenRouterClient:
         return input_cost + cached_cost + output_cost
 
 
-# Singleton instance
-client = OpenRouterClient()
+# Process-wide registry: one shared client per API key
+_clients: Dict[Optional[str], OpenRouterClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_client(api_key: Optional[str] = OPENROUTER_API_KEY) -> OpenRouterClient:
+    """
+    Return the shared client for an API key, creating it on first use.
+
+    Args:
+        api_key: OpenRouter API key (defaults to OPENROUTER_API_KEY)
+
+    Returns:
+        The process-wide OpenRouterClient for that key
+    """
+    with _clients_lock:
+        if api_key not in _clients:
+            _clients[api_key] = OpenRouterClient(api_key=api_key)
+        return _clients[api_key]
+
+
+# Shared instance
+client = get_client()
@@ -0,0 +1,279 @@
+"""
+On-disk HTTP cache for web pages ingested by URLExtractor.
+
+extract_with_requests used to download and reparse the whole page on every
+"Start Tutoring" click. Pages are now cached in SQLite keyed by URL, and
+what is stored is the already-cleaned text (plus title), so a cache hit
+skips both the download and the BeautifulSoup pass:
+
+- freshness follows the response's Cache-Control (no-store, no-cache,
+  max-age / s-maxage) and Expires headers; without them, pages with a
+  Last-Modified date get the usual heuristic lifetime (10% of their age,
+  capped at PAGE_CACHE_MAX_HEURISTIC_SECONDS)
+- stale entries keep their ETag / Last-Modified validators, so the next
+  request is conditional (If-None-Match / If-Modified-Since) and a
+  304 Not Modified only refreshes the entry
+- if the site is unreachable, a stale copy is served rather than an error
+- entries record PAGE_EXTRACTOR_VERSION, and text cleaned by another
+  version of the extractor is ignored (the page is fetched and cleaned again)
+- entries not fetched or revalidated for PAGE_CACHE_MAX_AGE_SECONDS are
+  deleted on the first store after PAGE_CACHE_PURGE_INTERVAL_SECONDS
+
+Like TranscriptCache, the file is shared by every worker process on the
+host (WAL mode), each thread gets its own connection, and the database is
+opened on first use, not at import.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from email.utils import parsedate_to_datetime
+from typing import Dict, Mapping, Optional
+
+from config import (
+    PAGE_CACHE_MAX_AGE_SECONDS,
+    PAGE_CACHE_MAX_HEURISTIC_SECONDS,
+    PAGE_CACHE_PATH,
+    PAGE_CACHE_PURGE_INTERVAL_SECONDS,
+    PAGE_EXTRACTOR_VERSION,
+)
+
+_DIRECTIVE = re.compile(r"([a-z-]+)\s*(?:=\s*\"?(\d+)\"?)?")
+
+
+def _http_date(value: Optional[str]) -> Optional[float]:
+    """Parse an HTTP date header to a Unix timestamp (None if absent/invalid)."""
+    if not value:
+        return None
+    try:
+        return parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def parse_cache_control(value: Optional[str]) -> Dict[str, Optional[int]]:
+    """Cache-Control directives as {name: seconds or None}, e.g. {"max-age": 600}."""
+    directives = {}
+    for name, seconds in _DIRECTIVE.findall((value or "").lower()):
+        directives[name] = int(seconds) if seconds else None
+    return directives
+
+
+def freshness_lifetime(headers: Mapping[str, str], now: Optional[float] = None) -> Optional[float]:
+    """
+    How long a response may be reused without revalidation.
+
+    Args:
+        headers: Response headers (case-insensitive mapping)
+        now: Current time (defaults to time.time())
+
+    Returns:
+        Seconds of freshness (0 means "revalidate every time"), or None if
+        the response must not be stored
+    """
+    now = time.time() if now is None else now
+    directives = parse_cache_control(headers.get("Cache-Control"))
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return 0.0
+    for name in ("s-maxage", "max-age"):
+        if directives.get(name) is not None:
+            return float(directives[name])
+
+    date = _http_date(headers.get("Date")) or now
+    expires = headers.get("Expires")
+    if expires is not None:
+        expires_at = _http_date(expires)
+        return max(0.0, expires_at - date) if expires_at is not None else 0.0
+
+    last_modified = _http_date(headers.get("Last-Modified"))
+    if last_modified is not None:
+        return min(max(0.0, (date - last_modified) * 0.1), PAGE_CACHE_MAX_HEURISTIC_SECONDS)
+    return 0.0
+
+
+class CachedPage:
+    """A cached page: cleaned text, title and the validators to revalidate it."""
+
+    def __init__(
+        self,
+        url: str,
+        content: str,
+        title: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        fetched_at: float,
+        expires_at: float,
+    ):
+        self.url = url
+        self.content = content
+        self.title = title
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+    def is_fresh(self, now: Optional[float] = None) -> bool:
+        return (time.time() if now is None else now) < self.expires_at
+
+    @property
+    def has_validators(self) -> bool:
+        return bool(self.etag or self.last_modified)
+
+    def conditional_headers(self) -> Dict[str, str]:
+        """If-None-Match / If-Modified-Since headers for revalidating this entry."""
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+class PageCache:
+    """SQLite cache of extracted page text keyed by URL."""
+
+    def __init__(
+        self,
+        path: str = PAGE_CACHE_PATH,
+        max_age_seconds: float = PAGE_CACHE_MAX_AGE_SECONDS,
+        purge_interval: float = PAGE_CACHE_PURGE_INTERVAL_SECONDS,
+        extractor_version: int = PAGE_EXTRACTOR_VERSION,
+    ):
+        self.path = path
+        self.max_age_seconds = max_age_seconds
+        self.purge_interval = purge_interval
+        self.extractor_version = extractor_version
+        self._next_purge = time.time() + purge_interval
+        self._purge_lock = threading.Lock()
+        self._local = threading.local()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS pages (
+                    url TEXT PRIMARY KEY,
+                    data BLOB NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    fetched_at REAL NOT NULL,
+                    expires_at REAL NOT NULL,
+                    extractor_version INTEGER NOT NULL DEFAULT 1
+                )"""
+            )
+            columns = [row[1] for row in conn.execute("PRAGMA table_info(pages)")]
+            if "extractor_version" not in columns:
+                # Caches written before versioning hold BeautifulSoup-cleaned text (version 1)
+                conn.execute("ALTER TABLE pages ADD COLUMN extractor_version INTEGER NOT NULL DEFAULT 1")
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get(self, url: str) -> Optional[CachedPage]:
+        """
+        Look up a URL. Stale entries are returned too (check is_fresh()), so
+        callers can revalidate them or fall back to them. Entries cleaned by
+        another extractor version are not.
+
+        Returns:
+            CachedPage, or None if the URL was never cached
+        """
+        row = self._connection().execute(
+            "SELECT data, etag, last_modified, fetched_at, expires_at FROM pages "
+            "WHERE url = ? AND extractor_version = ?",
+            (url, self.extractor_version),
+        ).fetchone()
+        if row is None:
+            return None
+        data, etag, last_modified, fetched_at, expires_at = row
+        page = json.loads(zlib.decompress(bytes(data)).decode("utf-8"))
+        return CachedPage(url, page["content"], page["title"], etag, last_modified, fetched_at, expires_at)
+
+    def put(self, url: str, content: str, title: str, headers: Mapping[str, str]) -> Optional[CachedPage]:
+        """
+        Cache a freshly extracted page, if its headers allow it.
+
+        Responses that are neither fresh for a while nor revalidatable
+        (no ETag / Last-Modified) are not stored - they could never be reused.
+
+        Returns:
+            The stored entry, or None if the response was not cacheable
+        """
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now)
+        etag, last_modified = headers.get("ETag"), headers.get("Last-Modified")
+        if lifetime is None or (lifetime <= 0 and not (etag or last_modified)):
+            self.delete(url)
+            return None
+
+        blob = zlib.compress(json.dumps({"content": content, "title": title}).encode("utf-8"), 6)
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO pages (url, data, etag, last_modified, fetched_at, expires_at, extractor_version) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, sqlite3.Binary(blob), etag, last_modified, now, now + lifetime, self.extractor_version),
+        )
+        conn.commit()
+        self._maybe_purge()
+        return CachedPage(url, content, title, etag, last_modified, now, now + lifetime)
+
+    def refresh(self, page: CachedPage, headers: Mapping[str, str]) -> CachedPage:
+        """
+        Record a 304 Not Modified: extend freshness from the 304's headers
+        and pick up any updated validators, keeping the stored text.
+        """
+        now = time.time()
+        lifetime = freshness_lifetime(headers, now) or 0.0
+        page.etag = headers.get("ETag") or page.etag
+        page.last_modified = headers.get("Last-Modified") or page.last_modified
+        page.fetched_at, page.expires_at = now, now + lifetime
+        conn = self._connection()
+        conn.execute(
+            "UPDATE pages SET etag = ?, last_modified = ?, fetched_at = ?, expires_at = ? WHERE url = ?",
+            (page.etag, page.last_modified, now, page.expires_at, page.url),
+        )
+        conn.commit()
+        return page
+
+    def delete(self, url: str):
+        conn = self._connection()
+        conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+        conn.commit()
+
+    def purge(self, older_than_seconds: Optional[float] = None) -> int:
+        """
+        Delete entries not fetched or revalidated within older_than_seconds
+        (default max_age_seconds), and entries from other extractor versions.
+
+        Returns:
+            Number of entries removed
+        """
+        if older_than_seconds is None:
+            older_than_seconds = self.max_age_seconds
+        conn = self._connection()
+        cursor = conn.execute(
+            "DELETE FROM pages WHERE fetched_at < ? OR extractor_version != ?",
+            (time.time() - older_than_seconds, self.extractor_version),
+        )
+        conn.commit()
+        return cursor.rowcount
+
+    def _maybe_purge(self):
+        """Run purge() if purge_interval has passed since the last sweep."""
+        with self._purge_lock:
+            if time.time() < self._next_purge:
+                return
+            self._next_purge = time.time() + self.purge_interval
+        self.purge()
+
+
+# Global instance
+page_cache = PageCache()
@@ -0,0 +1,286 @@
+"""
+BM25 retrieval over long source material (transcripts, web pages).
+
+The YouTube and web extractors used to slice their content to the first
+5000/8000 characters, so questions about the rest of a long lecture had no
+context at all. Sources are now split into overlapping word-window chunks
+and indexed with Okapi BM25; TutoringEngine.chat retrieves the top-k chunks
+for each student message and injects only those into the prompt, so the
+prompt stays small while the whole source stays reachable.
+
+Video transcripts are chunked along their caption segments, so each chunk
+carries the time range it covers. Retrieved excerpts are labelled with those
+times (the tutor can cite "around 12:30"), and a timestamp in the student's
+message pulls in the chunk playing at that moment by binary search.
+
+BM25 needs no model download or network access, and for a few thousand
+chunks an inverted index in plain dicts answers a query in well under a
+millisecond.
+"""
+
+import math
+import re
+from bisect import bisect_left, bisect_right
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from config import RETRIEVAL_CHUNK_OVERLAP_WORDS, RETRIEVAL_CHUNK_WORDS
+from transcript_cache import Transcript, format_timestamp
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_TIMESTAMP = re.compile(r"\b(?:(\d{1,2}):)?(\d{1,2}):([0-5]\d)\b")
+
+# Common English function words carry no signal for retrieval
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being below between both
+but by can could did do does doing down during each few for from further had has have having he her here
+hers him his how i if in into is it its itself just let me more most my no nor not now of off on once only
+or other our ours out over own same she should so some such than that the their theirs them then there these
+they this those through to too under until up very was we were what when where which while who whom why will
+with would you your yours
+""".split())
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens with stopwords removed."""
+    return [token for token in _TOKEN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def parse_timestamps(text: str) -> List[float]:
+    """Video times mentioned in text ("12:30", "1:02:03") in seconds."""
+    return [
+        int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds)
+        for hours, minutes, seconds in _TIMESTAMP.findall(text)
+    ]
+
+
+class Chunk:
+    """A retrievable slice of a source document, with its time range for transcripts."""
+
+    def __init__(self, text: str, source: str = "", start: Optional[float] = None, end: Optional[float] = None):
+        self.text = text
+        self.source = source
+        self.start = start
+        self.end = end
+
+    @property
+    def is_timed(self) -> bool:
+        return self.start is not None
+
+    def label(self) -> str:
+        """Time range such as "12:30-13:15" (empty for untimed chunks)."""
+        if not self.is_timed:
+            return ""
+        return f"{format_timestamp(self.start)}-{format_timestamp(self.end)}"
+
+    def to_dict(self) -> Dict:
+        state = {"text": self.text, "source": self.source}
+        if self.is_timed:
+            state.update(start=self.start, end=self.end)
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "Chunk":
+        return cls(state["text"], state.get("source", ""), state.get("start"), state.get("end"))
+
+
+def chunk_text(
+    text: str,
+    source: str = "",
+    chunk_words: int = RETRIEVAL_CHUNK_WORDS,
+    overlap_words: int = RETRIEVAL_CHUNK_OVERLAP_WORDS,
+) -> List[Chunk]:
+    """
+    Split text into overlapping windows of roughly chunk_words words.
+
+    Args:
+        text: Source text
+        source: Label carried by each chunk (URL, video id, file name)
+        chunk_words: Words per chunk
+        overlap_words: Words shared by consecutive chunks, so a sentence cut
+            at a boundary is still whole in one of them
+
+    Returns:
+        List of chunks in document order
+    """
+    words = text.split()
+    step = max(1, chunk_words - overlap_words)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(Chunk(" ".join(words[start:start + chunk_words]), source))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def chunk_transcript(
+    transcript: Transcript,
+    source: str = "",
+    chunk_words: int = RETRIEVAL_CHUNK_WORDS,
+    overlap_words: int = RETRIEVAL_CHUNK_OVERLAP_WORDS,
+) -> List[Chunk]:
+    """
+    Chunk a timed transcript along caption segment boundaries.
+
+    Same word budget and overlap as chunk_text(), but segments are never
+    split, so every chunk knows the time range it covers.
+
+    Returns:
+        List of timed chunks in playback order
+    """
+    count = len(transcript)
+    # cumulative[i] = words in segments [0, i)
+    cumulative = [0]
+    for index in range(count):
+        cumulative.append(cumulative[-1] + len(transcript.segment_text(index).split()))
+
+    chunks, first = [], 0
+    while first < count:
+        end = bisect_left(cumulative, cumulative[first] + chunk_words, lo=first + 1)
+        end = min(max(end, first + 1), count)
+        chunks.append(Chunk(
+            " ".join(transcript.segment_text(i) for i in range(first, end)),
+            source,
+            start=transcript.starts[first],
+            end=transcript.starts[end - 1] + transcript.durations[end - 1],
+        ))
+        if end >= count:
+            break
+        # Next chunk starts so that at most overlap_words words are repeated
+        first = max(first + 1, bisect_left(cumulative, cumulative[end] - overlap_words, lo=first + 1))
+    return chunks
+
+
+class BM25Index:
+    """Okapi BM25 over a list of chunks, backed by an in-memory inverted index."""
+
+    def __init__(self, chunks: List[Chunk], k1: float = 1.5, b: float = 0.75):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+
+        self._postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)
+        self._lengths: List[int] = []
+        for index, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk.text))
+            self._lengths.append(sum(counts.values()))
+            for term, frequency in counts.items():
+                self._postings[term].append((index, frequency))
+
+        self._avg_length = sum(self._lengths) / len(self._lengths) if self._lengths else 0.0
+        # One timeline per video; within a source, timed chunks are in playback order
+        self._timelines: Dict[str, Tuple[List[int], List[float]]] = {}
+        for index, chunk in enumerate(chunks):
+            if chunk.is_timed:
+                positions, starts = self._timelines.setdefault(chunk.source, ([], []))
+                positions.append(index)
+                starts.append(chunk.start)
+        total = len(chunks)
+        self._idf = {
+            term: math.log(1 + (total - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def sources(self) -> List[str]:
+        """Distinct source labels, in the order they were loaded."""
+        return list(dict.fromkeys(chunk.source for chunk in self.chunks))
+
+    def search(self, query: str, k: int) -> List[Tuple[Chunk, float]]:
+        """
+        Rank chunks against a query.
+
+        Args:
+            query: Free-text query (e.g. the student's message)
+            k: Maximum number of results
+
+        Returns:
+            Up to k (chunk, score) pairs with score > 0, best first
+        """
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for index, frequency in self._postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self._lengths[index] / self._avg_length)
+                scores[index] += idf * frequency * (self.k1 + 1) / (frequency + norm)
+
+        best = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+        return [(self.chunks[index], score) for index, score in best]
+
+    def chunk_at(self, seconds: float, source: Optional[str] = None) -> Optional[Chunk]:
+        """
+        The timed chunk playing at `seconds` (binary search over chunk starts).
+
+        Args:
+            seconds: Video position
+            source: Video to look in; defaults to the first one that has a
+                chunk at that time
+
+        Returns:
+            Chunk, or None if there are no timed chunks or the time is out of range
+        """
+        sources = [source] if source is not None else list(self._timelines)
+        for name in sources:
+            positions, starts = self._timelines.get(name, ((), ()))
+            position = bisect_right(starts, seconds) - 1
+            if position >= 0:
+                chunk = self.chunks[positions[position]]
+                if seconds <= chunk.end:
+                    return chunk
+        return None
+
+    def chunks_at(self, seconds: float) -> List[Chunk]:
+        """The chunk playing at `seconds` in each indexed video."""
+        chunks = (self.chunk_at(seconds, source) for source in self._timelines)
+        return [chunk for chunk in chunks if chunk is not None]
+
+    def retrieve(self, query: str, k: int) -> List[Tuple[Chunk, float]]:
+        """
+        search(), plus the chunks playing at any timestamps mentioned in the
+        query ("what did they say at 12:30?"), which are ranked first. With
+        several videos indexed, the matching chunk of each is pinned.
+        """
+        pinned = []
+        for seconds in parse_timestamps(query):
+            for chunk in self.chunks_at(seconds):
+                if all(chunk is not other for other, _ in pinned):
+                    pinned.append((chunk, math.inf))
+        results = [result for result in self.search(query, k) if all(result[0] is not c for c, _ in pinned)]
+        return (pinned + results)[:max(k, len(pinned))]
+
+    def to_dict(self) -> Dict:
+        """Chunks only - the index is rebuilt on load (milliseconds)."""
+        return {"chunks": [chunk.to_dict() for chunk in self.chunks]}
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "BM25Index":
+        return cls([Chunk.from_dict(chunk) for chunk in state.get("chunks", [])])
+
+
+def format_retrieved_context(results: List[Tuple[Chunk, float]], show_source: bool = False) -> Optional[str]:
+    """
+    Format retrieved chunks as a prompt section (None if nothing matched).
+
+    Args:
+        results: (chunk, score) pairs from BM25Index.retrieve()
+        show_source: Name each excerpt's source (when several are indexed)
+    """
+    if not results:
+        return None
+
+    def excerpt(number: int, chunk: Chunk) -> str:
+        tags = [chunk.source] if show_source and chunk.source else []
+        if chunk.is_timed:
+            tags.append(chunk.label())
+        return f"[{number}] ({', '.join(tags)}) {chunk.text}" if tags else f"[{number}] {chunk.text}"
+
+    excerpts = "\n\n".join(excerpt(number, chunk) for number, (chunk, _) in enumerate(results, start=1))
+    header = "RELEVANT SOURCE EXCERPTS (retrieved for this question)"
+    if any(chunk.is_timed for chunk, _ in results):
+        header += " - times are video positions; cite them when referring to the video"
+    return f"{header}:\n{excerpts}"
@@ -0,0 +1,748 @@
+"""
+Session persistence for the tutoring engine.
+
+Moves per-student state (conversation history, reference solution,
+verification cache, metrics) out of a single Streamlit process so that
+sessions survive restarts and can be served by several worker processes
+behind a load balancer.
+
+Backends:
+- InMemorySessionStore: single process, useful for tests and local dev
+- SQLiteSessionStore: shared file, safe across processes on one host (WAL mode)
+- RedisSessionStore: any redis-py compatible client, for multi-host deployments
+  (configuring the redis backend without the redis package or a reachable
+  server fails at startup rather than quietly keeping sessions in-process)
+
+Every saved session carries a version number that goes up by one on each
+save. Passing expected_version to save() makes it a compare-and-set: it
+raises SessionConflict instead of overwriting a session that another request
+(or worker process) saved in the meantime.
+
+Expired sessions are swept by purge_expired(), which every store runs on
+the first save after SESSION_PURGE_INTERVAL_SECONDS.
+
+A chat turn should cost a write proportional to the turn, not to the whole
+session, so the two parts that only ever grow are kept out of the session
+record itself:
+- the source index (retrieval chunks of long transcripts and pages) is
+  stored once under a content hash, shared by every session with the same
+  sources, and cached deserialized per process
+- conversations (the engine's history and the app's messages) are stored
+  as immutable pages of SESSION_HISTORY_PAGE_MESSAGES messages; the record
+  holds only the page references and the unfinished tail
+Each save restarts the expiry of the pages and index the session refers to.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import uuid
+import weakref
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from config import (
+    REDIS_URL,
+    SESSION_STORE_BACKEND,
+    SESSION_HISTORY_PAGE_MESSAGES,
+    SESSION_INDEX_CACHE_ENTRIES,
+    SESSION_PURGE_INTERVAL_SECONDS,
+    SESSION_STORE_PATH,
+    SESSION_TTL_SECONDS,
+)
+
+# Try to import redis with error handling - the redis backend requires it
+try:
+    import redis
+    from redis.exceptions import WatchError
+    REDIS_AVAILABLE = True
+except Exception:
+    REDIS_AVAILABLE = False
+
+    class WatchError(Exception):
+        """Stand-in for redis.exceptions.WatchError (raised by LocalRedis pipelines)."""
+
+# Payloads smaller than this are stored as plain JSON (compression would not pay off)
+COMPRESSION_MIN_BYTES = 512
+
+_FORMAT_JSON = b"j"
+_FORMAT_ZLIB = b"z"
+
+# Message lists saved as pages: (key of the dict holding the list or None for
+# the top level, list key)
+_PAGED_LISTS = (("engine", "conversation_history"), (None, "messages"))
+
+# Sessions whose stored pages are remembered per process
+_PAGE_MEMO_SESSIONS = 1024
+
+
+class SessionConflict(Exception):
+    """Raised by a compare-and-set save when the session changed since it was loaded."""
+
+
+def serialize_session(state: Dict) -> bytes:
+    """
+    Serialize session state into a compact byte string.
+
+    Uses minified JSON, zlib-compressed once the payload is large enough.
+    A one-byte prefix records the format so both can be read back.
+
+    Args:
+        state: JSON-serializable session dictionary
+
+    Returns:
+        Encoded session bytes
+    """
+    raw = json.dumps(state, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) < COMPRESSION_MIN_BYTES:
+        return _FORMAT_JSON + raw
+    return _FORMAT_ZLIB + zlib.compress(raw, 6)
+
+
+def deserialize_session(blob: bytes) -> Dict:
+    """
+    Decode bytes produced by serialize_session.
+
+    Args:
+        blob: Encoded session bytes
+
+    Returns:
+        Session dictionary
+    """
+    fmt, payload = blob[:1], blob[1:]
+    if fmt == _FORMAT_ZLIB:
+        payload = zlib.decompress(payload)
+    elif fmt != _FORMAT_JSON:
+        raise ValueError(f"Unknown session format: {fmt!r}")
+    return json.loads(payload.decode("utf-8"))
+
+
+class SessionStore(ABC):
+    """
+    Base class for session stores.
+
+    Subclasses implement the raw byte operations (_get, _set, _touch,
+    delete, purge_expired); serialization, paging, periodic purging and
+    engine helpers are shared.
+    """
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS,
+                 purge_interval: float = SESSION_PURGE_INTERVAL_SECONDS):
+        self.ttl_seconds = ttl_seconds
+        self.purge_interval = purge_interval
+        self.page_messages = SESSION_HISTORY_PAGE_MESSAGES
+        self._next_purge = time.time() + purge_interval
+        self._purge_lock = threading.Lock()
+
+        self._memo_lock = threading.Lock()
+        # (session_id, list name) -> {"token": page chain id, "last": last message of each stored page}
+        self._pages: "OrderedDict[tuple, Dict]" = OrderedDict()
+        # Source index -> its store key, and store key -> deserialized index
+        self._index_keys = weakref.WeakKeyDictionary()
+        self._indexes: "OrderedDict[str, object]" = OrderedDict()
+
+    @abstractmethod
+    def _get(self, session_id: str) -> Optional[Tuple[bytes, int]]:
+        """Return (blob, version), or None if missing or expired."""
+
+    @abstractmethod
+    def _set(self, session_id: str, blob: bytes, expected_version: Optional[int] = None) -> int:
+        """
+        Store a blob and return its new version. With expected_version, only
+        store it if the current version matches (0 = no session yet),
+        otherwise raise SessionConflict.
+        """
+
+    @abstractmethod
+    def _touch(self, keys: List[str]) -> int:
+        """Restart the expiry of existing, unexpired keys; return how many there were."""
+
+    @abstractmethod
+    def delete(self, session_id: str):
+        """Remove a session from the store (its pages expire on their own)."""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """
+        Delete every expired session.
+
+        Returns:
+            Number of sessions removed
+        """
+
+    def _maybe_purge(self):
+        """Run purge_expired() if purge_interval has passed since the last sweep."""
+        with self._purge_lock:
+            if time.time() < self._next_purge:
+                return
+            self._next_purge = time.time() + self.purge_interval
+        self.purge_expired()
+
+    def load(self, session_id: str) -> Optional[Dict]:
+        """
+        Load a session.
+
+        Args:
+            session_id: Session identifier
+
+        Returns:
+            Session dictionary, or None if missing or expired
+        """
+        return self.load_versioned(session_id)[0]
+
+    def load_versioned(self, session_id: str) -> Tuple[Optional[Dict], int]:
+        """
+        Load a session together with its version, for a later compare-and-set save.
+
+        Returns:
+            (session dictionary or None, version - 0 if the session doesn't exist)
+        """
+        entry = self._get(session_id)
+        if entry is None:
+            return None, 0
+        blob, version = entry
+        state = deserialize_session(blob)
+        for container, name in _PAGED_LISTS:
+            holder = state.get(container) if container else state
+            if isinstance(holder, dict) and isinstance(holder.get(name), dict):
+                items = self._load_pages(session_id, name, holder[name])
+                if items is None:
+                    return None, 0  # Pages expired with the session
+                holder[name] = items
+        return state, version
+
+    def save(self, session_id: str, state: Dict, expected_version: Optional[int] = None) -> int:
+        """
+        Save a session, replacing any previous state.
+
+        Args:
+            session_id: Session identifier
+            state: JSON-serializable session dictionary
+            expected_version: Version returned by load_versioned; the save
+                fails if the session was saved again since (None = always save)
+
+        Returns:
+            The session's new version
+
+        Raises:
+            SessionConflict: If expected_version no longer matches
+        """
+        state = dict(state)
+        for container, name in _PAGED_LISTS:
+            holder = state.get(container) if container else state
+            if isinstance(holder, dict) and isinstance(holder.get(name), list):
+                if container:
+                    holder = state[container] = dict(holder)
+                holder[name] = self._save_pages(session_id, name, holder[name])
+        if isinstance(state.get("engine"), dict) and state["engine"].get("source_index_key"):
+            self._touch([state["engine"]["source_index_key"]])
+
+        version = self._set(session_id, serialize_session(state), expected_version)
+        self._maybe_purge()
+        return version
+
+    @staticmethod
+    def _page_key(session_id: str, name: str, token: str, page: int) -> str:
+        return f"{session_id}:{name}:{token}:{page}"
+
+    def _remember_pages(self, session_id: str, name: str, memo: Dict):
+        with self._memo_lock:
+            self._pages[(session_id, name)] = memo
+            self._pages.move_to_end((session_id, name))
+            while len(self._pages) > _PAGE_MEMO_SESSIONS:
+                self._pages.popitem(last=False)
+
+    def _save_pages(self, session_id: str, name: str, items: List) -> Dict:
+        """
+        Store the full pages of a message list not stored yet.
+
+        Messages are only ever appended, so a page whose last message is the
+        same object as when it was stored is unchanged. Anything else (a new
+        conversation, a list this process hasn't seen) starts a new page chain.
+
+        Returns:
+            Reference saved in place of the list: {"paged", "pages", "tail"}
+        """
+        size = self.page_messages
+        full = len(items) // size
+        with self._memo_lock:
+            memo = self._pages.get((session_id, name))
+        if memo is not None:
+            keys = [self._page_key(session_id, name, memo["token"], page) for page in range(len(memo["last"]))]
+            unchanged = len(memo["last"]) <= full and all(
+                items[(page + 1) * size - 1] is last for page, last in enumerate(memo["last"])
+            )
+            # Restart the stored pages' expiry; if any expired meanwhile, store them again
+            if not unchanged or (keys and self._touch(keys) < len(keys)):
+                memo = None
+        memo = {"token": uuid.uuid4().hex[:12], "last": []} if memo is None else dict(memo, last=list(memo["last"]))
+
+        for page in range(len(memo["last"]), full):
+            chunk = items[page * size:(page + 1) * size]
+            self._set(self._page_key(session_id, name, memo["token"], page), serialize_session({"items": chunk}))
+            memo["last"].append(chunk[-1])
+        self._remember_pages(session_id, name, memo)
+        return {"paged": memo["token"], "pages": full, "tail": items[full * size:]}
+
+    def _load_pages(self, session_id: str, name: str, ref: Dict) -> Optional[List]:
+        """Rebuild a message list saved by _save_pages (None if a page expired)."""
+        items, last = [], []
+        for page in range(ref["pages"]):
+            entry = self._get(self._page_key(session_id, name, ref["paged"], page))
+            if entry is None:
+                return None
+            chunk = deserialize_session(entry[0])["items"]
+            items.extend(chunk)
+            last.append(chunk[-1])
+        items.extend(ref["tail"])
+        self._remember_pages(session_id, name, {"token": ref["paged"], "last": last})
+        return items
+
+    def _save_source_index(self, index) -> str:
+        """Store a source index once under its content hash and return the key."""
+        with self._memo_lock:
+            key = self._index_keys.get(index)
+        if key is not None and self._touch([key]):
+            return key
+
+        blob = serialize_session(index.to_dict())
+        key = "source-index:" + hashlib.sha256(blob).hexdigest()[:32]
+        if not self._touch([key]):
+            self._set(key, blob)
+        self._cache_source_index(key, index)
+        return key
+
+    def _cache_source_index(self, key: str, index):
+        with self._memo_lock:
+            self._index_keys[index] = key
+            self._indexes[key] = index
+            self._indexes.move_to_end(key)
+            while len(self._indexes) > SESSION_INDEX_CACHE_ENTRIES:
+                self._indexes.popitem(last=False)
+
+    def _load_source_index(self, key: str):
+        """Deserialized source index for a key (shared, read-only), or None if expired."""
+        from retrieval import BM25Index
+
+        with self._memo_lock:
+            index = self._indexes.get(key)
+            if index is not None:
+                self._indexes.move_to_end(key)
+                return index
+        entry = self._get(key)
+        if entry is None:
+            return None
+        index = BM25Index.from_dict(deserialize_session(entry[0]))
+        self._cache_source_index(key, index)
+        return index
+
+    def load_engine(self, session_id: str):
+        """
+        Restore a TutoringEngine saved with save_engine.
+
+        Returns:
+            TutoringEngine instance, or None if the session does not exist
+        """
+        state = self.load(session_id)
+        if state is None or "engine" not in state:
+            return None
+        return self.restore_engine(state)
+
+    def restore_engine(self, state: Dict):
+        """
+        Rebuild the TutoringEngine of a loaded session state (see load()),
+        including its separately stored source index.
+        """
+        from tutoring_engine import TutoringEngine
+
+        engine = TutoringEngine.from_dict(state["engine"])
+        key = state["engine"].get("source_index_key")
+        if key:
+            engine.source_index = self._load_source_index(key)
+        return engine
+
+    def save_engine(self, session_id: str, engine, extra: Optional[Dict] = None,
+                    expected_version: Optional[int] = None) -> int:
+        """
+        Persist a TutoringEngine plus optional UI state.
+
+        Args:
+            session_id: Session identifier
+            engine: TutoringEngine instance
+            extra: Additional JSON-serializable state stored alongside the engine
+            expected_version: See save()
+
+        Returns:
+            The session's new version
+        """
+        state = {"engine": engine.to_dict(include_source_index=False)}
+        if engine.source_index is not None:
+            state["engine"]["source_index_key"] = self._save_source_index(engine.source_index)
+        if extra:
+            state.update(extra)
+        return self.save(session_id, state, expected_version)
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Process-local store. Keeps serialized bytes so behaviour matches the
+    persistent backends (no shared mutable objects between sessions).
+    """
+
+    def __init__(self, ttl_seconds: int = SESSION_TTL_SECONDS,
+                 purge_interval: float = SESSION_PURGE_INTERVAL_SECONDS):
+        super().__init__(ttl_seconds, purge_interval)
+        self._data: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, session_id: str) -> Optional[Tuple[bytes, int]]:
+        with self._lock:
+            entry = self._data.get(session_id)
+            if entry is None:
+                return None
+            blob, expires_at, version = entry
+            if expires_at < time.time():
+                del self._data[session_id]
+                return None
+            return blob, version
+
+    def _set(self, session_id: str, blob: bytes, expected_version: Optional[int] = None) -> int:
+        with self._lock:
+            entry = self._data.get(session_id)
+            version = entry[2] if entry is not None and entry[1] >= time.time() else 0
+            if expected_version is not None and version != expected_version:
+                raise SessionConflict(f"Session {session_id} is at version {version}, not {expected_version}")
+            self._data[session_id] = (blob, time.time() + self.ttl_seconds, version + 1)
+            return version + 1
+
+    def _touch(self, keys: List[str]) -> int:
+        now = time.time()
+        touched = 0
+        with self._lock:
+            for key in keys:
+                entry = self._data.get(key)
+                if entry is not None and entry[1] >= now:
+                    self._data[key] = (entry[0], now + self.ttl_seconds, entry[2])
+                    touched += 1
+        return touched
+
+    def delete(self, session_id: str):
+        with self._lock:
+            self._data.pop(session_id, None)
+
+    def purge_expired(self) -> int:
+        now = time.time()
+        with self._lock:
+            expired = [session_id for session_id, entry in self._data.items() if entry[1] < now]
+            for session_id in expired:
+                del self._data[session_id]
+        return len(expired)
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    SQLite-backed store shared by every worker process on the host.
+
+    WAL journaling lets readers proceed while another process writes, and
+    each thread gets its own connection since sqlite3 connections are not
+    thread-safe.
+    """
+
+    def __init__(self, path: str = SESSION_STORE_PATH, ttl_seconds: int = SESSION_TTL_SECONDS,
+                 purge_interval: float = SESSION_PURGE_INTERVAL_SECONDS):
+        super().__init__(ttl_seconds, purge_interval)
+        self.path = path
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS sessions (
+                session_id TEXT PRIMARY KEY,
+                data BLOB NOT NULL,
+                updated_at REAL NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0
+            )"""
+        )
+        columns = [row[1] for row in conn.execute("PRAGMA table_info(sessions)")]
+        if "version" not in columns:
+            try:
+                conn.execute("ALTER TABLE sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+            except sqlite3.OperationalError:
+                pass  # Another process added it first
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_updated ON sessions(updated_at)")
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _get(self, session_id: str) -> Optional[Tuple[bytes, int]]:
+        row = self._connection().execute(
+            "SELECT data, updated_at, version FROM sessions WHERE session_id = ?",
+            (session_id,),
+        ).fetchone()
+        if row is None:
+            return None
+        data, updated_at, version = row
+        now = time.time()
+        if updated_at + self.ttl_seconds < now:
+            # Only the expired row: another worker may have recreated the session since the SELECT
+            conn = self._connection()
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id = ? AND updated_at < ?",
+                (session_id, now - self.ttl_seconds),
+            )
+            conn.commit()
+            return None
+        return bytes(data), version
+
+    def _set(self, session_id: str, blob: bytes, expected_version: Optional[int] = None) -> int:
+        conn = self._connection()
+        now = time.time()
+        if expected_version is None:
+            conn.execute(
+                """INSERT INTO sessions (session_id, data, updated_at, version) VALUES (?, ?, ?, 1)
+                   ON CONFLICT(session_id) DO UPDATE SET
+                       data = excluded.data, updated_at = excluded.updated_at, version = version + 1""",
+                (session_id, sqlite3.Binary(blob), now),
+            )
+            version = conn.execute(
+                "SELECT version FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()[0]
+            conn.commit()
+            return version
+
+        if expected_version == 0:
+            # Expired rows count as missing, as in _get
+            conn.execute(
+                "DELETE FROM sessions WHERE session_id = ? AND updated_at < ?",
+                (session_id, now - self.ttl_seconds),
+            )
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO sessions (session_id, data, updated_at, version) VALUES (?, ?, ?, 1)",
+                (session_id, sqlite3.Binary(blob), now),
+            )
+        else:
+            cursor = conn.execute(
+                "UPDATE sessions SET data = ?, updated_at = ?, version = version + 1 "
+                "WHERE session_id = ? AND version = ? AND updated_at >= ?",
+                (sqlite3.Binary(blob), now, session_id, expected_version, now - self.ttl_seconds),
+            )
+        conn.commit()
+        if cursor.rowcount == 0:
+            raise SessionConflict(f"Session {session_id} is no longer at version {expected_version}")
+        return expected_version + 1
+
+    def _touch(self, keys: List[str]) -> int:
+        now = time.time()
+        conn = self._connection()
+        cursor = conn.execute(
+            f"UPDATE sessions SET updated_at = ? WHERE updated_at >= ? AND session_id IN ({','.join('?' * len(keys))})",
+            (now, now - self.ttl_seconds, *keys),
+        )
+        conn.commit()
+        return cursor.rowcount
+
+    def delete(self, session_id: str):
+        conn = self._connection()
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        conn.commit()
+
+    def purge_expired(self) -> int:
+        conn = self._connection()
+        cursor = conn.execute(
+            "DELETE FROM sessions WHERE updated_at < ?",
+            (time.time() - self.ttl_seconds,),
+        )
+        conn.commit()
+        return cursor.rowcount
+
+
+class LocalRedis:
+    """
+    Minimal in-process stand-in for a redis-py client, for tests.
+
+    Implements the subset RedisSessionStore uses (get, set with ex, delete,
+    and WATCH/MULTI/EXEC pipelines) so the Redis code path can run without a
+    Redis server.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, tuple] = {}
+        self._revisions: Dict[str, int] = {}  # Bumped on every write, for WATCH
+        self._lock = threading.RLock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None) -> bool:
+        with self._lock:
+            expires_at = time.time() + ex if ex else None
+            self._data[key] = (value, expires_at)
+            self._revisions[key] = self._revisions.get(key, 0) + 1
+        return True
+
+    def delete(self, *keys: str) -> int:
+        with self._lock:
+            for key in keys:
+                self._revisions[key] = self._revisions.get(key, 0) + 1
+            return sum(1 for key in keys if self._data.pop(key, None) is not None)
+
+    def expire(self, key: str, seconds: int) -> bool:
+        with self._lock:
+            if self.get(key) is None:
+                return False
+            self._data[key] = (self._data[key][0], time.time() + seconds)
+            return True
+
+    def pipeline(self, transaction: bool = True) -> "LocalRedisPipeline":
+        return LocalRedisPipeline(self)
+
+
+class LocalRedisPipeline:
+    """WATCH/MULTI/EXEC pipeline for LocalRedis: EXEC fails if a watched key was written."""
+
+    def __init__(self, client: LocalRedis):
+        self.client = client
+        self._watched: Dict[str, int] = {}
+        self._commands = []  # Queued calls on the client, run by execute()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.reset()
+
+    def watch(self, *keys: str):
+        with self.client._lock:
+            for key in keys:
+                self._watched[key] = self.client._revisions.get(key, 0)
+
+    def get(self, key: str) -> Optional[bytes]:
+        return self.client.get(key)
+
+    def multi(self):
+        self._commands = []
+
+    def set(self, key: str, value: bytes, ex: Optional[int] = None):
+        self._commands.append(lambda: self.client.set(key, value, ex=ex))
+
+    def expire(self, key: str, seconds: int):
+        self._commands.append(lambda: self.client.expire(key, seconds))
+
+    def execute(self) -> list:
+        with self.client._lock:
+            if any(self.client._revisions.get(key, 0) != revision for key, revision in self._watched.items()):
+                raise WatchError("Watched key changed")
+            results = [command() for command in self._commands]
+        self.reset()
+        return results
+
+    def reset(self):
+        self._watched, self._commands = {}, []
+
+
+class RedisSessionStore(SessionStore):
+    """
+    Store backed by a redis-py compatible client. Expiry is delegated to
+    Redis so idle sessions are reclaimed without a sweeper.
+    """
+
+    def __init__(self, redis_client, ttl_seconds: int = SESSION_TTL_SECONDS, prefix: str = "aristotle:session:"):
+        super().__init__(ttl_seconds)
+        self.redis = redis_client
+        self.prefix = prefix
+
+    @staticmethod
+    def _unpack(value: bytes) -> Tuple[bytes, int]:
+        """Split a stored value into (blob, version); values saved before versioning are version 0."""
+        if value[:1].isdigit():
+            version, blob = value.split(b":", 1)
+            return blob, int(version)
+        return value, 0
+
+    def _get(self, session_id: str) -> Optional[Tuple[bytes, int]]:
+        value = self.redis.get(self.prefix + session_id)
+        return None if value is None else self._unpack(value)
+
+    def _set(self, session_id: str, blob: bytes, expected_version: Optional[int] = None) -> int:
+        key = self.prefix + session_id
+        while True:
+            with self.redis.pipeline() as pipe:
+                try:
+                    pipe.watch(key)
+                    current = pipe.get(key)
+                    version = self._unpack(current)[1] if current is not None else 0
+                    if expected_version is not None and version != expected_version:
+                        raise SessionConflict(f"Session {session_id} is at version {version}, not {expected_version}")
+                    pipe.multi()
+                    pipe.set(key, b"%d:%s" % (version + 1, blob), ex=self.ttl_seconds)
+                    pipe.execute()
+                    return version + 1
+                except WatchError:
+                    if expected_version is not None:
+                        raise SessionConflict(f"Session {session_id} was saved concurrently")
+                    # Unconditional save: retry against the newer version
+
+    def _touch(self, keys: List[str]) -> int:
+        with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.expire(self.prefix + key, self.ttl_seconds)
+            return sum(1 for existed in pipe.execute() if existed)
+
+    def delete(self, session_id: str):
+        self.redis.delete(self.prefix + session_id)
+
+    def purge_expired(self) -> int:
+        return 0  # Keys carry a TTL; Redis reclaims them itself
+
+
+def create_session_store(backend: str = SESSION_STORE_BACKEND) -> SessionStore:
+    """
+    Create the session store configured for this deployment.
+
+    Args:
+        backend: "memory", "sqlite" or "redis"
+
+    Returns:
+        SessionStore instance
+
+    Raises:
+        ImportError: If backend is "redis" and the redis package is missing
+        redis.exceptions.ConnectionError: If the Redis server at REDIS_URL
+            can't be reached
+        ValueError: For an unknown backend
+    """
+    if backend == "memory":
+        return InMemorySessionStore()
+
+    if backend == "redis":
+        # Fail at startup: an in-process stand-in would silently stop sharing
+        # sessions between workers
+        if not REDIS_AVAILABLE:
+            raise ImportError("SESSION_STORE_BACKEND=redis needs the redis package (pip install redis)")
+        client = redis.Redis.from_url(REDIS_URL)
+        client.ping()
+        return RedisSessionStore(client)
+
+    if backend == "sqlite":
+        return SQLiteSessionStore()
+
+    raise ValueError(f"Unknown session store backend: {backend}")
@@ -0,0 +1,251 @@
+"""
+Slide deck PDF renderer.
+
+render_slides used to rebuild getSampleStyleSheet() and three ParagraphStyles
+on every call and turn markdown into a reportlab story line by line (so bold,
+italics, numbered and nested lists came out as raw markdown). This engine:
+
+- builds the paragraph styles once and registers a Unicode TTF font once
+  (DejaVu Sans when installed, so math symbols render; Helvetica otherwise)
+- parses each slide with the markdown module and maps the HTML to reportlab
+  flowables (headings, paragraphs, bullet/numbered/nested lists, code,
+  bold/italic/inline code)
+- renders every slide as its own small PDF, cached by a hash of its
+  markdown, and merges the pages with PyPDF2 - so an edited deck only
+  re-renders the slides that changed
+"""
+
+import hashlib
+import os
+import re
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from io import BytesIO
+from typing import Dict, List, Tuple
+from xml.sax.saxutils import escape
+
+import markdown
+from lxml import html as lxml_html
+from PyPDF2 import PdfReader, PdfWriter
+from reportlab.lib.enums import TA_CENTER, TA_LEFT
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.platypus import ListFlowable, ListItem, Paragraph, Preformatted, SimpleDocTemplate, Spacer
+
+from config import SLIDE_CACHE_MAX_ENTRIES, SLIDE_FONT_DIRS
+
+# Bump when styles or the markdown mapping change so cached slides re-render
+RENDERER_VERSION = 1
+
+PAGE_SETTINGS = dict(pagesize=letter, rightMargin=72, leftMargin=72, topMargin=72, bottomMargin=18)
+
+_SLIDE_SEPARATOR = re.compile(r"^\s*-{3,}\s*$", re.MULTILINE)
+_INLINE_TAGS = {"strong": "b", "b": "b", "em": "i", "i": "i", "u": "u", "sup": "super", "sub": "sub"}
+
+
+@lru_cache(maxsize=1)
+def slide_fonts() -> Tuple[str, str]:
+    """
+    Register the body font family once per process.
+
+    Returns:
+        (regular font name, monospace font name)
+    """
+    def find(file_name):
+        for directory in SLIDE_FONT_DIRS:
+            path = os.path.join(directory, file_name)
+            if os.path.exists(path):
+                return path
+        return None
+
+    regular, bold = find("DejaVuSans.ttf"), find("DejaVuSans-Bold.ttf")
+    if not regular:
+        return "Helvetica", "Courier"
+
+    pdfmetrics.registerFont(TTFont("SlideSans", regular))
+    pdfmetrics.registerFont(TTFont("SlideSans-Bold", bold or regular))
+    italic = find("DejaVuSans-Oblique.ttf")
+    bold_italic = find("DejaVuSans-BoldOblique.ttf")
+    pdfmetrics.registerFont(TTFont("SlideSans-Italic", italic or regular))
+    pdfmetrics.registerFont(TTFont("SlideSans-BoldItalic", bold_italic or bold or regular))
+    pdfmetrics.registerFontFamily(
+        "SlideSans", normal="SlideSans", bold="SlideSans-Bold",
+        italic="SlideSans-Italic", boldItalic="SlideSans-BoldItalic"
+    )
+
+    mono = find("DejaVuSansMono.ttf")
+    if mono:
+        pdfmetrics.registerFont(TTFont("SlideMono", mono))
+        return "SlideSans", "SlideMono"
+    return "SlideSans", "Courier"
+
+
+@lru_cache(maxsize=1)
+def slide_styles() -> Dict[str, ParagraphStyle]:
+    """Paragraph styles, built once per process."""
+    font, mono = slide_fonts()
+    bold = "SlideSans-Bold" if font == "SlideSans" else "Helvetica-Bold"
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle', parent=styles['Title'], fontName=bold, fontSize=24,
+            textColor='#1a1a1a', spaceAfter=30, alignment=TA_CENTER
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading', parent=styles['Heading1'], fontName=bold, fontSize=18,
+            textColor='#2c3e50', spaceAfter=12, alignment=TA_CENTER
+        ),
+        "subheading": ParagraphStyle(
+            'CustomSubheading', parent=styles['Heading3'], fontName=bold, fontSize=14,
+            textColor='#2c3e50', spaceAfter=8, alignment=TA_LEFT
+        ),
+        "body": ParagraphStyle(
+            'CustomBody', parent=styles['BodyText'], fontName=font, fontSize=12,
+            textColor='#333333', spaceAfter=8, alignment=TA_LEFT
+        ),
+        "code": ParagraphStyle(
+            'CustomCode', parent=styles['Code'], fontName=mono, fontSize=10,
+            leading=13, backColor='#f4f4f4', borderPadding=6, spaceAfter=10
+        ),
+    }
+
+
+def split_slides(deck_markdown: str) -> List[str]:
+    """Split a deck on '---' separator lines, dropping empty slides."""
+    return [slide.strip() for slide in _SLIDE_SEPARATOR.split(deck_markdown) if slide.strip()]
+
+
+def _inline(element) -> str:
+    """Convert an element's content to reportlab paragraph markup."""
+    _, mono = slide_fonts()
+    parts = [escape(element.text or "")]
+    for child in element:
+        inner = _inline(child)
+        if child.tag in _INLINE_TAGS:
+            tag = _INLINE_TAGS[child.tag]
+            parts.append(f"<{tag}>{inner}</{tag}>")
+        elif child.tag == "code":
+            parts.append(f'<font face="{mono}">{inner}</font>')
+        elif child.tag == "a" and child.get("href"):
+            parts.append(f'<a href="{escape(child.get("href"))}" color="blue">{inner}</a>')
+        elif child.tag == "br":
+            parts.append("<br/>")
+        elif child.tag not in ("ul", "ol"):  # Nested lists are handled as blocks
+            parts.append(inner)
+        parts.append(escape(child.tail or ""))
+    return "".join(parts).strip()
+
+
+def _list_flowable(element, styles) -> ListFlowable:
+    items = []
+    for li in element.findall("li"):
+        flowables = []
+        paragraphs = li.findall("p")
+        texts = [_inline(p) for p in paragraphs] if paragraphs else [_inline(li)]
+        flowables.extend(Paragraph(text, styles["body"]) for text in texts if text)
+        for nested in li:
+            if nested.tag in ("ul", "ol"):
+                flowables.append(_list_flowable(nested, styles))
+        items.append(ListItem(flowables or [Paragraph("", styles["body"])]))
+
+    if element.tag == "ol":
+        return ListFlowable(items, bulletType="1", start=element.get("start") or "1", leftIndent=18)
+    return ListFlowable(items, bulletType="bullet", start="•", leftIndent=18)
+
+
+def slide_flowables(slide_markdown: str, is_title: bool) -> list:
+    """Parse one slide's markdown into reportlab flowables."""
+    styles = slide_styles()
+    rendered = markdown.markdown(slide_markdown, extensions=["fenced_code", "sane_lists"])
+    root = lxml_html.fragment_fromstring(rendered, create_parent="div")
+
+    story = []
+    for element in root:
+        tag = element.tag
+        if tag in ("h1", "h2"):
+            story.append(Paragraph(_inline(element), styles["title" if is_title else "heading"]))
+            story.append(Spacer(1, 0.2 * inch))
+        elif tag in ("h3", "h4", "h5", "h6"):
+            story.append(Paragraph(_inline(element), styles["subheading"]))
+        elif tag in ("ul", "ol"):
+            story.append(_list_flowable(element, styles))
+        elif tag == "pre":
+            story.append(Preformatted(element.text_content().rstrip("\n"), styles["code"]))
+        elif tag == "blockquote":
+            for paragraph in element.findall("p") or [element]:
+                story.append(Paragraph(f"<i>{_inline(paragraph)}</i>", styles["body"]))
+        elif tag in ("p", "div"):
+            text = _inline(element)
+            if text:
+                story.append(Paragraph(text, styles["body"]))
+    return story
+
+
+class SlideDeckRenderer:
+    """Renders decks slide by slide with a bounded LRU cache of per-slide PDFs."""
+
+    def __init__(self, max_entries: int = SLIDE_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._slides: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"rendered": 0, "cached": 0}
+
+    @staticmethod
+    def slide_key(slide_markdown: str, is_title: bool) -> str:
+        payload = f"{RENDERER_VERSION}\n{is_title}\n{slide_markdown}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def render_slide(self, slide_markdown: str, is_title: bool = False) -> bytes:
+        """Render one slide to PDF bytes (cached by content)."""
+        key = self.slide_key(slide_markdown, is_title)
+        with self._lock:
+            pdf = self._slides.get(key)
+            if pdf is not None:
+                self._slides.move_to_end(key)
+                self.stats["cached"] += 1
+                return pdf
+
+        buffer = BytesIO()
+        story = slide_flowables(slide_markdown, is_title) or [Spacer(1, 1)]
+        SimpleDocTemplate(buffer, **PAGE_SETTINGS).build(story)
+        pdf = buffer.getvalue()
+
+        with self._lock:
+            self._slides[key] = pdf
+            self.stats["rendered"] += 1
+            while len(self._slides) > self.max_entries:
+                self._slides.popitem(last=False)
+        return pdf
+
+    def render_deck(self, deck_markdown: str) -> bytes:
+        """
+        Render a markdown deck ('---' between slides) into one PDF.
+
+        Returns:
+            PDF bytes, one or more pages per slide
+        """
+        writer = PdfWriter()
+        for index, slide in enumerate(split_slides(deck_markdown)):
+            for page in PdfReader(BytesIO(self.render_slide(slide, is_title=index == 0))).pages:
+                writer.add_page(page)
+
+        buffer = BytesIO()
+        writer.write(buffer)
+        return buffer.getvalue()
+
+    def clear(self):
+        with self._lock:
+            self._slides.clear()
+            self.stats = {"rendered": 0, "cached": 0}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._slides)}
+
+
+# Global instance
+slide_renderer = SlideDeckRenderer()
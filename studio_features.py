@@ -2,35 +2,57 @@
 Studio Features Module
 Implements all Studio button functionality with pop-ups using different OpenRouter models.
 Enhanced with actual file generation: MP3 audio, MP4 video, and PDF slides.
+
+Generated text and media are cached in the artifact store (artifact_store.py), keyed
+on (problem hash, feature, model, prompt version), so reopening a modal for the same
+problem is instant and makes no model calls.
+
+Audio and video renders run on the shared background job queue (job_queue.py), so
+their modals show progress and return immediately instead of blocking the chat.
+Rendered media is returned as MediaOutput (media_output.py): in memory, or a
+memory-mapped temp file for large videos, and only written to OUTPUT_DIR when
+STUDIO_PERSIST_OUTPUTS is enabled.
+
+The media stacks (TTS, Pillow drawing, reportlab/markdown, ffmpeg) are imported
+inside the renderers that use them, so importing this module at app startup
+stays cheap for students who never press a Studio button. TEST/test_import_time.py
+guards this.
 """
 
 import streamlit as st
-from openrouter_client import OpenRouterClient
-from config import OPENROUTER_API_KEY
+from openrouter_client import get_client
+from config import (
+    OPENROUTER_API_KEY, STUDIO_PERSIST_OUTPUTS, STUDIO_PROGRESSIVE_AUDIO,
+    VIDEO_MAX_SEGMENTS, VIDEO_SEGMENT_WORDS, VIDEO_SEGMENT_WORKERS,
+)
+from artifact_store import artifact_store
+from media_output import MediaOutput, new_temp_path
+from managed_outputs import studio_outputs
+from job_queue import Job, get_render_queue, report_progress, DONE, FAILED, CANCELLED
 import json
 import os
 import tempfile
+import threading
+import textwrap
+import time
+import weakref
+from contextlib import closing
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
-
-# Media generation libraries
-from gtts import gTTS
-from moviepy import ImageClip, AudioFileClip, concatenate_videoclips, CompositeVideoClip
-from reportlab.lib.pagesizes import letter
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak
-from reportlab.lib.enums import TA_LEFT, TA_CENTER
-from PIL import Image, ImageDraw, ImageFont
-import markdown
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Tuple
 import re
 
-# Initialize OpenRouter client
-client = OpenRouterClient(api_key=OPENROUTER_API_KEY)
+# Media generation libraries are imported lazily by the renderers below
+if TYPE_CHECKING:
+    from PIL import Image
+    from tts_pipeline import SpeechStream
 
-# Create output directory for generated files
-OUTPUT_DIR = Path("studio_outputs")
-OUTPUT_DIR.mkdir(exist_ok=True)
+# Shared OpenRouter client (same instance as the tutoring engine's)
+client = get_client(OPENROUTER_API_KEY)
+
+# Output directory for persisted files (created on first store)
+OUTPUT_DIR = studio_outputs.root
 
 # Studio-specific models (different from tutoring models)
 STUDIO_MODELS = {
@@ -43,16 +65,20 @@ STUDIO_MODELS = {
     "slidedeck": "anthropic/claude-haiku-4.5:nitro",  # Markdown slides
 }
 
+# Bump a feature's version whenever its prompt changes so cached artifacts are regenerated
+PROMPT_VERSIONS = {
+    "audio": 1,
+    "video": 1,
+    "mindmap": 1,
+    "report": 1,
+    "quiz": 1,
+    "infographic": 1,
+    "slidedeck": 1,
+}
 
-@st.dialog("🎵 Audio Overview", width="large")
-def audio_overview_modal(problem_statement: str):
-    """Generate an MP3 audio file summary of the problem."""
-    st.markdown("### Generating Audio Overview...")
-
-    with st.spinner("Creating audio script and MP3..."):
-        try:
-            # Step 1: Generate script
-            prompt = f"""Create a short, engaging audio script (30-60 seconds when read aloud) that explains this problem:
+# Prompt template and sampling temperature for each feature
+STUDIO_PROMPTS = {
+    "audio": ("""Create a short, engaging audio script (30-60 seconds when read aloud) that explains this problem:
 
 {problem_statement}
 
@@ -62,447 +88,760 @@ The script should:
 3. Mention what approach would be needed (without giving the answer)
 4. Be written in a conversational, easy-to-understand tone
 
-Format as plain text ready to be read aloud (no markdown, no special formatting)."""
-
-            messages = [{"role": "user", "content": prompt}]
-
-            response = client.chat_completion(
-                model=STUDIO_MODELS["audio"],
-                messages=messages,
-                stream=False,
-                temperature=0.7
-            )
+Format as plain text ready to be read aloud (no markdown, no special formatting).""", 0.7),
 
-            script = response["choices"][0]["message"]["content"]
+    "video": ("""Create a concise video script (30-45 seconds) explaining this problem:
 
-            # Clean script for TTS (remove markdown symbols if any)
-            clean_script = re.sub(r'[#*`]', '', script)
+{problem_statement}
 
-            # Step 2: Generate MP3 using gTTS
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            audio_filename = OUTPUT_DIR / f"audio_overview_{timestamp}.mp3"
+Write a clear, educational narration script. Format as plain text (no special formatting).
+Focus on explaining the problem and key concepts without revealing the answer.""", 0.7),
 
-            tts = gTTS(text=clean_script, lang='en', slow=False)
-            tts.save(str(audio_filename))
+    "mindmap": ("""Create a hierarchical mind map structure for this problem:
 
-            st.success("✅ Audio MP3 generated!")
+{problem_statement}
 
-            # Display script
-            st.markdown("### 📝 Script")
-            st.text_area("Audio Script", script, height=200, key="audio_script")
+The mind map should show:
+1. Central topic (the main problem)
+2. Key concepts involved (2nd level)
+3. Sub-concepts and approaches (3rd level)
+4. Connections between concepts
 
-            # Audio player
-            st.markdown("### 🎧 Play Audio")
-            with open(audio_filename, 'rb') as audio_file:
-                audio_bytes = audio_file.read()
-                st.audio(audio_bytes, format='audio/mp3')
+Format as a text-based hierarchical structure using indentation and bullet points.
+Also provide a Mermaid diagram syntax version that can be rendered.""", 0.5),
 
-            # Download button
-            st.download_button(
-                label="⬇️ Download MP3",
-                data=audio_bytes,
-                file_name=f"audio_overview_{timestamp}.mp3",
-                mime="audio/mp3"
-            )
+    "report": ("""Create a detailed educational report about this problem:
 
-        except Exception as e:
-            st.error(f"❌ Error generating audio: {str(e)}")
+{problem_statement}
 
+The report should include:
+1. **Problem Overview**: What is being asked
+2. **Key Concepts**: Important concepts and theories involved
+3. **Approach Strategy**: How to approach this type of problem (general method, not the specific answer)
+4. **Common Pitfalls**: Mistakes students often make
+5. **Related Topics**: Connected concepts worth exploring
+6. **Practice Suggestions**: How to practice similar problems
 
-@st.dialog("🎥 Video Overview", width="large")
-def video_overview_modal(problem_statement: str):
-    """Generate an actual MP4 video with narration."""
-    st.markdown("### Generating Video Overview...")
+Format as a well-structured markdown report with headers, bullet points, and clear sections.
+Include suggestions for where images/diagrams would be helpful (mark as [IMAGE: description]).""", 0.6),
 
-    with st.spinner("Creating video with narration... (this may take 30-60 seconds)"):
-        try:
-            # Step 1: Generate script for video
-            prompt = f"""Create a concise video script (30-45 seconds) explaining this problem:
+    "quiz": ("""Create a 5-question quiz based on this problem:
 
 {problem_statement}
 
-Write a clear, educational narration script. Format as plain text (no special formatting).
-Focus on explaining the problem and key concepts without revealing the answer."""
+Generate exactly 5 multiple-choice questions that test understanding of the concepts involved.
 
-            messages = [{"role": "user", "content": prompt}]
+For each question:
+1. Write a clear question
+2. Provide 4 answer options (A, B, C, D)
+3. Indicate the correct answer
+4. Provide a brief explanation of why the answer is correct
 
-            response = client.chat_completion(
-                model=STUDIO_MODELS["video"],
-                messages=messages,
-                stream=False,
-                temperature=0.7
-            )
+Format as a structured quiz with questions numbered 1-5.""", 0.7),
 
-            script = response["choices"][0]["message"]["content"]
-            clean_script = re.sub(r'[#*`]', '', script)
-
-            # Step 2: Generate audio narration
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            audio_path = OUTPUT_DIR / f"video_audio_{timestamp}.mp3"
-
-            tts = gTTS(text=clean_script, lang='en', slow=False)
-            tts.save(str(audio_path))
-
-            # Step 3: Create simple video frames with text
-            video_path = OUTPUT_DIR / f"video_overview_{timestamp}.mp4"
-
-            # Create a background image with problem text
-            img_width, img_height = 1280, 720
-            background = Image.new('RGB', (img_width, img_height), color=(30, 40, 60))
-            draw = ImageDraw.Draw(background)
-
-            # Add title
-            title_text = "Problem Overview"
-            try:
-                # Try to use a nicer font
-                font_title = ImageFont.truetype("arial.ttf", 60)
-                font_body = ImageFont.truetype("arial.ttf", 32)
-            except:
-                # Fallback to default font
-                font_title = ImageFont.load_default()
-                font_body = ImageFont.load_default()
-
-            # Draw title
-            draw.text((640, 100), title_text, fill=(255, 255, 255), font=font_title, anchor="mm")
-
-            # Draw problem statement (wrapped)
-            problem_lines = problem_statement[:200].split('\n')[:3]  # First 200 chars, max 3 lines
-            y_position = 300
-            for line in problem_lines:
-                draw.text((640, y_position), line[:80], fill=(200, 220, 255), font=font_body, anchor="mm")
-                y_position += 50
-
-            # Save background image
-            img_path = OUTPUT_DIR / f"video_frame_{timestamp}.png"
-            background.save(str(img_path))
-
-            # Step 4: Create video with moviepy
-            audio_clip = AudioFileClip(str(audio_path))
-            duration = audio_clip.duration
-
-            video_clip = ImageClip(str(img_path)).set_duration(duration)
-            final_video = video_clip.set_audio(audio_clip)
-
-            final_video.write_videofile(
-                str(video_path),
-                fps=24,
-                codec='libx264',
-                audio_codec='aac',
-                verbose=False,
-                logger=None
-            )
+    "infographic": ("""Design an infographic layout for this problem:
 
-            # Cleanup temporary files
-            audio_clip.close()
-            final_video.close()
+{problem_statement}
 
-            st.success("✅ Video MP4 generated!")
+Create a structured infographic design that includes:
+1. **Title**: Catchy main title
+2. **Key Stats/Facts**: 3-5 important numbers or facts
+3. **Visual Sections**: 3-4 main sections with:
+   - Section title
+   - Key points (bullet format)
+   - Suggested visual (icon, chart type, diagram)
+4. **Flow/Process**: If applicable, show step-by-step flow
+5. **Color Scheme**: Suggest a color palette
 
-            # Display script
-            st.markdown("### 📝 Video Script")
-            st.text_area("Narration", script, height=150, key="video_script")
+Format as a structured design document that could be given to a graphic designer.""", 0.7),
 
-            # Video player
-            st.markdown("### 🎬 Watch Video")
-            with open(video_path, 'rb') as video_file:
-                video_bytes = video_file.read()
-                st.video(video_bytes)
+    "slidedeck": ("""Create a slide deck presentation about this problem:
 
-            # Download button
-            st.download_button(
-                label="⬇️ Download MP4",
-                data=video_bytes,
-                file_name=f"video_overview_{timestamp}.mp4",
-                mime="video/mp4"
-            )
+{problem_statement}
 
-        except Exception as e:
-            st.error(f"❌ Error generating video: {str(e)}")
+Generate 6-8 slides with:
+1. Title slide
+2. Problem statement slide
+3. Key concepts (2-3 slides)
+4. Approach methodology slide
+5. Practice/Summary slide
+
+For each slide, provide:
+- Slide number and title (use ## for slide titles)
+- Main content (bullet points, max 5 per slide)
 
+Format in markdown with slide separators (---).
+Keep content concise and slide-friendly.""", 0.6),
+}
 
-@st.dialog("🧠 Mind Map", width="large")
-def mindmap_modal(problem_statement: str):
-    """Generate a pipeline overview mind map."""
-    st.markdown("### Generating Mind Map...")
 
-    with st.spinner("Creating mind map..."):
+def studio_artifact_key(feature: str, problem_statement: str):
+    """Artifact store key for a feature's output on a given problem."""
+    return artifact_store.make_key(
+        problem_statement, feature, STUDIO_MODELS[feature], PROMPT_VERSIONS[feature]
+    )
+
+
+def generate_studio_text(feature: str, problem_statement: str) -> str:
+    """
+    Call the feature's model with its prompt and return the generated text.
+
+    Args:
+        feature: Key of STUDIO_MODELS / STUDIO_PROMPTS
+        problem_statement: Current problem
+
+    Returns:
+        Generated text
+    """
+    template, temperature = STUDIO_PROMPTS[feature]
+    messages = [{"role": "user", "content": template.format(problem_statement=problem_statement)}]
+
+    response = client.chat_completion(
+        model=STUDIO_MODELS[feature],
+        messages=messages,
+        stream=False,
+        temperature=temperature
+    )
+
+    return response["choices"][0]["message"]["content"]
+
+
+def stream_studio_text(feature: str, problem_statement: str, timing: Optional[Dict] = None) -> Iterator[str]:
+    """
+    Stream a feature's text through the client's streaming path, for
+    incremental display with st.write_stream. The finished text is cached in
+    the artifact store; cached text is yielded in one piece.
+
+    Args:
+        feature: Key of STUDIO_MODELS / STUDIO_PROMPTS
+        problem_statement: Current problem
+        timing: Optional dict filled with "ttft" (seconds to first content
+            token), "total" (seconds to the full text) and "cached"
+
+    Yields:
+        Text chunks as they arrive
+    """
+    timing = timing if timing is not None else {}
+    started = time.perf_counter()
+    key = studio_artifact_key(feature, problem_statement)
+
+    def finish(cached: bool):
+        elapsed = time.perf_counter() - started
+        timing.setdefault("ttft", elapsed)
+        timing.update(total=elapsed, cached=cached)
+
+    artifact = artifact_store.get(key)
+    if artifact and "text" in artifact:
+        finish(cached=True)
+        yield artifact["text"]
+        return
+
+    build_lock = build_lock_for(key)
+
+    if not build_lock.acquire(blocking=False):
+        # A "generate all" batch (or another session) is already generating it
+        text = ensure_studio_text(feature, problem_statement)["text"]
+        finish(cached=True)
+        yield text
+        return
+
+    try:
+        artifact = artifact_store.get(key)
+        if artifact and "text" in artifact:
+            finish(cached=True)
+            yield artifact["text"]
+            return
+
+        template, temperature = STUDIO_PROMPTS[feature]
+        messages = [{"role": "user", "content": template.format(problem_statement=problem_statement)}]
+        parts = []
+        with closing(client.chat_completion(
+            model=STUDIO_MODELS[feature],
+            messages=messages,
+            stream=True,
+            temperature=temperature
+        )) as stream:
+            for chunk in stream:
+                if "choices" in chunk and len(chunk["choices"]) > 0:
+                    content = chunk["choices"][0].get("delta", {}).get("content", "")
+                    if content:
+                        timing.setdefault("ttft", time.perf_counter() - started)
+                        parts.append(content)
+                        yield content
+
+        # Only complete responses are cached (a closed dialog stops the stream)
+        text = "".join(parts)
+        artifact_store.update(key, text=text)
+        finish(cached=False)
+    finally:
+        build_lock.release()
+
+
+# In-flight audio narrations by artifact key, shared by the progressive modal
+# and render_audio so the same script is never synthesized twice at once
+_audio_streams: Dict[tuple, "SpeechStream"] = {}
+_audio_streams_lock = threading.Lock()
+
+
+def stream_studio_audio(script: str, problem_statement: str) -> "SpeechStream":
+    """
+    Start (or join the in-flight) sentence-by-sentence narration of an audio
+    script. The returned stream can be played progressively as it fills.
+    """
+    from tts_pipeline import stream_speech
+
+    key = studio_artifact_key("audio", problem_statement)
+
+    with _audio_streams_lock:
+        stream = _audio_streams.get(key)
+        if stream is not None and stream.error is None:
+            return stream
+        # Clean script for TTS (remove markdown symbols if any)
+        stream = stream_speech(re.sub(r'[#*`]', '', script))
+        _audio_streams[key] = stream
+
+    def forget(finished: "SpeechStream"):
+        with _audio_streams_lock:
+            if _audio_streams.get(key) is finished:
+                del _audio_streams[key]
+
+    stream.add_done_callback(forget)
+    return stream
+
+
+def persist_output(output: MediaOutput, kind: str) -> MediaOutput:
+    """
+    Keep a copy in the managed OUTPUT_DIR (content-hash name, quota-bounded)
+    when STUDIO_PERSIST_OUTPUTS is enabled.
+    """
+    if STUDIO_PERSIST_OUTPUTS:
+        studio_outputs.store(output, kind, Path(output.file_name).suffix.lstrip("."))
+    return output
+
+
+def speech_output(stream: "SpeechStream") -> MediaOutput:
+    """The finished narration of a speech stream as an in-memory MP3."""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_name = f"audio_overview_{timestamp}.mp3"
+    return persist_output(MediaOutput.from_bytes(stream.result(), file_name, "audio/mp3"), "audio_overview")
+
+
+def render_audio(script: str, problem_statement: str) -> MediaOutput:
+    """Synthesize the audio script to an in-memory MP3."""
+    report_progress(0.05, "Synthesizing narration")
+    stream = stream_studio_audio(script, problem_statement)
+    ready = 0
+    while ready < stream.total:
+        ready += len(stream.segments(ready))
+        report_progress(0.05 + 0.9 * ready / stream.total, f"Narrated sentence {ready}/{stream.total}")
+
+    return speech_output(stream)
+
+
+def split_narration_segments(script: str, target_words: int = VIDEO_SEGMENT_WORDS,
+                             max_segments: int = VIDEO_MAX_SEGMENTS) -> List[str]:
+    """
+    Split a narration script into slide-sized segments at sentence boundaries.
+
+    Args:
+        script: Plain-text narration
+        target_words: Approximate words per segment (~15s of speech for 40)
+        max_segments: Upper bound on segments; longer scripts get longer segments
+
+    Returns:
+        List of non-empty segment texts
+    """
+    from tts_pipeline import split_sentences
+
+    sentences = split_sentences(script)
+    total_words = sum(len(sentence.split()) for sentence in sentences)
+    target_words = max(target_words, -(-total_words // max_segments))
+
+    segments, current, current_words = [], [], 0
+    for sentence in sentences:
+        current.append(sentence)
+        current_words += len(sentence.split())
+        if current_words >= target_words:
+            segments.append(" ".join(current))
+            current, current_words = [], 0
+    if current:
+        segments.append(" ".join(current))
+    return segments
+
+
+def _load_font(size: int):
+    from PIL import ImageFont
+
+    for font_name in ("arial.ttf", "DejaVuSans.ttf"):
         try:
-            prompt = f"""Create a hierarchical mind map structure for this problem:
+            return ImageFont.truetype(font_name, size)
+        except OSError:
+            continue
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1
+        return ImageFont.load_default()
 
-{problem_statement}
 
-The mind map should show:
-1. Central topic (the main problem)
-2. Key concepts involved (2nd level)
-3. Sub-concepts and approaches (3rd level)
-4. Connections between concepts
+def draw_video_frame(title: str, body: str, footer: str = "") -> "Image.Image":
+    """Draw a 1280x720 slide frame with a title, wrapped body text and a footer."""
+    from PIL import Image, ImageDraw
 
-Format as a text-based hierarchical structure using indentation and bullet points.
-Also provide a Mermaid diagram syntax version that can be rendered."""
+    img_width, img_height = 1280, 720
+    background = Image.new('RGB', (img_width, img_height), color=(30, 40, 60))
+    draw = ImageDraw.Draw(background)
+    font_title = _load_font(60)
+    font_body = _load_font(32)
 
-            messages = [{"role": "user", "content": prompt}]
+    draw.text((640, 100), title, fill=(255, 255, 255), font=font_title, anchor="mm")
 
-            response = client.chat_completion(
-                model=STUDIO_MODELS["mindmap"],
-                messages=messages,
-                stream=False,
-                temperature=0.5
-            )
+    y_position = 220
+    for line in textwrap.wrap(body, width=60)[:10]:
+        draw.text((640, y_position), line, fill=(200, 220, 255), font=font_body, anchor="mm")
+        y_position += 46
 
-            mindmap = response["choices"][0]["message"]["content"]
+    if footer:
+        draw.text((640, 670), footer, fill=(140, 150, 170), font=_load_font(24), anchor="mm")
+    return background
 
-            st.success("✅ Mind map generated!")
-            st.markdown("### 🗺️ Mind Map Structure")
-            st.markdown(mindmap)
 
-            st.info("💡 **Tip:** Copy the Mermaid diagram syntax and paste it into a Mermaid live editor to visualize.")
+def _render_video_segment(index: int, count: int, text: str, problem_statement: str, workdir: Path) -> Path:
+    """Narrate, draw and encode one segment of the video. Returns the segment MP4 path."""
+    from tts_pipeline import synthesize_speech
+    from video_encoder import encode_still_video
 
-        except Exception as e:
-            st.error(f"❌ Error generating mind map: {str(e)}")
+    audio_path = workdir / f"segment_{index:03d}.mp3"
+    audio_path.write_bytes(synthesize_speech(text))
 
+    if index == 0:
+        # Title slide shows the problem itself
+        frame = draw_video_frame("Problem Overview", problem_statement[:400], f"1 / {count}")
+    else:
+        frame = draw_video_frame(f"Part {index + 1}", text, f"{index + 1} / {count}")
+    frame_path = workdir / f"segment_{index:03d}.png"
+    frame.save(str(frame_path))
 
-@st.dialog("📝 Reports", width="large")
-def report_modal(problem_statement: str):
-    """Generate a detailed report on the topic with structured sections."""
-    st.markdown("### Generating Detailed Report...")
+    return encode_still_video(frame_path, audio_path, workdir / f"segment_{index:03d}.mp4")
 
-    with st.spinner("Creating comprehensive report..."):
-        try:
-            prompt = f"""Create a detailed educational report about this problem:
 
-{problem_statement}
+def render_video(script: str, problem_statement: str) -> MediaOutput:
+    """
+    Render a slide-synchronized narrated MP4 (memory-mapped if large).
 
-The report should include:
-1. **Problem Overview**: What is being asked
-2. **Key Concepts**: Important concepts and theories involved
-3. **Approach Strategy**: How to approach this type of problem (general method, not the specific answer)
-4. **Common Pitfalls**: Mistakes students often make
-5. **Related Topics**: Connected concepts worth exploring
-6. **Practice Suggestions**: How to practice similar problems
+    The script is split into segments, each with its own narration and frame.
+    Segments are synthesized and encoded in parallel, then concatenated
+    without re-encoding.
+    """
+    from video_encoder import concat_videos
 
-Format as a well-structured markdown report with headers, bullet points, and clear sections.
-Include suggestions for where images/diagrams would be helpful (mark as [IMAGE: description])."""
+    clean_script = re.sub(r'[#*`]', '', script)
+    segments = split_narration_segments(clean_script)
 
-            messages = [{"role": "user", "content": prompt}]
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_name = f"video_overview_{timestamp}.mp4"
+    video_path = new_temp_path(".mp4")
 
-            response = client.chat_completion(
-                model=STUDIO_MODELS["report"],
-                messages=messages,
-                stream=False,
-                temperature=0.6
-            )
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(tmp)
+        report_progress(0.05, f"Rendering {len(segments)} segments")
 
-            report = response["choices"][0]["message"]["content"]
+        with ThreadPoolExecutor(max_workers=VIDEO_SEGMENT_WORKERS) as pool:
+            futures = {
+                pool.submit(_render_video_segment, i, len(segments), text, problem_statement, workdir): i
+                for i, text in enumerate(segments)
+            }
+            segment_paths = [None] * len(segments)
+            for done, future in enumerate(as_completed(futures), start=1):
+                segment_paths[futures[future]] = future.result()
+                report_progress(0.05 + 0.85 * done / len(segments), f"Rendered segment {done}/{len(segments)}")
 
-            st.success("✅ Report generated!")
-            st.markdown("### 📄 Detailed Report")
-            st.markdown(report)
+        report_progress(0.95, "Joining segments")
+        concat_videos(segment_paths, video_path)
 
-            st.info("💡 **Tip:** [IMAGE: ...] markers indicate where diagrams would enhance understanding.")
-
-        except Exception as e:
-            st.error(f"❌ Error generating report: {str(e)}")
+    return persist_output(MediaOutput.from_file(video_path, file_name, "video/mp4"), "video_overview")
 
 
-@st.dialog("📑 Quiz", width="large")
-def quiz_modal(problem_statement: str):
-    """Generate 5 questions with answers."""
-    st.markdown("### Generating Quiz...")
+def render_slides(slides_content: str, problem_statement: str) -> MediaOutput:
+    """Render markdown slides ('---' separated) into an in-memory PDF."""
+    from slide_renderer import slide_renderer
 
-    with st.spinner("Creating quiz questions..."):
-        try:
-            prompt = f"""Create a 5-question quiz based on this problem:
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_name = f"slides_{timestamp}.pdf"
+    pdf_bytes = slide_renderer.render_deck(slides_content)
+    return persist_output(MediaOutput.from_bytes(pdf_bytes, file_name, "application/pdf"), "slides")
 
-{problem_statement}
 
-Generate exactly 5 multiple-choice questions that test understanding of the concepts involved.
+# Features that produce a media file in addition to text
+MEDIA_RENDERERS = {
+    "audio": render_audio,
+    "video": render_video,
+    "slidedeck": render_slides,
+}
 
-For each question:
-1. Write a clear question
-2. Provide 4 answer options (A, B, C, D)
-3. Indicate the correct answer
-4. Provide a brief explanation of why the answer is correct
+# Renders slow enough that the modal hands them to the background job queue.
+# Progressive audio stays in-process so the modal can play it as it fills.
+BACKGROUND_RENDERS = {"video"} if STUDIO_PROGRESSIVE_AUDIO else {"audio", "video"}
+
+
+# One lock per artifact key so a modal opened while the batch pipeline is
+# building the same artifact waits for it instead of generating it twice.
+# Weak values: a key's lock is dropped once no build holds it.
+_build_locks: "weakref.WeakValueDictionary[tuple, threading.Lock]" = weakref.WeakValueDictionary()
+_build_locks_guard = threading.Lock()
+
+
+def build_lock_for(key: tuple) -> threading.Lock:
+    """The build lock of an artifact key (keep a reference while using it)."""
+    with _build_locks_guard:
+        lock = _build_locks.get(key)
+        if lock is None:
+            lock = _build_locks[key] = threading.Lock()
+        return lock
+
+# In-flight render jobs by artifact key, so every caller shares one render
+_render_jobs: Dict[tuple, Job] = {}
+_render_jobs_lock = threading.Lock()
+
+
+def submit_studio_render(feature: str, problem_statement: str, text: str, retry: bool = True) -> Job:
+    """
+    Queue a media render on the shared job queue, reusing an in-flight job for
+    the same artifact. The finished media is written to the artifact store.
+
+    Args:
+        feature: Key of MEDIA_RENDERERS
+        problem_statement: Current problem
+        text: Generated script/markdown to render
+        retry: Resubmit if the last job failed or was cancelled (otherwise return it)
+
+    Returns:
+        Job handle for progress polling, cancellation and the MediaOutput result
+    """
+    key = studio_artifact_key(feature, problem_statement)
+
+    with _render_jobs_lock:
+        job = _render_jobs.get(key)
+        if job is not None and (not retry or job.state not in (FAILED, CANCELLED)):
+            return job
+
+        job = get_render_queue().submit(MEDIA_RENDERERS[feature], text, problem_statement)
+        _render_jobs[key] = job
+
+    def store_result(finished: Job):
+        if finished.state == DONE:
+            artifact_store.update(key, media=finished.result())
+        with _render_jobs_lock:
+            if _render_jobs.get(key) is finished and finished.state == DONE:
+                del _render_jobs[key]
+
+    job.add_done_callback(store_result)
+    return job
+
+
+def ensure_studio_text(feature: str, problem_statement: str) -> Dict:
+    """
+    Return the cached artifact for a feature, generating its text if needed
+    (media is left as-is).
+    """
+    key = studio_artifact_key(feature, problem_statement)
+    build_lock = build_lock_for(key)
+
+    with build_lock:
+        artifact = dict(artifact_store.get(key) or {})
+        if "text" not in artifact:
+            artifact["text"] = generate_studio_text(feature, problem_statement)
+            artifact_store.put(key, artifact)
+    return artifact
+
+
+def request_studio_artifact(feature: str, problem_statement: str) -> Tuple[Dict, Optional[Job]]:
+    """
+    Non-blocking variant of build_studio_artifact for the modals: generates the
+    text if needed, but queues slow media renders instead of waiting for them.
+
+    Returns:
+        (artifact so far, render job or None if nothing is pending)
+    """
+    artifact = ensure_studio_text(feature, problem_statement)
+
+    if feature in BACKGROUND_RENDERS and "media" not in artifact:
+        # Don't silently restart a render the student cancelled; the modal offers a retry
+        job = submit_studio_render(feature, problem_statement, artifact["text"], retry=False)
+        if job.state != DONE:
+            return artifact, job
+        artifact["media"] = job.result()
+    if feature in MEDIA_RENDERERS and "media" not in artifact:
+        return build_studio_artifact(feature, problem_statement), None
+    return artifact, None
+
+
+def build_studio_artifact(feature: str, problem_statement: str, background: bool = False) -> Dict:
+    """
+    Return the complete artifact for a feature, generating only what isn't cached.
+
+    Args:
+        feature: Key of STUDIO_MODELS
+        problem_statement: Current problem
+        background: Render BACKGROUND_RENDERS media on the shared job queue
+            instead of this thread (see studio_pipeline.py)
+
+    Returns:
+        Artifact dict with "text" and, for media features, "media" (a MediaOutput)
+    """
+    key = studio_artifact_key(feature, problem_statement)
+    build_lock = build_lock_for(key)
+
+    job, narrate = None, False
+    with build_lock:
+        artifact = dict(artifact_store.get(key) or {})
+
+        if "text" not in artifact:
+            artifact["text"] = generate_studio_text(feature, problem_statement)
+            artifact_store.put(key, artifact)
+
+        if feature in MEDIA_RENDERERS and "media" not in artifact:
+            if background and feature in BACKGROUND_RENDERS:
+                job = submit_studio_render(feature, problem_statement, artifact["text"])
+            elif feature == "audio":
+                narrate = True
+            else:
+                artifact["media"] = MEDIA_RENDERERS[feature](artifact["text"], problem_statement)
+                artifact_store.put(key, artifact)
+
+    # Wait outside the lock so a modal can pick up the same job and show progress
+    if job is not None:
+        artifact["media"] = job.result()
+
+    # Narrate outside the lock too: the audio modal only needs the script, then
+    # plays the same in-flight SpeechStream (render_audio joins it)
+    if narrate:
+        artifact["media"] = MEDIA_RENDERERS[feature](artifact["text"], problem_statement)
+        artifact_store.update(key, media=artifact["media"])
+
+    return artifact
+
+
+def render_job_progress(job: Job, feature: str, problem_statement: str, script: str):
+    """
+    Show a pending render's progress with refresh/cancel (or retry) buttons. The
+    dialog returns right away; the render keeps going if the dialog is closed.
+    """
+    status = job.status()
+    left_col, right_col = st.columns(2)
+
+    if status["state"] in (FAILED, CANCELLED):
+        if status["state"] == FAILED:
+            st.error(f"❌ Error generating {feature}: {status['error']}")
+        else:
+            st.warning(f"{feature.capitalize()} rendering was cancelled.")
+
+        with left_col:
+            if st.button("🔁 Retry", key=f"{job.id}_retry", use_container_width=True):
+                submit_studio_render(feature, problem_statement, script)
+                st.rerun(scope="fragment")
+        return
+
+    st.progress(status["progress"], text=status["message"] or f"Waiting for a free {feature} renderer...")
+    st.caption("Rendering in the background - you can close this window and keep chatting.")
+
+    with left_col:
+        st.button("🔄 Check progress", key=f"{job.id}_refresh", use_container_width=True)  # Click re-runs the dialog
+    with right_col:
+        if st.button("⏹️ Cancel", key=f"{job.id}_cancel", use_container_width=True):
+            job.cancel()
+            st.rerun(scope="fragment")
+
+
+def play_speech_stream(stream: "SpeechStream"):
+    """
+    Show the narration as it is synthesized: each run of newly finished
+    sentences becomes its own player, so listening starts after the first one.
+    """
+    played, part = 0, 1
+    while played < stream.total:
+        segments = stream.segments(played)
+        if not segments:
+            break
+        if part > 1 or played + len(segments) < stream.total:
+            st.caption(f"Part {part}")
+        st.audio(b"".join(segments), format='audio/mp3')
+        played += len(segments)
+        part += 1
 
-Format as a structured quiz with questions numbered 1-5."""
 
-            messages = [{"role": "user", "content": prompt}]
+@st.dialog("🎵 Audio Overview", width="large")
+def audio_overview_modal(problem_statement: str):
+    """Generate an MP3 audio file summary of the problem."""
+    st.markdown("### Generating Audio Overview...")
 
-            response = client.chat_completion(
-                model=STUDIO_MODELS["quiz"],
-                messages=messages,
-                stream=False,
-                temperature=0.7
+    try:
+        with st.spinner("Creating audio script..."):
+            artifact = ensure_studio_text("audio", problem_statement)
+        script = artifact["text"]
+
+        stream, job = None, None
+        if "media" not in artifact and STUDIO_PROGRESSIVE_AUDIO:
+            stream = stream_studio_audio(script, problem_statement)
+        else:
+            artifact, job = request_studio_artifact("audio", problem_statement)
+
+        # Display script
+        st.markdown("### 📝 Script")
+        st.text_area("Audio Script", script, height=200, key="audio_script")
+
+        if job is not None:
+            render_job_progress(job, "audio", problem_statement, script)
+            return
+
+        # Audio player
+        st.markdown("### 🎧 Play Audio")
+        if stream is not None:
+            play_speech_stream(stream)
+            artifact["media"] = speech_output(stream)
+            artifact_store.update(studio_artifact_key("audio", problem_statement), media=artifact["media"])
+            st.caption(
+                f"⚡ First audio after {stream.time_to_first_audio:.1f}s "
+                f"(full narration ready after {stream.total_time:.1f}s)"
             )
+        else:
+            st.audio(artifact["media"].getvalue(), format='audio/mp3')
 
-            quiz = response["choices"][0]["message"]["content"]
+        st.success("✅ Audio MP3 generated!")
 
-            st.success("✅ Quiz generated!")
-            st.markdown("### ❓ Quiz Questions")
-            st.markdown(quiz)
+        # Download button
+        st.download_button(
+            label="⬇️ Download MP3",
+            data=artifact["media"].getvalue(),
+            file_name=artifact["media"].file_name,
+            mime="audio/mp3"
+        )
 
-            st.info("💡 **Tip:** Use this quiz to test your understanding before moving on.")
-
-        except Exception as e:
-            st.error(f"❌ Error generating quiz: {str(e)}")
+    except Exception as e:
+        st.error(f"❌ Error generating audio: {str(e)}")
 
 
-@st.dialog("📊 Infographic", width="large")
-def infographic_modal(problem_statement: str):
-    """Generate infographic data structure."""
-    st.markdown("### Generating Infographic Design...")
+@st.dialog("🎥 Video Overview", width="large")
+def video_overview_modal(problem_statement: str):
+    """Generate an actual MP4 video with narration."""
+    st.markdown("### Generating Video Overview...")
 
-    with st.spinner("Creating infographic layout..."):
+    with st.spinner("Creating video script..."):
         try:
-            prompt = f"""Design an infographic layout for this problem:
+            artifact, job = request_studio_artifact("video", problem_statement)
+            script = artifact["text"]
 
-{problem_statement}
+            if job is not None:
+                st.markdown("### 📝 Video Script")
+                st.text_area("Narration", script, height=150, key="video_script")
+                render_job_progress(job, "video", problem_statement, script)
+                return
 
-Create a structured infographic design that includes:
-1. **Title**: Catchy main title
-2. **Key Stats/Facts**: 3-5 important numbers or facts
-3. **Visual Sections**: 3-4 main sections with:
-   - Section title
-   - Key points (bullet format)
-   - Suggested visual (icon, chart type, diagram)
-4. **Flow/Process**: If applicable, show step-by-step flow
-5. **Color Scheme**: Suggest a color palette
+            video_bytes = artifact["media"].getvalue()
 
-Format as a structured design document that could be given to a graphic designer."""
+            st.success("✅ Video MP4 generated!")
 
-            messages = [{"role": "user", "content": prompt}]
+            # Display script
+            st.markdown("### 📝 Video Script")
+            st.text_area("Narration", script, height=150, key="video_script")
+
+            # Video player
+            st.markdown("### 🎬 Watch Video")
+            st.video(video_bytes)
 
-            response = client.chat_completion(
-                model=STUDIO_MODELS["infographic"],
-                messages=messages,
-                stream=False,
-                temperature=0.7
+            # Download button
+            st.download_button(
+                label="⬇️ Download MP4",
+                data=video_bytes,
+                file_name=artifact["media"].file_name,
+                mime="video/mp4"
             )
 
-            infographic = response["choices"][0]["message"]["content"]
+        except Exception as e:
+            st.error(f"❌ Error generating video: {str(e)}")
+
 
-            st.success("✅ Infographic design generated!")
-            st.markdown("### 🎨 Infographic Design")
-            st.markdown(infographic)
+def render_streamed_text(feature: str, problem_statement: str, heading: str) -> str:
+    """
+    Show a text-only Studio feature as it streams in (markdown rendered
+    incrementally), then its time-to-first-token. Returns the full text.
+    """
+    st.markdown(heading)
+    timing = {}
+    text = st.write_stream(stream_studio_text(feature, problem_statement, timing))
+    if not timing.get("cached"):
+        st.caption(f"⚡ First token after {timing['ttft']:.1f}s (complete after {timing['total']:.1f}s)")
+    return text
 
-            st.info("💡 **Tip:** Use this design with tools like Canva, Figma, or Adobe Illustrator.")
 
-        except Exception as e:
-            st.error(f"❌ Error generating infographic: {str(e)}")
+@st.dialog("🧠 Mind Map", width="large")
+def mindmap_modal(problem_statement: str):
+    """Generate a pipeline overview mind map."""
+    st.markdown("### Generating Mind Map...")
 
+    try:
+        render_streamed_text("mindmap", problem_statement, "### 🗺️ Mind Map Structure")
+        st.success("✅ Mind map generated!")
 
-@st.dialog("🎯 Slide Deck", width="large")
-def slidedeck_modal(problem_statement: str):
-    """Generate PDF presentation slides."""
-    st.markdown("### Generating Slide Deck PDF...")
+        st.info("💡 **Tip:** Copy the Mermaid diagram syntax and paste it into a Mermaid live editor to visualize.")
 
-    with st.spinner("Creating presentation slides and PDF..."):
-        try:
-            # Step 1: Generate slide content
-            prompt = f"""Create a slide deck presentation about this problem:
+    except Exception as e:
+        st.error(f"❌ Error generating mind map: {str(e)}")
 
-{problem_statement}
 
-Generate 6-8 slides with:
-1. Title slide
-2. Problem statement slide
-3. Key concepts (2-3 slides)
-4. Approach methodology slide
-5. Practice/Summary slide
+@st.dialog("📝 Reports", width="large")
+def report_modal(problem_statement: str):
+    """Generate a detailed report on the topic with structured sections."""
+    st.markdown("### Generating Detailed Report...")
 
-For each slide, provide:
-- Slide number and title (use ## for slide titles)
-- Main content (bullet points, max 5 per slide)
+    try:
+        render_streamed_text("report", problem_statement, "### 📄 Detailed Report")
+        st.success("✅ Report generated!")
 
-Format in markdown with slide separators (---).
-Keep content concise and slide-friendly."""
+        st.info("💡 **Tip:** [IMAGE: ...] markers indicate where diagrams would enhance understanding.")
 
-            messages = [{"role": "user", "content": prompt}]
+    except Exception as e:
+        st.error(f"❌ Error generating report: {str(e)}")
 
-            response = client.chat_completion(
-                model=STUDIO_MODELS["slidedeck"],
-                messages=messages,
-                stream=False,
-                temperature=0.6
-            )
 
-            slides_content = response["choices"][0]["message"]["content"]
+@st.dialog("📑 Quiz", width="large")
+def quiz_modal(problem_statement: str):
+    """Generate 5 questions with answers."""
+    st.markdown("### Generating Quiz...")
 
-            # Step 2: Parse slides and create PDF
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            pdf_path = OUTPUT_DIR / f"slides_{timestamp}.pdf"
+    try:
+        render_streamed_text("quiz", problem_statement, "### ❓ Quiz Questions")
+        st.success("✅ Quiz generated!")
 
-            # Create PDF
-            doc = SimpleDocTemplate(
-                str(pdf_path),
-                pagesize=letter,
-                rightMargin=72,
-                leftMargin=72,
-                topMargin=72,
-                bottomMargin=18
-            )
+        st.info("💡 **Tip:** Use this quiz to test your understanding before moving on.")
 
-            # Define styles
-            styles = getSampleStyleSheet()
-            title_style = ParagraphStyle(
-                'CustomTitle',
-                parent=styles['Title'],
-                fontSize=24,
-                textColor='#1a1a1a',
-                spaceAfter=30,
-                alignment=TA_CENTER
-            )
-            heading_style = ParagraphStyle(
-                'CustomHeading',
-                parent=styles['Heading1'],
-                fontSize=18,
-                textColor='#2c3e50',
-                spaceAfter=12,
-                alignment=TA_CENTER
-            )
-            body_style = ParagraphStyle(
-                'CustomBody',
-                parent=styles['BodyText'],
-                fontSize=12,
-                textColor='#333333',
-                spaceAfter=8,
-                alignment=TA_LEFT
-            )
+    except Exception as e:
+        st.error(f"❌ Error generating quiz: {str(e)}")
+
+
+@st.dialog("📊 Infographic", width="large")
+def infographic_modal(problem_statement: str):
+    """Generate infographic data structure."""
+    st.markdown("### Generating Infographic Design...")
+
+    try:
+        render_streamed_text("infographic", problem_statement, "### 🎨 Infographic Design")
+        st.success("✅ Infographic design generated!")
+
+        st.info("💡 **Tip:** Use this design with tools like Canva, Figma, or Adobe Illustrator.")
+
+    except Exception as e:
+        st.error(f"❌ Error generating infographic: {str(e)}")
+
+
+@st.dialog("🎯 Slide Deck", width="large")
+def slidedeck_modal(problem_statement: str):
+    """Generate PDF presentation slides."""
+    st.markdown("### Generating Slide Deck PDF...")
 
-            # Build PDF content
-            story = []
-
-            # Split slides by separator
-            slide_sections = slides_content.split('---')
-
-            for i, slide in enumerate(slide_sections):
-                if slide.strip():
-                    # Parse slide content
-                    lines = slide.strip().split('\n')
-
-                    for line in lines:
-                        line = line.strip()
-                        if line.startswith('##'):
-                            # Slide title
-                            title = line.replace('##', '').strip()
-                            if i == 0:
-                                story.append(Paragraph(title, title_style))
-                            else:
-                                story.append(Paragraph(title, heading_style))
-                            story.append(Spacer(1, 0.2*inch))
-                        elif line.startswith('-') or line.startswith('*'):
-                            # Bullet point
-                            content = line.lstrip('-*').strip()
-                            story.append(Paragraph(f"• {content}", body_style))
-                        elif line and not line.startswith('#'):
-                            # Regular text
-                            story.append(Paragraph(line, body_style))
-
-                    # Page break between slides
-                    if i < len(slide_sections) - 1:
-                        story.append(PageBreak())
-
-            # Build PDF
-            doc.build(story)
+    with st.spinner("Creating presentation slides and PDF..."):
+        try:
+            artifact = build_studio_artifact("slidedeck", problem_statement)
+            slides_content = artifact["text"]
 
             st.success("✅ Slide deck PDF generated!")
 
@@ -512,14 +851,12 @@ Keep content concise and slide-friendly."""
 
             # PDF download
             st.markdown("### 📥 Download PDF")
-            with open(pdf_path, 'rb') as pdf_file:
-                pdf_bytes = pdf_file.read()
-                st.download_button(
-                    label="⬇️ Download Slide Deck PDF",
-                    data=pdf_bytes,
-                    file_name=f"slides_{timestamp}.pdf",
-                    mime="application/pdf"
-                )
+            st.download_button(
+                label="⬇️ Download Slide Deck PDF",
+                data=artifact["media"].getvalue(),
+                file_name=artifact["media"].file_name,
+                mime="application/pdf"
+            )
 
             st.info("💡 **Tip:** Open the PDF in any PDF reader or import into PowerPoint/Google Slides.")
 
@@ -0,0 +1,110 @@
+"""
+One-click "generate all" pipeline for Studio artifacts.
+
+Students usually open several Studio panels in a row, and each one used to
+block on its own model call plus media rendering. This pipeline fires every
+STUDIO_MODELS prompt concurrently as soon as setup completes, hands each media
+feature to the shared render job queue (job_queue.py) the moment its script
+arrives, and fills the artifact store. Panels then open pre-computed, and total
+wall time is bounded by the slowest single artifact (its text + render chain)
+rather than the sum.
+
+The text pool and the render queue are module-level, so concurrent sessions
+share the same bounded number of model calls and render processes.
+"""
+
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from typing import Dict, List, Optional
+
+from config import STUDIO_TEXT_WORKERS
+import studio_features
+
+_text_pool = ThreadPoolExecutor(max_workers=STUDIO_TEXT_WORKERS, thread_name_prefix="studio-text")
+
+
+class StudioBatch:
+    """Handle for one "generate all" run: per-feature futures plus timings."""
+
+    def __init__(self, problem_statement: str, futures: Dict[str, Future], started_at: float):
+        self.problem_statement = problem_statement
+        self.futures = futures
+        self.started_at = started_at
+        self.timings: Dict[str, float] = {}
+
+        for feature, future in futures.items():
+            future.add_done_callback(
+                lambda _, feature=feature: self.timings.__setitem__(feature, time.perf_counter() - self.started_at)
+            )
+
+    def status(self) -> Dict[str, str]:
+        """
+        Per-feature status.
+
+        Returns:
+            Dict mapping feature to "running", "ready" or "failed"
+        """
+        statuses = {}
+        for feature, future in self.futures.items():
+            if not future.done():
+                statuses[feature] = "running"
+            elif future.exception() is not None:
+                statuses[feature] = "failed"
+            else:
+                statuses[feature] = "ready"
+        return statuses
+
+    def done(self) -> bool:
+        return all(future.done() for future in self.futures.values())
+
+    def wait(self, timeout: Optional[float] = None) -> Dict[str, Dict]:
+        """
+        Block until every artifact is finished (or timeout).
+
+        Returns:
+            Dict mapping feature to its artifact, or to {"error": message}
+        """
+        wait(list(self.futures.values()), timeout=timeout)
+        results = {}
+        for feature, future in self.futures.items():
+            if not future.done():
+                continue
+            error = future.exception()
+            results[feature] = {"error": str(error)} if error else future.result()
+        return results
+
+    def wall_time(self) -> float:
+        """Seconds from start until the last artifact finished."""
+        return max(self.timings.values(), default=0.0)
+
+
+def start_studio_batch(problem_statement: str, features: Optional[List[str]] = None) -> StudioBatch:
+    """
+    Start generating every Studio artifact for a problem in the background.
+
+    Args:
+        problem_statement: Current problem
+        features: Subset of STUDIO_MODELS keys (defaults to all)
+
+    Returns:
+        StudioBatch handle for status polling
+    """
+    features = features or list(studio_features.STUDIO_MODELS)
+    started_at = time.perf_counter()
+    futures = {
+        feature: _text_pool.submit(
+            studio_features.build_studio_artifact, feature, problem_statement, True
+        )
+        for feature in features
+    }
+    return StudioBatch(problem_statement, futures, started_at)
+
+
+def generate_all_artifacts(problem_statement: str, features: Optional[List[str]] = None) -> Dict[str, Dict]:
+    """
+    Generate every Studio artifact concurrently and wait for all of them.
+
+    Returns:
+        Dict mapping feature to its artifact, or to {"error": message}
+    """
+    return start_studio_batch(problem_statement, features).wait()
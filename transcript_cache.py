@@ -0,0 +1,300 @@
+"""
+Persistent YouTube transcript cache.
+
+YouTubeExtractor.get_transcript used to call YouTube on every "Start Tutoring"
+click, even when a whole class loads the same lecture. Transcripts are now
+cached in SQLite keyed by (video id, requested languages):
+
+- the timed segments are kept, not just the joined text, in a compact
+  columnar form (Transcript): start and duration arrays plus offsets into a
+  single text buffer, zlib-compressed - a fraction of the size of the
+  list-of-dicts JSON the API returns
+- entries expire after TRANSCRIPT_CACHE_TTL_SECONDS and are refetched; if
+  the refetch fails the stale copy is still served; expired entries nobody
+  asked for again are deleted on the first store after
+  TRANSCRIPT_CACHE_PURGE_INTERVAL_SECONDS
+- Transcript doubles as a time index: index_at()/window() find the
+  segments around a timestamp by binary search over the start column
+- "transcripts disabled" / "no transcript" results are cached too (for the
+  shorter TRANSCRIPT_NEGATIVE_TTL_SECONDS), so repeated clicks on a video
+  without captions don't hit YouTube either
+
+Like SQLiteSessionStore, the file is shared by every worker process on the
+host (WAL mode) and each thread gets its own connection. The database is
+opened on first use, not at import.
+"""
+
+import sqlite3
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from bisect import bisect_right
+from typing import Dict, List, Optional, Sequence
+
+from config import (
+    TRANSCRIPT_CACHE_PATH,
+    TRANSCRIPT_CACHE_PURGE_INTERVAL_SECONDS,
+    TRANSCRIPT_CACHE_TTL_SECONDS,
+    TRANSCRIPT_NEGATIVE_TTL_SECONDS,
+)
+
+# Cache entry statuses
+STATUS_OK = "ok"
+STATUS_DISABLED = "disabled"
+STATUS_NOT_FOUND = "not_found"
+
+_MAGIC = b"YTT1"
+_HEADER = struct.Struct("<4sI")
+
+
+def format_timestamp(seconds: float) -> str:
+    """Video time as M:SS or H:MM:SS."""
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
+
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _le_array(typecode: str, data: bytes) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class Transcript:
+    """
+    Timed transcript segments stored column-wise.
+
+    starts[i] and durations[i] are in seconds; segment i's text is
+    text_buffer[offsets[i]:offsets[i + 1]].
+    """
+
+    def __init__(self, starts: array, durations: array, offsets: array, text_buffer: str):
+        self.starts = starts
+        self.durations = durations
+        self.offsets = offsets
+        self.text_buffer = text_buffer
+        self._text: Optional[str] = None
+
+    @classmethod
+    def from_segments(cls, segments: Sequence[Dict]) -> "Transcript":
+        """Build from the API's [{"text", "start", "duration"}, ...] list."""
+        starts, durations, offsets = array("d"), array("d"), array("I", [0])
+        pieces = []
+        for segment in segments:
+            starts.append(float(segment["start"]))
+            durations.append(float(segment.get("duration", 0.0)))
+            pieces.append(segment["text"])
+            offsets.append(offsets[-1] + len(segment["text"]))
+        return cls(starts, durations, offsets, "".join(pieces))
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def segment_text(self, index: int) -> str:
+        return self.text_buffer[self.offsets[index]:self.offsets[index + 1]]
+
+    def to_segments(self) -> List[Dict]:
+        """Expand back to the API's list-of-dicts form."""
+        return [
+            {"text": self.segment_text(i), "start": self.starts[i], "duration": self.durations[i]}
+            for i in range(len(self))
+        ]
+
+    @property
+    def text(self) -> str:
+        """Segments joined with spaces (the flat transcript)."""
+        if self._text is None:
+            self._text = " ".join(self.segment_text(i) for i in range(len(self)))
+        return self._text
+
+    def index_at(self, seconds: float) -> Optional[int]:
+        """
+        Index of the segment playing at `seconds` (binary search over starts).
+
+        Returns:
+            Segment index, or None if the time is before the first segment
+        """
+        index = bisect_right(self.starts, seconds) - 1
+        return index if index >= 0 else None
+
+    def window(self, seconds: float, before: float = 30.0, after: float = 30.0) -> List[int]:
+        """Indices of the segments overlapping [seconds - before, seconds + after]."""
+        first = self.index_at(seconds - before)
+        first = 0 if first is None else first
+        if first < len(self) and self.starts[first] + self.durations[first] < seconds - before:
+            first += 1
+        last = bisect_right(self.starts, seconds + after)
+        return list(range(first, last))
+
+    def window_text(self, seconds: float, before: float = 30.0, after: float = 30.0) -> str:
+        """Transcript text spoken around a timestamp."""
+        return " ".join(self.segment_text(i) for i in self.window(seconds, before, after))
+
+    @property
+    def duration(self) -> float:
+        if not len(self):
+            return 0.0
+        return self.starts[-1] + self.durations[-1]
+
+    def to_bytes(self) -> bytes:
+        """Compact binary encoding (zlib over the columns and the UTF-8 text)."""
+        raw = b"".join([
+            _HEADER.pack(_MAGIC, len(self)),
+            _le_bytes(self.starts),
+            _le_bytes(self.durations),
+            _le_bytes(self.offsets),
+            self.text_buffer.encode("utf-8"),
+        ])
+        return zlib.compress(raw, 6)
+
+    @classmethod
+    def from_bytes(cls, blob: bytes) -> "Transcript":
+        raw = zlib.decompress(blob)
+        magic, count = _HEADER.unpack_from(raw)
+        if magic != _MAGIC:
+            raise ValueError(f"Unknown transcript format: {magic!r}")
+        position = _HEADER.size
+        columns = []
+        for typecode, length in (("d", count), ("d", count), ("I", count + 1)):
+            size = array(typecode).itemsize * length
+            columns.append(_le_array(typecode, raw[position:position + size]))
+            position += size
+        return cls(*columns, raw[position:].decode("utf-8"))
+
+
+class CachedTranscript:
+    """A cache lookup result: a transcript, or a cached "no transcript" status."""
+
+    def __init__(self, status: str, transcript: Optional[Transcript], fetched_at: float, expired: bool):
+        self.status = status
+        self.transcript = transcript
+        self.fetched_at = fetched_at
+        self.expired = expired
+
+
+class TranscriptCache:
+    """SQLite cache of transcripts and negative results, keyed by video id + languages."""
+
+    def __init__(
+        self,
+        path: str = TRANSCRIPT_CACHE_PATH,
+        ttl_seconds: float = TRANSCRIPT_CACHE_TTL_SECONDS,
+        negative_ttl_seconds: float = TRANSCRIPT_NEGATIVE_TTL_SECONDS,
+        purge_interval: float = TRANSCRIPT_CACHE_PURGE_INTERVAL_SECONDS,
+    ):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.purge_interval = purge_interval
+        self._next_purge = time.time() + purge_interval
+        self._purge_lock = threading.Lock()
+        self._local = threading.local()
+
+    @staticmethod
+    def language_key(languages: Sequence[str]) -> str:
+        return ",".join(languages)
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """CREATE TABLE IF NOT EXISTS transcripts (
+                    video_id TEXT NOT NULL,
+                    languages TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    data BLOB,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (video_id, languages)
+                )"""
+            )
+            conn.commit()
+            self._local.conn = conn
+        return conn
+
+    def get(self, video_id: str, languages: Sequence[str], now: Optional[float] = None) -> Optional[CachedTranscript]:
+        """
+        Look up a video. Expired entries are still returned (flagged expired)
+        so callers can fall back to them if a refetch fails.
+
+        Returns:
+            CachedTranscript, or None if the video was never cached
+        """
+        row = self._connection().execute(
+            "SELECT status, data, fetched_at FROM transcripts WHERE video_id = ? AND languages = ?",
+            (video_id, self.language_key(languages)),
+        ).fetchone()
+        if row is None:
+            return None
+
+        status, data, fetched_at = row
+        ttl = self.ttl_seconds if status == STATUS_OK else self.negative_ttl_seconds
+        expired = fetched_at + ttl < (now or time.time())
+        transcript = Transcript.from_bytes(bytes(data)) if status == STATUS_OK else None
+        return CachedTranscript(status, transcript, fetched_at, expired)
+
+    def _put(self, video_id: str, languages: Sequence[str], status: str, data: Optional[bytes]):
+        conn = self._connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO transcripts (video_id, languages, status, data, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (video_id, self.language_key(languages), status,
+             sqlite3.Binary(data) if data is not None else None, time.time()),
+        )
+        conn.commit()
+        self._maybe_purge()
+
+    def put(self, video_id: str, languages: Sequence[str], transcript: Transcript):
+        """Cache a fetched transcript."""
+        self._put(video_id, languages, STATUS_OK, transcript.to_bytes())
+
+    def put_negative(self, video_id: str, languages: Sequence[str], status: str):
+        """Cache a "transcripts disabled" / "no transcript found" result."""
+        self._put(video_id, languages, status, None)
+
+    def delete(self, video_id: str):
+        conn = self._connection()
+        conn.execute("DELETE FROM transcripts WHERE video_id = ?", (video_id,))
+        conn.commit()
+
+    def purge_expired(self) -> int:
+        """
+        Delete every expired entry.
+
+        Returns:
+            Number of entries removed
+        """
+        now = time.time()
+        conn = self._connection()
+        cursor = conn.execute(
+            "DELETE FROM transcripts WHERE (status = ? AND fetched_at < ?) OR (status != ? AND fetched_at < ?)",
+            (STATUS_OK, now - self.ttl_seconds, STATUS_OK, now - self.negative_ttl_seconds),
+        )
+        conn.commit()
+        return cursor.rowcount
+
+    def _maybe_purge(self):
+        """Run purge_expired() if purge_interval has passed since the last sweep."""
+        with self._purge_lock:
+            if time.time() < self._next_purge:
+                return
+            self._next_purge = time.time() + self.purge_interval
+        self.purge_expired()
+
+
+# Global instance
+transcript_cache = TranscriptCache()
@@ -0,0 +1,388 @@
+"""
+Chunked, concurrent text-to-speech for Studio audio and video narration.
+
+gTTS used to synthesize each script in one serial request chain. Scripts are
+now split at sentence boundaries, each sentence is synthesized on a bounded
+thread pool, and the MP3 chunks are concatenated in order (MP3 frames can be
+joined byte-for-byte). Per-sentence audio is cached by a hash of the backend
+settings and text, so regenerating a script that shares sentences with an
+earlier one - or re-rendering the same script as video - only synthesizes
+what changed.
+
+stream_speech() exposes the chunks progressively through an in-memory
+SpeechStream, so the audio modal can start playback after the first sentence
+(time-to-first-audio) instead of after the whole script.
+
+Backends are pluggable. "gtts" (default) needs network access; "pyttsx3"
+runs fully offline using the system speech engine (espeak/SAPI/NSSpeech).
+Select one with the TTS_BACKEND setting or assign tts_pipeline.backend.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from typing import Callable, Dict, List, Optional
+
+from config import TTS_BACKEND, TTS_CACHE_MAX_BYTES, TTS_MAX_CHUNK_CHARS, TTS_WORKERS
+
+try:
+    from gtts import gTTS
+    GTTS_AVAILABLE = True
+except ImportError:
+    GTTS_AVAILABLE = False
+
+try:
+    import pyttsx3
+    PYTTSX3_AVAILABLE = True
+except ImportError:
+    PYTTSX3_AVAILABLE = False
+
+_SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
+_CLAUSE_BOUNDARY = re.compile(r'(?<=[,;:])\s+')
+
+
+def split_sentences(text: str, max_chars: int = TTS_MAX_CHUNK_CHARS) -> List[str]:
+    """
+    Split text into sentences, breaking overly long sentences at clause
+    boundaries so no chunk greatly exceeds max_chars.
+
+    Args:
+        text: Plain text
+        max_chars: Soft limit on chunk length
+
+    Returns:
+        List of non-empty chunks in order
+    """
+    chunks = []
+    for sentence in _SENTENCE_BOUNDARY.split(text):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if len(sentence) <= max_chars:
+            chunks.append(sentence)
+            continue
+
+        current = ""
+        for clause in _CLAUSE_BOUNDARY.split(sentence):
+            if current and len(current) + len(clause) + 1 > max_chars:
+                chunks.append(current)
+                current = clause
+            else:
+                current = f"{current} {clause}".strip()
+        if current:
+            chunks.append(current)
+    return chunks
+
+
+class TTSBackend:
+    """Base class: synthesize one chunk of text to MP3 bytes."""
+
+    name = "base"
+
+    def cache_id(self) -> str:
+        """Identifies settings that affect the audio (part of the cache key)."""
+        return self.name
+
+    def synthesize(self, text: str) -> bytes:
+        raise NotImplementedError
+
+
+class GTTSBackend(TTSBackend):
+    """Google Translate TTS (requires network access)."""
+
+    name = "gtts"
+
+    def __init__(self, lang: str = "en", slow: bool = False):
+        if not GTTS_AVAILABLE:
+            raise ImportError("gTTS is not installed. Run: pip install gTTS")
+        self.lang = lang
+        self.slow = slow
+
+    def cache_id(self) -> str:
+        return f"{self.name}:{self.lang}:{self.slow}"
+
+    def synthesize(self, text: str) -> bytes:
+        buffer = BytesIO()
+        gTTS(text=text, lang=self.lang, slow=self.slow).write_to_fp(buffer)
+        return buffer.getvalue()
+
+
+class Pyttsx3Backend(TTSBackend):
+    """
+    Offline TTS through pyttsx3 and the platform speech engine. The engine
+    writes WAV, which ffmpeg converts to MP3 so chunks concatenate cleanly.
+    """
+
+    name = "pyttsx3"
+
+    def __init__(self, rate: int = 175):
+        if not PYTTSX3_AVAILABLE:
+            raise ImportError("pyttsx3 is not installed. Run: pip install pyttsx3")
+        self.rate = rate
+        # pyttsx3 engines are not thread-safe
+        self._lock = threading.Lock()
+
+    def cache_id(self) -> str:
+        return f"{self.name}:{self.rate}"
+
+    def synthesize(self, text: str) -> bytes:
+        from video_encoder import run_ffmpeg
+
+        with tempfile.TemporaryDirectory() as tmp:
+            wav_path = os.path.join(tmp, "chunk.wav")
+            mp3_path = os.path.join(tmp, "chunk.mp3")
+            with self._lock:
+                engine = pyttsx3.init()
+                engine.setProperty("rate", self.rate)
+                engine.save_to_file(text, wav_path)
+                engine.runAndWait()
+            run_ffmpeg([
+                "-i", wav_path, "-ar", "24000", "-ac", "1", "-c:a", "libmp3lame", "-b:a", "48k",
+                "-write_xing", "0", "-id3v2_version", "0", mp3_path
+            ])
+            with open(mp3_path, "rb") as mp3_file:
+                return mp3_file.read()
+
+
+TTS_BACKENDS = {
+    "gtts": GTTSBackend,
+    "pyttsx3": Pyttsx3Backend,
+}
+
+
+def create_tts_backend(name: str = TTS_BACKEND) -> TTSBackend:
+    """
+    Create a TTS backend by name.
+
+    Raises:
+        ValueError: If the backend name is unknown
+        ImportError: If the backend's library is not installed
+    """
+    if name not in TTS_BACKENDS:
+        raise ValueError(f"Unknown TTS backend: {name}. Choose from {sorted(TTS_BACKENDS)}")
+    return TTS_BACKENDS[name]()
+
+
+class SpeechCache:
+    """Size-bounded LRU cache of synthesized chunks keyed by backend + text hash."""
+
+    def __init__(self, max_bytes: int = TTS_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._chunks: "OrderedDict[str, bytes]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(backend: TTSBackend, text: str) -> str:
+        return hashlib.sha256(f"{backend.cache_id()}\n{text}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            audio = self._chunks.get(key)
+            if audio is None:
+                self.stats["misses"] += 1
+                return None
+            self._chunks.move_to_end(key)
+            self.stats["hits"] += 1
+            return audio
+
+    def put(self, key: str, audio: bytes):
+        if len(audio) > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._chunks:
+                self._total_bytes -= len(self._chunks.pop(key))
+            self._chunks[key] = audio
+            self._total_bytes += len(audio)
+            while self._total_bytes > self.max_bytes:
+                _, evicted = self._chunks.popitem(last=False)
+                self._total_bytes -= len(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._chunks.clear()
+            self._total_bytes = 0
+            self.stats = {"hits": 0, "misses": 0}
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._chunks), "total_bytes": self._total_bytes}
+
+
+# Global instances (one per process; render workers each keep their own cache)
+speech_cache = SpeechCache()
+backend: Optional[TTSBackend] = None
+_backend_lock = threading.Lock()
+_tts_pool = ThreadPoolExecutor(max_workers=TTS_WORKERS, thread_name_prefix="tts")
+
+
+def get_tts_backend() -> TTSBackend:
+    """Return the configured backend, creating it on first use."""
+    global backend
+    with _backend_lock:
+        if backend is None:
+            backend = create_tts_backend()
+        return backend
+
+
+def _synthesize_chunk(tts: TTSBackend, text: str) -> bytes:
+    key = SpeechCache.make_key(tts, text)
+    audio = speech_cache.get(key)
+    if audio is None:
+        audio = tts.synthesize(text)
+        speech_cache.put(key, audio)
+    return audio
+
+
+class SpeechStream:
+    """
+    In-memory segment buffer for progressive playback. Chunks are synthesized
+    concurrently but released strictly in order, so a player can start on the
+    first sentence while the rest are still being generated.
+    """
+
+    def __init__(self, total: int):
+        self.total = total
+        self.started_at = time.perf_counter()
+        self.first_audio_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.error: Optional[BaseException] = None
+        self._segments: List[bytes] = []
+        self._pending: Dict[int, bytes] = {}
+        self._callbacks: List[Callable[["SpeechStream"], None]] = []
+        self._condition = threading.Condition()
+        if total == 0:
+            self.finished_at = self.started_at
+
+    def _add(self, index: int, audio: bytes):
+        with self._condition:
+            self._pending[index] = audio
+            while len(self._segments) in self._pending:
+                self._segments.append(self._pending.pop(len(self._segments)))
+                if self.first_audio_at is None:
+                    self.first_audio_at = time.perf_counter()
+            if len(self._segments) == self.total:
+                self.finished_at = time.perf_counter()
+            self._condition.notify_all()
+        if self.done():
+            self._run_callbacks()
+
+    def _fail(self, error: BaseException):
+        with self._condition:
+            if self.finished_at is not None:
+                return
+            self.error = error
+            self.finished_at = time.perf_counter()
+            self._condition.notify_all()
+        self._run_callbacks()
+
+    def _run_callbacks(self):
+        with self._condition:
+            callbacks, self._callbacks = self._callbacks, []
+        for callback in callbacks:
+            callback(self)
+
+    def add_done_callback(self, fn: Callable[["SpeechStream"], None]):
+        """Call fn(stream) once every chunk is ready (or synthesis failed)."""
+        with self._condition:
+            if self.finished_at is None:
+                self._callbacks.append(fn)
+                return
+        fn(self)
+
+    def done(self) -> bool:
+        return self.finished_at is not None
+
+    def ready_count(self) -> int:
+        with self._condition:
+            return len(self._segments)
+
+    def segments(self, start: int = 0, timeout: Optional[float] = None) -> List[bytes]:
+        """
+        Wait until segments beyond `start` are ready (or the stream ends).
+
+        Returns:
+            Newly available segments, in order (empty if the stream ended or timed out)
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: len(self._segments) > start or self.done(), timeout)
+            if self.error is not None:
+                raise self.error
+            return self._segments[start:]
+
+    def result(self, timeout: Optional[float] = None) -> bytes:
+        """Wait for the whole narration and return it as one MP3."""
+        with self._condition:
+            self._condition.wait_for(self.done, timeout)
+            if self.error is not None:
+                raise self.error
+            return b"".join(self._segments)
+
+    @property
+    def time_to_first_audio(self) -> Optional[float]:
+        """Seconds from start until the first segment was playable."""
+        if self.first_audio_at is None:
+            return None
+        return self.first_audio_at - self.started_at
+
+    @property
+    def total_time(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+
+def stream_speech(text: str) -> SpeechStream:
+    """
+    Start synthesizing text on the shared TTS pool and return immediately.
+
+    Args:
+        text: Plain text to speak
+
+    Returns:
+        SpeechStream that fills with MP3 segments in sentence order
+    """
+    tts = get_tts_backend()
+    chunks = split_sentences(text)
+    stream = SpeechStream(len(chunks))
+
+    def deliver(index, future):
+        error = future.exception()
+        if error is not None:
+            stream._fail(error)
+        else:
+            stream._add(index, future.result())
+
+    for index, chunk in enumerate(chunks):
+        future = _tts_pool.submit(_synthesize_chunk, tts, chunk)
+        future.add_done_callback(lambda f, index=index: deliver(index, f))
+    return stream
+
+
+def synthesize_speech(text: str, on_progress: Optional[Callable[[int, int], None]] = None) -> bytes:
+    """
+    Synthesize text to MP3, sentence by sentence on the shared TTS pool.
+
+    Args:
+        text: Plain text to speak
+        on_progress: Optional callback(chunks_done, chunks_total), called from
+            the calling thread as chunks complete in order
+
+    Returns:
+        MP3 bytes for the whole text
+    """
+    stream = stream_speech(text)
+    ready = 0
+    while ready < stream.total:
+        for _ in stream.segments(ready):
+            ready += 1
+            if on_progress:
+                on_progress(ready, stream.total)
+    return stream.result()
@@ -1,15 +1,30 @@
+import hashlib
 import json
 import time
+import uuid
+from contextlib import closing
 from typing import Dict, List, Optional, Tuple
 from openrouter_client import client
 from config import (
     MODELS,
+    RETRIEVAL_TOP_K,
     SOLUTION_GENERATOR_PROMPT,
     TUTOR_PROMPT,
     VERIFIER_PROMPT,
     VISION_PROMPT,
 )
+from retrieval import BM25Index, chunk_text, chunk_transcript, format_retrieved_context
+from transcript_cache import Transcript
 from utils import format_verification_result, truncate_conversation_history
+from vision_cache import image_fingerprint, vision_cache
+
+
+def _with_context(message: Dict, context: str) -> Dict:
+    """Copy of a user message with retrieved context prepended (string or content-part form)."""
+    content = message["content"]
+    if isinstance(content, list):
+        return {**message, "content": [{"type": "text", "text": context}] + content}
+    return {**message, "content": f"{context}\n\nSTUDENT MESSAGE:\n{content}"}
 
 
 class TutoringEngine:
@@ -30,6 +45,10 @@ class TutoringEngine:
         self.problem_statement: Optional[str] = None
         self.conversation_history: List[Dict] = []
         self.verification_cache: Dict[str, Dict] = {}
+        # Full source material (long transcripts/pages), retrieved per turn
+        self.source_index: Optional[BM25Index] = None
+        # Scope for near-identical image matches in the shared vision cache
+        self.vision_scope = uuid.uuid4().hex
 
         # Performance metrics
         self.metrics = {
@@ -46,12 +65,23 @@ class TutoringEngine:
         - GPT-4o-mini provides best value for multimodal input
         - Vision models have limitations with handwriting (~24% WER)
 
+        Exact images reuse the cached result (see vision_cache.py), and so do
+        near-identical ones this session processed before, so Streamlit reruns
+        of the paste flow don't call the model again.
+
         Args:
             image_data: Base64 encoded image
 
         Returns:
             Extracted problem statement
         """
+        fingerprint = image_fingerprint(image_data)
+        if fingerprint is not None:
+            cached_text = vision_cache.get(fingerprint, scope=self.vision_scope)
+            if cached_text is not None:
+                self.problem_statement = cached_text
+                return cached_text
+
         try:
             response = client.chat_completion_with_vision(
                 model=MODELS["vision"],
@@ -62,6 +92,8 @@ class TutoringEngine:
 
             problem_text = response["choices"][0]["message"]["content"]
             self.problem_statement = problem_text
+            if fingerprint is not None:
+                vision_cache.put(fingerprint, problem_text, scope=self.vision_scope)
             return problem_text
 
         except Exception as e:
@@ -143,7 +175,8 @@ class TutoringEngine:
             }
 
         # Check cache to avoid redundant verification
-        cache_key = hash(student_work)
+        # (stable digest, not hash(), so keys stay valid across worker processes)
+        cache_key = hashlib.sha256(student_work.encode("utf-8")).hexdigest()
         if cache_key in self.verification_cache:
             return self.verification_cache[cache_key]
 
@@ -212,6 +245,45 @@ Verify the student's work and provide feedback in JSON format.""",
                 "hint_suggestion": "Let's continue working through this together.",
             }
 
+    def load_source(self, text: str, source: str = "", transcript=None):
+        """
+        Index long source material (transcript, web page) for retrieval.
+
+        The problem statement keeps only an overview; chat() retrieves the
+        chunks relevant to each student message from this index.
+
+        Args:
+            text: Full source text
+            source: Label for the source (URL, video id)
+            transcript: Optional timed Transcript; chunks then carry time ranges
+        """
+        self.load_sources([(text, source, transcript)])
+
+    def load_sources(self, sources: List[Tuple[str, str, Optional[Transcript]]]):
+        """
+        Index several sources (a whole unit) into one retrieval index.
+
+        Args:
+            sources: (text, source label, transcript or None) per source
+        """
+        chunks = []
+        for text, source, transcript in sources:
+            chunks.extend(chunk_transcript(transcript, source) if transcript is not None else chunk_text(text, source))
+        self.source_index = BM25Index(chunks)
+
+    def retrieve_context(self, query: str, k: int = RETRIEVAL_TOP_K) -> Optional[str]:
+        """
+        Top-k source excerpts for a query, formatted for the prompt.
+
+        Returns:
+            Prompt section, or None if there is no source or nothing matched
+        """
+        if self.source_index is None:
+            return None
+        return format_retrieved_context(
+            self.source_index.retrieve(query, k), show_source=len(self.source_index.sources) > 1
+        )
+
     def chat(self, user_message: str, stream: bool = True):
         """
         Stage 3: Student-facing tutoring with Socratic guidance.
@@ -259,6 +331,13 @@ Your role is to guide them to solve it themselves through questions and hints.
             ),
         )
 
+        # Retrieved excerpts go on this turn's message only (not the cached
+        # system prompt or the stored history), so each turn carries just the
+        # chunks relevant to it
+        retrieved_context = self.retrieve_context(user_message)
+        if retrieved_context:
+            messages[-1] = _with_context(messages[-1], retrieved_context)
+
         if stream:
             # Stream response for better perceived latency
             return self._stream_chat(messages)
@@ -296,21 +375,21 @@ Your role is to guide them to solve it themselves through questions and hints.
         usage_info = None
 
         try:
-            stream = client.chat_completion(
+            # closing(): a client that disconnects mid-reply frees the connection slot now
+            with closing(client.chat_completion(
                 model=MODELS["tutor"], messages=messages, stream=True, temperature=0.7
-            )
-
-            for chunk in stream:
-                if "choices" in chunk and len(chunk["choices"]) > 0:
-                    delta = chunk["choices"][0].get("delta", {})
-                    content = delta.get("content", "")
-                    if content:
-                        assistant_message += content
-                        yield content
-
-                # Capture usage info from final chunk
-                if "usage" in chunk:
-                    usage_info = chunk["usage"]
+            )) as stream:
+                for chunk in stream:
+                    if "choices" in chunk and len(chunk["choices"]) > 0:
+                        delta = chunk["choices"][0].get("delta", {})
+                        content = delta.get("content", "")
+                        if content:
+                            assistant_message += content
+                            yield content
+
+                    # Capture usage info from final chunk
+                    if "usage" in chunk:
+                        usage_info = chunk["usage"]
 
             # Save complete message to history
             self.conversation_history.append(
@@ -349,12 +428,58 @@ Your role is to guide them to solve it themselves through questions and hints.
             "has_reference_solution": self.reference_solution is not None,
         }
 
+    def to_dict(self, include_source_index: bool = True) -> Dict:
+        """
+        Serialize session state so it can be persisted outside this process.
+
+        Args:
+            include_source_index: Serialize the source index too (the session
+                store saves it separately, once per source)
+
+        Returns:
+            JSON-serializable dictionary (see session_store.py)
+        """
+        state = {
+            "problem_statement": self.problem_statement,
+            "reference_solution": self.reference_solution,
+            "conversation_history": self.conversation_history,
+            "verification_cache": self.verification_cache,
+            "metrics": self.metrics,
+            "vision_scope": self.vision_scope,
+        }
+        if include_source_index:
+            state["source_index"] = self.source_index.to_dict() if self.source_index else None
+        return state
+
+    @classmethod
+    def from_dict(cls, state: Dict) -> "TutoringEngine":
+        """
+        Restore an engine from a dictionary produced by to_dict.
+
+        Args:
+            state: Serialized session state
+
+        Returns:
+            TutoringEngine with the saved state
+        """
+        engine = cls()
+        engine.problem_statement = state.get("problem_statement")
+        engine.reference_solution = state.get("reference_solution")
+        engine.conversation_history = list(state.get("conversation_history", []))
+        engine.verification_cache = dict(state.get("verification_cache", {}))
+        engine.metrics.update(state.get("metrics", {}))
+        engine.vision_scope = state.get("vision_scope") or engine.vision_scope
+        if state.get("source_index"):
+            engine.source_index = BM25Index.from_dict(state["source_index"])
+        return engine
+
     def reset(self):
         """Reset the tutoring session."""
         self.reference_solution = None
         self.problem_statement = None
         self.conversation_history = []
         self.verification_cache = {}
+        self.source_index = None
         self.metrics = {
             "solution_generation_time": 0,
             "total_tutor_tokens": 0,
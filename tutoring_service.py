@@ -0,0 +1,227 @@
+"""
+Headless tutoring service.
+
+Exposes TutoringEngine over an async HTTP API so frontends other than the
+Streamlit app can use it, and so the model-calling core can be scaled
+independently of UI rendering:
+
+    uvicorn tutoring_service:app --workers 4
+
+Sessions are kept in the shared session store (see session_store.py), so any
+worker can serve any request. Use the sqlite or redis backend when running
+more than one worker.
+
+Requests that change a session (problem, chat, verify) first claim it: a
+compare-and-set save marks it busy until the request saves its result.
+A second request for the same session meanwhile gets 409 Conflict instead
+of both loading the same state and the later save dropping the other's turn.
+
+Endpoints:
+    POST   /sessions                       Create a session
+    POST   /sessions/{session_id}/problem  Set up a problem (text or image)
+    POST   /sessions/{session_id}/chat     Tutor reply, streamed as Server-Sent Events
+    POST   /sessions/{session_id}/verify   Verify student work
+    GET    /sessions/{session_id}/metrics  Session metrics
+    DELETE /sessions/{session_id}          End a session
+"""
+
+import json
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+
+from config import APP_TITLE, SERVICE_HOST, SERVICE_PORT, SESSION_CLAIM_SECONDS
+from session_store import SessionConflict, create_session_store
+from tutoring_engine import TutoringEngine
+
+app = FastAPI(title=f"{APP_TITLE} API")
+store = create_session_store()
+
+
+class ProblemRequest(BaseModel):
+    problem_text: Optional[str] = None
+    image_data: Optional[str] = None  # Base64 data URI, extracted with the vision model
+
+
+class ChatRequest(BaseModel):
+    message: str
+
+
+class VerifyRequest(BaseModel):
+    student_work: str
+
+
+def _load_engine(session_id: str) -> TutoringEngine:
+    engine = store.load_engine(session_id)
+    if engine is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return engine
+
+
+def _claim_session(session_id: str) -> Tuple[TutoringEngine, int]:
+    """
+    Load a session and mark it busy for this request.
+
+    Returns:
+        (engine, version of the claimed session) for _save_claimed
+
+    Raises:
+        HTTPException: 404 if the session doesn't exist, 409 if another
+            request holds it or claimed it first
+    """
+    state, version = store.load_versioned(session_id)
+    if state is None or "engine" not in state:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if state.get("busy_until", 0) > time.time():
+        raise HTTPException(status_code=409, detail="Session is busy with another request")
+
+    state["busy_until"] = time.time() + SESSION_CLAIM_SECONDS
+    try:
+        version = store.save(session_id, state, expected_version=version)
+    except SessionConflict:
+        raise HTTPException(status_code=409, detail="Session was changed by another request")
+    return store.restore_engine(state), version
+
+
+def _save_claimed(session_id: str, engine: TutoringEngine, version: int):
+    """Save the request's result and release the claim."""
+    try:
+        store.save_engine(session_id, engine, expected_version=version)
+    except SessionConflict:
+        raise HTTPException(status_code=409, detail="Session was changed by another request")
+
+
+def _release_claim(session_id: str, version: int):
+    """Release a claim without saving changes (the request failed)."""
+    state, current = store.load_versioned(session_id)
+    if state is None or current != version:
+        return
+    state.pop("busy_until", None)
+    try:
+        store.save(session_id, state, expected_version=version)
+    except SessionConflict:
+        pass
+
+
+def _sse(data: Dict, event: Optional[str] = None) -> str:
+    """Format one Server-Sent Event."""
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+
+@app.post("/sessions")
+async def create_session() -> Dict:
+    session_id = uuid.uuid4().hex
+    await run_in_threadpool(store.save_engine, session_id, TutoringEngine())
+    return {"session_id": session_id}
+
+
+@app.post("/sessions/{session_id}/problem")
+async def setup_problem(session_id: str, request: ProblemRequest) -> Dict:
+    """
+    Extract the problem (if an image was sent) and generate the reference solution.
+
+    The reference solution is never returned - it stays server-side, exactly as
+    in the Streamlit app. A new problem starts a new conversation.
+    """
+    if not request.problem_text and not request.image_data:
+        raise HTTPException(status_code=400, detail="Provide problem_text or image_data")
+
+    engine, version = await run_in_threadpool(_claim_session, session_id)
+    try:
+        problem_text = request.problem_text
+        if request.image_data:
+            problem_text = await run_in_threadpool(engine.process_problem_image, request.image_data)
+        if not problem_text or problem_text.startswith("Error"):
+            raise HTTPException(status_code=502, detail=problem_text or "No problem found in the image")
+
+        solution, generation_time = await run_in_threadpool(engine.generate_reference_solution, problem_text)
+        if solution.startswith("Error"):
+            raise HTTPException(status_code=502, detail=solution)
+
+        # Turns and verdicts about the previous problem don't carry over
+        engine.conversation_history = []
+        engine.verification_cache = {}
+        await run_in_threadpool(_save_claimed, session_id, engine, version)
+    except BaseException:
+        await run_in_threadpool(_release_claim, session_id, version)
+        raise
+    return {
+        "problem_statement": engine.problem_statement,
+        "setup_time": generation_time,
+    }
+
+
+@app.post("/sessions/{session_id}/chat")
+async def chat(session_id: str, request: ChatRequest) -> StreamingResponse:
+    """
+    Stream the tutor's reply as Server-Sent Events.
+
+    Each chunk is sent as `data: {"content": "..."}`; a final `done` event
+    carries the updated session metrics. If the turn can't be saved (the
+    claim expired and another request took the session), an `error` event
+    with status 409 is sent instead.
+    """
+    engine, version = await run_in_threadpool(_claim_session, session_id)
+    if not engine.problem_statement:
+        await run_in_threadpool(_release_claim, session_id, version)
+        raise HTTPException(status_code=409, detail="Set up a problem first")
+
+    def event_stream():
+        # Sync generator: Starlette iterates it in a worker thread, so the
+        # blocking model call never stalls the event loop
+        saved = False
+        try:
+            for chunk in engine.chat(request.message, stream=True):
+                yield _sse({"content": chunk})
+            try:
+                _save_claimed(session_id, engine, version)
+            except HTTPException as e:
+                yield _sse({"status": e.status_code, "detail": e.detail}, event="error")
+                return
+            saved = True
+            yield _sse(engine.get_metrics(), event="done")
+        finally:
+            if not saved:
+                _release_claim(session_id, version)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.post("/sessions/{session_id}/verify")
+async def verify(session_id: str, request: VerifyRequest) -> Dict:
+    engine, version = await run_in_threadpool(_claim_session, session_id)
+    try:
+        result = await run_in_threadpool(engine.verify_student_work, request.student_work)
+        await run_in_threadpool(_save_claimed, session_id, engine, version)
+    except BaseException:
+        await run_in_threadpool(_release_claim, session_id, version)
+        raise
+    return result
+
+
+@app.get("/sessions/{session_id}/metrics")
+async def metrics(session_id: str) -> Dict:
+    engine = await run_in_threadpool(_load_engine, session_id)
+    return engine.get_metrics()
+
+
+@app.delete("/sessions/{session_id}")
+async def delete_session(session_id: str) -> Dict:
+    await run_in_threadpool(store.delete, session_id)
+    return {"deleted": session_id}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("tutoring_service:app", host=SERVICE_HOST, port=SERVICE_PORT)
@@ -1,9 +1,18 @@
 import base64
 import io
-from typing import Tuple, Optional
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait
+from typing import Iterator, List, Tuple, Optional
 from PIL import Image
 import PyPDF2
 from docx import Document
+from image_preprocessing import preprocess_image
+from config import PDF_MAX_PAGES, PDF_MAX_CHARS, PDF_PARALLEL_MIN_PAGES, PDF_PAGES_PER_TASK, PDF_POOL_WORKERS
 
 
 def encode_image_to_base64(image: Image.Image) -> str:
@@ -22,22 +31,140 @@ def encode_image_to_base64(image: Image.Image) -> str:
     return f"data:image/png;base64,{img_str}"
 
 
-def extract_text_from_pdf(pdf_file) -> str:
+# Per-process reader for pool workers: (file identity, reader) of the last PDF
+# seen, so a worker parses each document once however many ranges it extracts
+_worker_pdf = None
+
+# Process pool shared by every extraction in the process (sessions and batch
+# ingestion threads alike), started on first use
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            # spawn, not fork: the Streamlit server is multi-threaded
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=PDF_POOL_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _pdf_pool
+
+
+def _extract_page_range(pdf_path: str, start: int, stop: int) -> List[str]:
+    """Process pool worker: extract text for pages [start, stop)."""
+    global _worker_pdf
+    stat = os.stat(pdf_path)
+    identity = (pdf_path, stat.st_size, stat.st_mtime_ns)
+    if _worker_pdf is None or _worker_pdf[0] != identity:
+        _worker_pdf = (identity, PyPDF2.PdfReader(pdf_path))
+    reader = _worker_pdf[1]
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+def iter_pdf_pages(
+    pdf_file, max_pages: int = PDF_MAX_PAGES, workers: Optional[int] = None
+) -> Iterator[str]:
+    """
+    Yield the text of each PDF page lazily, in page order.
+
+    Small documents are read serially. For large ones this thread extracts
+    the first page range itself (so its reader isn't parsed for nothing)
+    while the rest are extracted in parallel by the shared process pool
+    (text extraction is CPU-bound), at most `workers` ranges in flight per
+    call. Pages are yielded in order as soon as their range is ready, and
+    closing the generator early cancels the ranges not yet started.
+
+    Args:
+        pdf_file: File-like object or path
+        max_pages: Stop after this many pages
+        workers: Ranges in flight on the shared pool (defaults to
+            PDF_POOL_WORKERS; 1 reads serially)
+
+    Yields:
+        Text of each page
+    """
+    reader = PyPDF2.PdfReader(pdf_file)
+    page_count = min(len(reader.pages), max_pages)
+    workers = workers or PDF_POOL_WORKERS
+
+    if workers < 2 or page_count < PDF_PARALLEL_MIN_PAGES:
+        for i in range(page_count):
+            yield reader.pages[i].extract_text() or ""
+        return
+
+    # Workers open the PDF themselves, so they need a path rather than the
+    # pickled upload. Spill in-memory uploads to a temp file in chunks.
+    temp_path = None
+    if isinstance(pdf_file, (str, os.PathLike)):
+        pdf_path = str(pdf_file)
+    else:
+        pdf_file.seek(0)
+        with tempfile.NamedTemporaryFile(suffix=".pdf", delete=False) as tmp:
+            shutil.copyfileobj(pdf_file, tmp)
+            temp_path = pdf_path = tmp.name
+
+    pool = _get_pdf_pool()
+    ranges = deque(
+        (start, min(start + PDF_PAGES_PER_TASK, page_count))
+        for start in range(PDF_PAGES_PER_TASK, page_count, PDF_PAGES_PER_TASK)
+    )
+    in_flight = deque()
+
+    def submit_ranges():
+        while ranges and len(in_flight) < workers:
+            in_flight.append(pool.submit(_extract_page_range, pdf_path, *ranges.popleft()))
+
+    try:
+        submit_ranges()
+        for i in range(min(PDF_PAGES_PER_TASK, page_count)):
+            yield reader.pages[i].extract_text() or ""
+        while in_flight:
+            pages = in_flight.popleft().result()
+            submit_ranges()
+            yield from pages
+    finally:
+        for future in in_flight:
+            future.cancel()
+        # Ranges already running still read the file
+        wait(in_flight)
+        if temp_path:
+            os.unlink(temp_path)
+
+
+def extract_text_from_pdf(
+    pdf_file, max_pages: int = PDF_MAX_PAGES, max_chars: int = PDF_MAX_CHARS
+) -> str:
     """
     Extract text from PDF file.
 
+    Pages are streamed from iter_pdf_pages and joined once at the end
+    (linear time), stopping at max_pages or max_chars.
+
     Args:
         pdf_file: File-like object (from Streamlit file_uploader)
+        max_pages: Maximum number of pages to read
+        max_chars: Maximum number of characters to return
 
     Returns:
         Extracted text
     """
     try:
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        pages = []
+        total_chars = 0
+        page_iter = iter_pdf_pages(pdf_file, max_pages)
+        try:
+            for text in page_iter:
+                remaining = max_chars - total_chars
+                if len(text) >= remaining:
+                    pages.append(text[:remaining])
+                    break
+                pages.append(text)
+                total_chars += len(text) + 1  # +1 for the joining newline
+        finally:
+            page_iter.close()
+        return "\n".join(pages).strip()
     except Exception as e:
         return f"Error extracting PDF text: {str(e)}"
 
@@ -62,6 +189,28 @@ def extract_text_from_docx(docx_file) -> str:
         return f"Error extracting DOCX text: {str(e)}"
 
 
+def detect_file_type(filename: str) -> Optional[str]:
+    """
+    Map an uploaded file name to the file_type used by process_uploaded_file.
+
+    Args:
+        filename: Name of the uploaded file
+
+    Returns:
+        "pdf", "docx", "text", "image", or None for unsupported files
+    """
+    name = filename.lower()
+    if name.endswith('.pdf'):
+        return 'pdf'
+    elif name.endswith('.docx'):
+        return 'docx'
+    elif name.endswith('.txt'):
+        return 'text'
+    elif name.endswith(('.png', '.jpg', '.jpeg')):
+        return 'image'
+    return None
+
+
 def process_uploaded_file(
     uploaded_file, file_type: str
 ) -> Tuple[str, Optional[str], str]:
@@ -90,7 +239,7 @@ def process_uploaded_file(
     elif file_type == "image":
         # For images, we'll use vision model to extract the problem
         image = Image.open(uploaded_file)
-        image_data = encode_image_to_base64(image)
+        image_data, _ = preprocess_image(image)
         return "", image_data, "vision_extraction"
 
     return "Unknown file type", None, "error"
@@ -0,0 +1,147 @@
+"""
+Perceptual-hash cache for vision extraction results.
+
+The paste flow in app.py re-processes the same screenshot on every Streamlit
+rerun, and students often re-upload the same worksheet. Entries are keyed on
+a digest of the preprocessed image (exact reuse) plus a difference hash
+(dHash) so near-identical images - re-encoded, recompressed, slightly
+resized - also reuse the earlier vision result instead of calling the model.
+
+Perceptual hashes cannot tell apart two images that differ only by a few
+characters (e.g. "2x + 5" vs "3x + 5" on the same layout), so near matches
+are only served within the scope (session) that stored the entry - the
+rerun/re-upload case - while other sessions only get exact matches. The
+near-match threshold is kept small and can be disabled with
+VISION_CACHE_MAX_DISTANCE = -1.
+"""
+
+import base64
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+from PIL import Image
+
+from config import VISION_CACHE_MAX_DISTANCE, VISION_CACHE_MAX_ENTRIES, VISION_HASH_SIZE
+
+
+def dhash(image: Image.Image, hash_size: int = VISION_HASH_SIZE) -> int:
+    """
+    Compute a difference hash: shrink to (hash_size + 1) x hash_size grayscale
+    and record whether each pixel is brighter than its right-hand neighbour.
+
+    Args:
+        image: PIL Image
+        hash_size: Hash is hash_size * hash_size bits
+
+    Returns:
+        Hash as an integer
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.LANCZOS)
+    pixels = small.tobytes()
+    bits = 0
+    for row in range(hash_size):
+        offset = row * (hash_size + 1)
+        for col in range(hash_size):
+            bits = (bits << 1) | (pixels[offset + col] > pixels[offset + col + 1])
+    return bits
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two hashes."""
+    return (a ^ b).bit_count()
+
+
+def image_fingerprint(image_data: str) -> Optional[Tuple[str, int]]:
+    """
+    Fingerprint a base64 data URI (as produced by preprocess_image).
+
+    Returns:
+        Tuple of (sha256 digest of the data, dHash of the image), or None if
+        the data could not be decoded as an image
+    """
+    try:
+        encoded = image_data.split(",", 1)[1] if image_data.startswith("data:") else image_data
+        raw = base64.b64decode(encoded)
+        return hashlib.sha256(raw).hexdigest(), dhash(Image.open(io.BytesIO(raw)))
+    except Exception:
+        return None
+
+
+class VisionCache:
+    """
+    Bounded LRU map from image fingerprint to extracted problem text.
+
+    Lookups try the exact digest first, then scan the caller's own entries
+    for the closest dHash within max_distance bits. With a few hundred
+    entries the scan costs microseconds, far less than a vision call.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = VISION_CACHE_MAX_ENTRIES,
+        max_distance: int = VISION_CACHE_MAX_DISTANCE,
+    ):
+        self.max_entries = max_entries
+        self.max_distance = max_distance
+        self._entries: "OrderedDict[str, Tuple[int, str, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "near_hits": 0, "misses": 0}
+
+    def get(self, fingerprint: Tuple[str, int], scope: Optional[str] = None) -> Optional[str]:
+        """
+        Look up extracted text for an image fingerprint.
+
+        Args:
+            fingerprint: From image_fingerprint()
+            scope: Caller's session; near matches are only taken from entries
+                stored with the same scope (None: exact matches only)
+
+        Returns:
+            Cached text, or None on a miss
+        """
+        digest, image_hash = fingerprint
+        with self._lock:
+            if digest in self._entries:
+                self._entries.move_to_end(digest)
+                self.stats["hits"] += 1
+                return self._entries[digest][1]
+
+            best_digest, best_distance = None, self.max_distance + 1
+            for cached_digest, (cached_hash, _, cached_scope) in self._entries.items():
+                if scope is None or cached_scope != scope:
+                    continue
+                distance = hamming_distance(image_hash, cached_hash)
+                if distance < best_distance:
+                    best_digest, best_distance = cached_digest, distance
+
+            if best_digest is None:
+                self.stats["misses"] += 1
+                return None
+
+            self._entries.move_to_end(best_digest)
+            self.stats["near_hits"] += 1
+            return self._entries[best_digest][1]
+
+    def put(self, fingerprint: Tuple[str, int], text: str, scope: Optional[str] = None):
+        """Store extracted text, evicting the least recently used entry when full."""
+        digest, image_hash = fingerprint
+        with self._lock:
+            self._entries[digest] = (image_hash, text, scope)
+            self._entries.move_to_end(digest)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {**self.stats, "entries": len(self._entries)}
+
+
+# Process-wide cache shared by every session (exact matches across sessions, near matches within one)
+vision_cache = VisionCache()